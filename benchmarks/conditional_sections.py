@@ -0,0 +1,92 @@
+"""
+Compares enriching profiles with all sections in parallel against conditional_sections,
+which fetches the top card first and skips the sections it shows are empty.
+Runs against a simulated LinkedIn with a fixed latency per request, so it needs no account.
+
+python benchmarks/conditional_sections.py [profiles] [sparse_share] [latency_ms]
+"""
+
+import json
+import sys
+import threading
+import time
+
+from staffspy.linkedin.linkedin import LinkedInScraper
+from staffspy.utils.models import Staff
+
+
+class SimulatedResponse:
+    def __init__(self, status_code: int, data: dict):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.reason = ""
+        self.text = json.dumps(data)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class SimulatedSession:
+    """Answers the top card with or without education, every other section with a 404"""
+
+    def __init__(self, sparse_ids: set[str], latency: float):
+        self.sparse_ids = sparse_ids
+        self.latency = latency
+        self.headers = {}
+        self.hooks = {"response": []}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, **kwargs):
+        return self.get(url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        if "TopCardComplete" not in url:
+            return SimulatedResponse(404, {})
+        employee_id = url.split("memberIdentity=")[1].split("&")[0]
+        sparse = employee_id in self.sparse_ids
+        return SimulatedResponse(200, {"elements": [top_card(employee_id, sparse)]})
+
+
+def top_card(employee_id: str, sparse: bool) -> dict:
+    return {
+        "publicIdentifier": employee_id,
+        "firstName": "Jane",
+        "lastName": "Doe",
+        "memberRelationship": {"memberRelationshipUnion": {"noConnection": {}}},
+        "profilePicture": {},
+        "connections": {"paging": {"total": 10}},
+        "profileTopPosition": {"elements": [] if sparse else [{"companyName": "Acme"}]},
+        "profileTopEducation": {
+            "elements": [] if sparse else [{"schoolName": "State University"}]
+        },
+    }
+
+
+def run(profiles: int, sparse_share: float, latency: float, conditional: bool):
+    staff = [Staff(id=f"ACo{i}", search_term="benchmark") for i in range(profiles)]
+    sparse_ids = {s.id for s in staff[: int(profiles * sparse_share)]}
+    session = SimulatedSession(sparse_ids, latency)
+    scraper = LinkedInScraper(session, conditional_sections=conditional)
+    start = time.perf_counter()
+    scraper.enrich_staff(staff)
+    return session.requests, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    profiles = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    sparse_share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 200) / 1000
+
+    print(
+        f"{profiles} profiles, {sparse_share:.0%} without positions & education, {latency * 1000:.0f} ms per request"
+    )
+    for conditional in (False, True):
+        requests, elapsed = run(profiles, sparse_share, latency, conditional)
+        mode = "conditional_sections" if conditional else "all sections"
+        print(
+            f"  {mode:<22} {requests:>5} requests  {elapsed:6.1f} s  {requests / profiles:.2f} requests / profile"
+        )
@@ -0,0 +1,51 @@
+"""
+Measures the cold import time of staffspy in fresh interpreters and which heavy
+optional modules the import pulls in.
+
+python benchmarks/import_time.py [runs]
+"""
+
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = [
+    "pandas",
+    "numpy",
+    "bs4",
+    "tldextract",
+    "dateutil",
+    "tenacity",
+    "twocaptcha",
+    "selenium",
+]
+
+SNIPPET = f"""
+import sys, time
+start = time.perf_counter()
+import staffspy
+elapsed = time.perf_counter() - start
+loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+print(elapsed, ",".join(loaded))
+"""
+
+
+def measure(runs: int):
+    timings, loaded = [], ""
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", SNIPPET], capture_output=True, text=True, check=True
+        ).stdout.split()
+        timings.append(float(out[0]))
+        loaded = out[1] if len(out) > 1 else ""
+    return timings, loaded
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    timings, loaded = measure(runs)
+    print(f"import staffspy over {runs} runs")
+    print(f"  median {statistics.median(timings) * 1000:.1f} ms")
+    print(f"  min    {min(timings) * 1000:.1f} ms")
+    print(f"  max    {max(timings) * 1000:.1f} ms")
+    print(f"  heavy modules loaded: {loaded or 'none'}")
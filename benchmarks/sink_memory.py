@@ -0,0 +1,118 @@
+"""
+Compares the peak memory of scrape_connections with extra profile data returning a DataFrame
+against streaming it to a jsonl sink, for growing numbers of connections.
+Runs against a simulated LinkedIn with no latency, so it needs no account.
+
+python benchmarks/sink_memory.py [profiles ...]
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from staffspy import LinkedInAccount
+from staffspy.utils.utils import logger
+
+
+class SimulatedResponse:
+    def __init__(self, status_code: int, data: dict):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.reason = ""
+        self.text = json.dumps(data)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class SimulatedSession:
+    """Answers the connection pages and the top cards, with a 4 KB headline so profiles weigh what real ones do"""
+
+    def __init__(self, profiles: int):
+        self.profiles = profiles
+        self.headers = {}
+        self.hooks = {"response": []}
+
+    def request(self, method: str, url: str, **kwargs):
+        return self.get(url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        if "CurationHub" in url:
+            offset = int(url.rsplit("start:", 1)[1].rstrip(")"))
+            items = [card(i) for i in range(offset, min(offset + 50, self.profiles))]
+            return SimulatedResponse(
+                200,
+                {
+                    "data": {
+                        "searchDashClustersByAll": {
+                            "elements": [{"items": items}],
+                            "metadata": {"totalResultCount": self.profiles},
+                        }
+                    }
+                },
+            )
+        if "TopCardComplete" in url:
+            employee_id = url.split("memberIdentity=")[1].split("&")[0]
+            return SimulatedResponse(200, {"elements": [top_card(employee_id)]})
+        return SimulatedResponse(404, {})
+
+
+def card(i: int) -> dict:
+    return {
+        "item": {
+            "entityResult": {
+                "entityUrn": f"urn:li:fsd_profile:ACo{i},SEARCH_SRP",
+                "trackingUrn": f"urn:li:member:{i}",
+                "title": {"text": f"Jane Doe {i}"},
+                "primarySubtitle": {"text": "Engineer"},
+                "navigationUrl": f"https://www.linkedin.com/in/jane-doe-{i}",
+            }
+        }
+    }
+
+
+def top_card(employee_id: str) -> dict:
+    return {
+        "publicIdentifier": employee_id,
+        "firstName": "Jane",
+        "lastName": "Doe",
+        "headline": "x" * 4096,
+        "memberRelationship": {"memberRelationshipUnion": {"noConnection": {}}},
+        "profilePicture": {},
+        "connections": {"paging": {"total": 10}},
+    }
+
+
+def run(profiles: int, sink: str = None) -> tuple[float, int]:
+    account = LinkedInAccount.__new__(LinkedInAccount)
+    account.on_block = False
+    account.output = "dataframe"
+    account.state_store = None
+    account.conditional_sections = False
+    account.session = SimulatedSession(profiles)
+
+    tracemalloc.start()
+    result = account.scrape_connections(extra_profile_data=True, sink=sink)
+    rows = result.rows if sink else len(result)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20, rows
+
+
+if __name__ == "__main__":
+    logger.setLevel(logging.CRITICAL)
+    sizes = [int(n) for n in sys.argv[1:]] or [500, 1000, 2000]
+    print("peak traced memory of scrape_connections(extra_profile_data=True)")
+    with tempfile.TemporaryDirectory() as tmp:
+        # warm up so the first measurement does not include importing pandas
+        run(50)
+        run(50, os.path.join(tmp, "connections.csv"))
+        for profiles in sizes:
+            in_memory, _ = run(profiles)
+            streamed, rows = run(profiles, os.path.join(tmp, "connections.jsonl"))
+            print(
+                f"  {profiles:>6} profiles  DataFrame {in_memory:7.1f} MB  jsonl sink {streamed:7.1f} MB  ({rows} rows written)"
+            )
@@ -1,6 +1,6 @@
 """ Script to connect with 10 software engineers daily from random tech companies """
 
-from staffspy import LinkedInAccount, DriverType, BrowserType
+from staffspy import LinkedInAccount, DriverType, BrowserType, StateStore
 import random
 import time
 from datetime import datetime
@@ -34,22 +34,28 @@ TECH_COMPANIES = [
 def connect_with_staff():
     print(f"Starting connection run at {datetime.now()}")
 
-    # Initialize LinkedIn account
-    account = LinkedInAccount(session_file="session.pkl", log_level=1)
+    # Initialize LinkedIn account, the state file keeps queued connection requests between runs
+    account = LinkedInAccount(
+        session_file="session.pkl", state_store=StateStore("state.db"), log_level=1
+    )
 
     # Choose a random company
     company = random.choice(TECH_COMPANIES)
     print(f"Selected company: {company}")
 
-    # Connect with 10 users
+    # Queue connection requests for 10 users
     account.scrape_staff(
         company_name=company,
         search_term="software engineer",
         max_results=10,
         extra_profile_data=True,
         connect=True,
+        queue_actions=True,
     )
 
+    # Send up to 10 queued requests today, the rest carry over to tomorrow
+    account.run_actions(daily_quotas={"connect": 10})
+
 
 if __name__ == "__main__":
     # Schedule to run once a day at 10 AM
@@ -1,36 +1,93 @@
+import hashlib
 import json
-import pandas as pd
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, TYPE_CHECKING
 
+from staffspy.linkedin.actions import ActionExecutor
+from staffspy.linkedin.changes import ChangeTracker
 from staffspy.linkedin.comments import CommentFetcher
-from staffspy.linkedin.linkedin import LinkedInScraper
-from staffspy.utils.models import Staff
-from staffspy.solvers.capsolver import CapSolver
+from staffspy.linkedin.linkedin import LinkedInScraper, failed_sections
+from staffspy.utils import tracing
+from staffspy.utils.exceptions import TooManyRequests
+from staffspy.utils.models import Comment, Staff
+from staffspy.solvers.solver import LazySolver
 from staffspy.solvers.solver_type import SolverType
-from staffspy.solvers.two_captcha import TwoCaptchaSolver
 from staffspy.utils.utils import (
     set_logger_level,
     logger,
     Login,
-    parse_company_data,
+    parse_company_record,
     extract_emails_from_text,
-    clean_df,
+    to_dataframe,
 )
+from staffspy.utils.account_pool import PooledAccount, PooledSession
+from staffspy.utils.budget import RequestBudget, keyword_priority
 from staffspy.utils.driver_type import DriverType, BrowserType
+from staffspy.utils.email_patterns import EmailPatternLearner
+from staffspy.utils.proxy_pool import ProxyPool
+from staffspy.utils.retry import CircuitBreaker, RetryPolicy
+from staffspy.utils.planner import (
+    ScrapePlan,
+    PROFILE_REQUESTS,
+    USER_REQUESTS,
+    company_requests,
+    search_pages,
+    visible_share,
+)
+from staffspy.utils.session_store import SessionStore
+from staffspy.utils.sinks import (
+    Sink,
+    SinkSummary,
+    CSVSink,
+    JSONLSink,
+    ParquetSink,
+    open_sink,
+)
+from staffspy.utils.state import StateStore
+from staffspy.utils.work_queue import WorkQueue
+from staffspy.utils.tracing import (
+    Tracer,
+    RecordingTracer,
+    OpenTelemetryTracer,
+    set_tracer,
+)
 
 __all__ = [
     "LinkedInAccount",
+    "AccountPool",
+    "ProxyPool",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "SessionStore",
+    "StateStore",
+    "WorkQueue",
+    "ScrapePlan",
+    "SinkSummary",
+    "CSVSink",
+    "JSONLSink",
+    "ParquetSink",
+    "keyword_priority",
+    "EmailPatternLearner",
     "SolverType",
     "DriverType",
     "BrowserType",
+    "Tracer",
+    "RecordingTracer",
+    "OpenTelemetryTracer",
 ]
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class LinkedInAccount:
     """LinkedinAccount storing cookie data and providing outer facing methods for client"""
 
     solver_map = {
-        SolverType.CAPSOLVER: CapSolver,
-        SolverType.TWO_CAPTCHA: TwoCaptchaSolver,
+        SolverType.CAPSOLVER: ("staffspy.solvers.capsolver", "CapSolver"),
+        SolverType.TWO_CAPTCHA: ("staffspy.solvers.two_captcha", "TwoCaptchaSolver"),
     }
 
     def __init__(
@@ -42,26 +99,52 @@ class LinkedInAccount:
         solver_api_key: str = None,
         solver_service: SolverType = SolverType.CAPSOLVER,
         driver_type: DriverType = None,
+        tracer: Tracer = None,
+        proxy_pool: ProxyPool = None,
+        session_store: SessionStore = None,
+        state_store: StateStore = None,
+        conditional_sections: bool = False,
+        retry_policy: RetryPolicy = None,
+        validate: str = "eager",
+        validation_ttl: int = 0,
+        output: str = "dataframe",
     ):
+        if output not in ("dataframe", "records"):
+            raise ValueError("output must be 'dataframe' or 'records'")
         self.session_file = session_file
         self.username = username
         self.password = password
         self.log_level = log_level
-        self.solver = self.solver_map[solver_service](solver_api_key)
+        self.solver = LazySolver(solver_api_key, *self.solver_map[solver_service])
         self.driver_type = driver_type
         self.session = None
         self.linkedin_scraper = None
         self.on_block = False
+        self.tracer = tracer
+        self.proxy_pool = proxy_pool
+        self.session_store = session_store
+        self.state_store = state_store
+        self.conditional_sections = conditional_sections
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.validate = validate
+        self.validation_ttl = validation_ttl
+        self.output = output
         self.login()
 
     def login(self):
         set_logger_level(self.log_level)
+        if self.tracer:
+            set_tracer(self.tracer)
         login = Login(
             self.username,
             self.password,
             self.solver,
             self.session_file,
             self.driver_type,
+            self.proxy_pool,
+            self.session_store,
+            self.validate,
+            self.validation_ttl,
         )
         self.session = login.load_session()
 
@@ -74,108 +157,317 @@ class LinkedInAccount:
         max_results: int = 1000,
         block: bool = False,
         connect: bool = False,
+        queue_actions: bool = False,
+        priority: Callable[[Staff], float] = None,
+        request_budget: int = None,
+        sink: str | Sink = None,
+        track_changes: bool = False,
     ):
         if self.on_block:
             return logger.error(
                 "Account is on cooldown as a safety precaution after receiving a 429 (TooManyRequests) from LinkedIn. Please recreate a new LinkedInAccount to proceed."
             )
         """Main function entry point to scrape LinkedIn staff"""
-        li_scraper = LinkedInScraper(self.session)
-        staff = li_scraper.scrape_staff(
-            company_name=company_name,
-            extra_profile_data=extra_profile_data,
-            search_term=search_term,
-            location=location,
-            max_results=max_results,
-            block=block,
-            connect=connect,
-        )
-        if li_scraper.on_block:
-            self.on_block = True
-        staff_dicts = [staff.to_dict() for staff in staff]
-        staff_df = pd.DataFrame(staff_dicts)
-        if staff_df.empty:
-            return staff_df
-
-        staff_df = clean_df(staff_df)
-        linkedin_member_df = staff_df[staff_df["name"] == "LinkedIn Member"]
-        non_linkedin_member_df = staff_df[staff_df["name"] != "LinkedIn Member"]
-        staff_df = pd.concat([non_linkedin_member_df, linkedin_member_df])
-        logger.info(
-            f"3) Staff from {company_name}: {len(staff_df)} total, {len(linkedin_member_df)} hidden, {len(staff_df) - len(linkedin_member_df)} visible"
-        )
-        return staff_df.reset_index(drop=True)
+        li_scraper = self.action_scraper(queue_actions)
+        if track_changes:
+            if not self.state_store:
+                raise ValueError("track_changes needs a state_store on the account")
+            li_scraper.changes = ChangeTracker(self.state_store)
+            started = datetime.now(timezone.utc)
+        sink = open_sink(sink) if sink else None
+        try:
+            budget = (
+                RequestBudget(request_budget).attach(self.session)
+                if request_budget
+                else None
+            )
+            try:
+                staff = li_scraper.scrape_staff(
+                    company_name=company_name,
+                    extra_profile_data=extra_profile_data,
+                    search_term=search_term,
+                    location=location,
+                    max_results=max_results,
+                    block=block,
+                    connect=connect,
+                    priority=priority,
+                    budget=budget,
+                    sink=sink,
+                )
+            finally:
+                if budget:
+                    budget.detach(self.session)
+            if li_scraper.on_block:
+                self.on_block = True
+            staff_dicts = self.hidden_last([staff.to_dict() for staff in staff])
+            total = len(staff_dicts) + (sink.rows if sink else 0)
+            if total:
+                hidden = sum(
+                    1 for staff in staff_dicts if staff["name"] == "LinkedIn Member"
+                )
+                logger.info(
+                    f"3) Staff from {company_name}: {total} total, {hidden} hidden, {total - hidden} visible"
+                )
+            if track_changes:
+                changes = self.state_store.changes(started)
+                logger.info(f"Detected {len(changes)} changes, see change_feed()")
+            return self.to_output(staff_dicts, sink)
+        finally:
+            if sink:
+                sink.close()
 
     def scrape_users(
-        self, user_ids: list[str], block: bool = False, connect: bool = False
-    ) -> pd.DataFrame | None:
-        """Scrape users from Linkedin by user IDs"""
+        self,
+        user_ids: list[str],
+        block: bool = False,
+        connect: bool = False,
+        max_workers: int = 4,
+        queue_actions: bool = False,
+        sink: str | Sink = None,
+    ) -> "pd.DataFrame | list[dict] | SinkSummary | None":
+        """Scrape users from Linkedin by user IDs, resolving `max_workers` ids at a time.
+        The sections their profileView document already holds are not fetched again
+        """
         if self.on_block:
             return logger.error(
                 "Account is on cooldown as a safety precaution after receiving a 429 (TooManyRequests) from LinkedIn. Please recreate a new LinkedInAccount to proceed."
             )
 
-        li_scraper = LinkedInScraper(self.session)
-        li_scraper.num_staff = len(user_ids)
-        users = [
-            Staff(
-                id="",
-                search_term="manual",
-                profile_id=user_id,
-                profile_link=f"https://www.linkedin.com/in/{user_id}",
-            )
-            for user_id in user_ids
-        ]
+        li_scraper = self.action_scraper(queue_actions)
+        sink = open_sink(sink) if sink else None
+        try:
+            li_scraper.num_staff = len(user_ids)
+            users = [
+                Staff(
+                    id="",
+                    search_term="manual",
+                    profile_id=user_id,
+                    profile_link=f"https://www.linkedin.com/in/{user_id}",
+                )
+                for user_id in user_ids
+            ]
+
+            covered = [set() for _ in users]
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(max_workers, len(users)))
+            ) as executor:
+                futures = {
+                    executor.submit(
+                        tracing.in_current_context(li_scraper.resolve_user), user
+                    ): i
+                    for i, user in enumerate(users)
+                }
+                try:
+                    for future in as_completed(futures):
+                        i = futures[future]
+                        try:
+                            covered[i] = future.result()
+                        except TooManyRequests:
+                            raise
+                        except Exception as e:
+                            logger.error(
+                                f"Failed to resolve user {users[i].profile_id}: {str(e)}"
+                            )
+                except TooManyRequests as e:
+                    self.on_block = True
+                    logger.error(f"Exiting early due to fatal error: {str(e)}")
+                    for future in futures:
+                        future.cancel()
 
-        for i, user in enumerate(users, start=1):
-            user.id, user.urn = li_scraper.fetch_user_profile_data_from_public_id(
-                user.profile_id, "user_id"
+            try:
+                for i, user in enumerate(users, start=1):
+                    if user.id and not self.on_block:
+                        li_scraper.fetch_all_info_for_employee(
+                            user, i, skip=covered[i - 1]
+                        )
+                        li_scraper.act_on(user, block, connect)
+                        if sink and user.name != "LinkedIn Member":
+                            sink.write(user.to_dict())
+                            users[i - 1] = None
+            except TooManyRequests as e:
+                self.on_block = True
+                logger.error(f"Exiting early due to fatal error: {str(e)}")
+
+            users_dicts = self.hidden_last(
+                [user.to_dict() for user in users if user and user.id]
             )
-            if user.id:
-                li_scraper.fetch_all_info_for_employee(user, i)
-                if block:
-                    li_scraper.block_user(user)
-                elif connect:
-                    li_scraper.connect_user(user)
-
-        users_dicts = [user.to_dict() for user in users if user.id]
-        users_df = pd.DataFrame(users_dicts)
-
-        if users_df.empty:
-            return users_df
-        linkedin_member_df = users_df[users_df["name"] == "LinkedIn Member"]
-        non_linkedin_member_df = users_df[users_df["name"] != "LinkedIn Member"]
-        users_df = pd.concat([non_linkedin_member_df, linkedin_member_df])
-        logger.info(f"Scraped {len(users_df)} users")
-        return users_df
-
-    def scrape_comments(self, post_ids: list[str]) -> pd.DataFrame:
-        """Scrape comments from Linkedin by post IDs"""
+            total = len(users_dicts) + (sink.rows if sink else 0)
+            if total:
+                logger.info(f"Scraped {total} users")
+            return self.to_output(users_dicts, sink)
+        finally:
+            if sink:
+                sink.close()
+
+    def scrape_comments(
+        self,
+        post_ids: list[str],
+        max_workers: int = 4,
+        prefetch: int = 1,
+        since: datetime = None,
+        enrich: bool = False,
+        sink: str | Sink = None,
+    ) -> "pd.DataFrame | list[dict] | SinkSummary":
+        """Scrape comments from Linkedin by post IDs, `max_workers` posts at a time each with `prefetch` pages requested ahead.
+        Only comments newer than `since` are fetched, or than the last run's newest comment per post when a state_store is set.
+        With enrich, the profile of each commenter is scraped once and added to their comments
+        """
         if self.on_block:
             return logger.error(
                 "Account is on cooldown as a safety precaution after receiving a 429 (TooManyRequests) from LinkedIn. Please recreate a new LinkedInAccount to proceed."
             )
 
-        comment_fetcher = CommentFetcher(self.session)
-        all_comments = []
-        for i, post_id in enumerate(post_ids, start=1):
-            comments = comment_fetcher.fetch_comments(post_id)
-            all_comments.extend(comments)
+        comment_fetcher = CommentFetcher(
+            self.session,
+            prefetch=prefetch,
+            state_store=self.state_store,
+            retry=self.retry_policy.new_run(),
+        )
+        sink = open_sink(sink) if sink else None
+        try:
+            all_comments, profiles = [], {}
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(max_workers, len(post_ids)))
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        tracing.in_current_context(comment_fetcher.fetch_comments),
+                        post_id,
+                        since,
+                    )
+                    for post_id in post_ids
+                ]
+                try:
+                    for future in as_completed(futures):
+                        comments = future.result()
+                        if not sink:
+                            all_comments.extend(comments)
+                            continue
+                        # written post by post, only the commenter profiles are kept so each is scraped once
+                        if enrich and not self.on_block:
+                            profiles.update(
+                                self.enrich_commenters(comments, skip=profiles.keys())
+                            )
+                        sink.write_many(self.comment_records(comments, profiles))
+                except TooManyRequests as e:
+                    self.on_block = True
+                    logger.error(f"Exiting early due to fatal error: {str(e)}")
+                    for future in futures:
+                        future.cancel()
 
-        comment_dict = [comment.to_dict() for comment in all_comments]
-        comment_df = pd.DataFrame(comment_dict)
+            if sink:
+                return self.to_output([], sink)
+            if enrich and not self.on_block:
+                profiles = self.enrich_commenters(all_comments)
+            comment_dicts = self.comment_records(all_comments, profiles)
+            comment_dicts.sort(
+                key=lambda c: (c["created_at"] is not None, c["created_at"]),
+                reverse=True,
+            )
+            return self.to_output(comment_dicts, sink)
+        finally:
+            if sink:
+                sink.close()
 
-        if not comment_df.empty:
-            comment_df["emails"] = comment_df["text"].apply(extract_emails_from_text)
-            comment_df = comment_df.sort_values(by="created_at", ascending=False)
+    @staticmethod
+    def comment_records(
+        comments: list[Comment], profiles: dict[str, dict]
+    ) -> list[dict]:
+        """Comment dicts with the emails in their text and the enriched commenter profile, if any"""
+        records = []
+        for comment in comments:
+            record = comment.to_dict()
+            record["emails"] = extract_emails_from_text(record["text"])
+            profile = profiles.get(record["internal_profile_id"], {})
+            record.update(
+                {
+                    f"{key}_profile" if key in record else key: value
+                    for key, value in profile.items()
+                }
+            )
+            records.append(record)
+        return records
 
-        return comment_df
+    def resolve_ids(self, user_ids: list[str], max_workers: int = 4) -> dict[str, dict]:
+        """Maps public ids to their fsd_profile id (the id column) and member urn.
+        Ids the state_store has already seen together cost no request, the rest are looked up with profileView
+        """
+        li_scraper = self.new_scraper()
+        resolved = {}
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(user_ids) or 1))
+        ) as executor:
+            futures = {
+                executor.submit(
+                    tracing.in_current_context(li_scraper.resolve_public_id), user_id
+                ): user_id
+                for user_id in user_ids
+            }
+            try:
+                for future in as_completed(futures):
+                    user_id = futures[future]
+                    try:
+                        fsd_id, urn = future.result()
+                    except TooManyRequests:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Failed to resolve user {user_id}: {str(e)}")
+                        continue
+                    if fsd_id:
+                        resolved[user_id] = {"id": fsd_id, "urn": urn}
+            except TooManyRequests as e:
+                self.on_block = True
+                logger.error(f"Exiting early due to fatal error: {str(e)}")
+                for future in futures:
+                    future.cancel()
+        return resolved
+
+    def enrich_commenters(
+        self, comments: list[Comment], skip: Iterable[str] = ()
+    ) -> dict[str, dict]:
+        """Scrapes each distinct commenter once with the internal id the comment already carries, keyed by that id.
+        Commenters whose id is in skip are left out
+        """
+        skip = set(skip)
+        commenters = {}
+        for comment in comments:
+            if (
+                comment.internal_profile_id
+                and comment.public_profile_id
+                and comment.internal_profile_id not in skip
+            ):
+                commenters.setdefault(
+                    comment.internal_profile_id,
+                    Staff(
+                        id=comment.internal_profile_id,
+                        search_term="comments",
+                        name=comment.name,
+                        profile_id=comment.public_profile_id,
+                        profile_link=f"https://www.linkedin.com/in/{comment.public_profile_id}",
+                    ),
+                )
+
+        li_scraper = self.new_scraper()
+        li_scraper.num_staff = len(commenters)
+        enriched = {}
+        try:
+            for i, (profile_id, user) in enumerate(commenters.items(), start=1):
+                li_scraper.fetch_all_info_for_employee(user, i)
+                enriched[profile_id] = user.to_dict()
+        except TooManyRequests as e:
+            self.on_block = True
+            logger.error(f"Exiting early due to fatal error: {str(e)}")
+        return enriched
 
     def scrape_companies(
         self,
         company_names: list[str] = None,
-    ) -> pd.DataFrame:
-        """Scrape company details from Linkedin"""
+        max_workers: int = 4,
+        sink: str | Sink = None,
+    ) -> "pd.DataFrame | list[dict] | SinkSummary":
+        """Scrape company details from Linkedin, `max_workers` companies at a time.
+        Companies that fail come back as rows with only search_term and error set
+        """
         if self.on_block:
             return logger.error(
                 "Account is on cooldown as a safety precaution after receiving a 429 (TooManyRequests) from LinkedIn. Please recreate a new LinkedInAccount to proceed."
@@ -184,50 +476,433 @@ class LinkedInAccount:
         if not company_names:
             raise ValueError("company_names list cannot be empty")
 
-        li_scraper = LinkedInScraper(self.session)
-        company_dfs = []
+        li_scraper = self.new_scraper()
+        companies = [None] * len(company_names)
 
-        for company_name in company_names:
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(company_names)))
+        ) as executor:
+            futures = {
+                executor.submit(
+                    tracing.in_current_context(self.fetch_company),
+                    li_scraper,
+                    company_name,
+                ): i
+                for i, company_name in enumerate(company_names)
+            }
             try:
-                company_res = li_scraper.fetch_or_search_company(company_name)
-                try:
-                    company_data = company_res.json()
-                except json.decoder.JSONDecodeError:
-                    logger.error(f"Failed to fetch company data for {company_name}")
-                    continue
-
-                company_df = parse_company_data(company_data, search_term=company_name)
-                company_dfs.append(company_df)
-
-            except Exception as e:
-                logger.error(f"Failed to process company {company_name}: {str(e)}")
-                continue
+                for future in as_completed(futures):
+                    companies[futures[future]] = future.result()
+            except TooManyRequests as e:
+                self.on_block = True
+                logger.error(f"Exiting early due to fatal error: {str(e)}")
+                for future in futures:
+                    future.cancel()
 
-        if not company_dfs:
-            return pd.DataFrame()
+        for i, company_name in enumerate(company_names):
+            if companies[i] is None:
+                companies[i] = {
+                    "search_term": company_name,
+                    "error": "Not fetched, stopped after 429 Too Many Requests",
+                }
+        return self.to_output(companies, sink)
 
-        return pd.concat(company_dfs, ignore_index=True)
+    @staticmethod
+    def fetch_company(li_scraper: LinkedInScraper, company_name: str) -> dict:
+        """Company record, or a row with the error if it could not be fetched"""
+        try:
+            company_res = li_scraper.fetch_or_search_company(company_name)
+            try:
+                company_data = company_res.json()
+            except json.decoder.JSONDecodeError:
+                logger.error(f"Failed to fetch company data for {company_name}")
+                return {
+                    "search_term": company_name,
+                    "error": "Failed to load company json",
+                }
+            return {
+                **parse_company_record(company_data, search_term=company_name),
+                "error": None,
+            }
+        except TooManyRequests:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to process company {company_name}: {str(e)}")
+            return {"search_term": company_name, "error": str(e)}
 
     def scrape_connections(
         self,
         max_results: int = 10**8,
         extra_profile_data: bool = False,
-    ) -> pd.DataFrame:
-        """Scrape connections from Linkedin"""
+        sync: bool = False,
+        reconcile_every: int = 7 * 86400,
+        priority: Callable[[Staff], float] = None,
+        request_budget: int = None,
+        sink: str | Sink = None,
+    ) -> "pd.DataFrame | list[dict] | SinkSummary":
+        """Scrape connections from Linkedin.
+        With sync, only connections added since the last sync are returned (sync_status 'new'), and every `reconcile_every`
+        seconds all connections are walked to also return the removed ones (sync_status 'removed')
+        """
         if self.on_block:
             return logger.error(
                 "Account is on cooldown as a safety precaution after receiving a 429 (TooManyRequests) from LinkedIn. Please recreate a new LinkedInAccount to proceed."
             )
-        li_scraper = LinkedInScraper(self.session)
+        li_scraper = self.new_scraper()
+        sink = open_sink(sink) if sink else None
+        budget = (
+            RequestBudget(request_budget).attach(self.session)
+            if request_budget
+            else None
+        )
+        try:
+            return self._scrape_connections(
+                li_scraper,
+                max_results,
+                extra_profile_data,
+                sync,
+                reconcile_every,
+                priority,
+                budget,
+                sink,
+            )
+        finally:
+            if budget:
+                budget.detach(self.session)
+            if sink:
+                # a no-op after to_output, releases the file when the scrape failed
+                sink.close()
+
+    def _scrape_connections(
+        self,
+        li_scraper: LinkedInScraper,
+        max_results: int,
+        extra_profile_data: bool,
+        sync: bool,
+        reconcile_every: int,
+        priority: Callable[[Staff], float] | None,
+        budget: RequestBudget | None,
+        sink: Sink | None,
+    ) -> "pd.DataFrame | list[dict] | SinkSummary":
+        if sync:
+            if not self.state_store:
+                raise ValueError("sync needs a state_store on the account")
+            last_reconcile = self.state_store.last_reconcile(self.account_key)
+            new_staff, removed = li_scraper.sync_connections(
+                self.state_store,
+                self.account_key,
+                full=last_reconcile is None
+                or time.time() - last_reconcile >= reconcile_every,
+                extra_profile_data=extra_profile_data,
+                priority=priority,
+                budget=budget,
+            )
+            if li_scraper.on_block:
+                self.on_block = True
+            records = [{**s.to_dict(), "sync_status": "new"} for s in new_staff]
+            records += [{**r, "sync_status": "removed"} for r in removed]
+            return self.to_output(records, sink)
 
         connections = li_scraper.scrape_connections(
             max_results=max_results,
             extra_profile_data=extra_profile_data,
+            priority=priority,
+            budget=budget,
+            sink=sink,
+        )
+        return self.to_output([staff.to_dict() for staff in connections or []], sink)
+
+    def plan_staff(
+        self,
+        company_name: str = None,
+        search_term: str = None,
+        location: str = None,
+        extra_profile_data: bool = False,
+        max_results: int = 1000,
+        block: bool = False,
+        connect: bool = False,
+        requests_per_minute: float = 30,
+        daily_budget: int = None,
+    ) -> ScrapePlan:
+        """Dry run of scrape_staff, probes the first search page and estimates the requests, time and days it needs"""
+        li_scraper = self.new_scraper()
+        total_count, sample = li_scraper.probe_staff(
+            company_name, search_term, location
+        )
+        results = min(total_count, max_results, 1000)
+        visible = round(results * visible_share(sample))
+        requests = {
+            "lookups": (company_requests(company_name) if company_name else 0)
+            + bool(location),
+            "search_pages": search_pages(results),
+        }
+        if extra_profile_data:
+            requests["profiles"] = visible * PROFILE_REQUESTS
+            if block or connect:
+                requests["actions"] = visible
+        return ScrapePlan(
+            job="staff",
+            total_results=total_count,
+            profiles=visible if extra_profile_data else 0,
+            hidden_profiles=results - visible,
+            requests=requests,
+            requests_per_minute=requests_per_minute,
+            daily_budget=daily_budget,
+        )
+
+    def plan_connections(
+        self,
+        max_results: int = 10**8,
+        extra_profile_data: bool = False,
+        requests_per_minute: float = 30,
+        daily_budget: int = None,
+    ) -> ScrapePlan:
+        """Dry run of scrape_connections (without sync), probes the first page for the connection count"""
+        li_scraper = self.new_scraper()
+        sample, total_count = li_scraper.fetch_connections_page(0) or ([], 0)
+        results = min(total_count, max_results)
+        visible = round(results * visible_share(sample))
+        requests = {"pages": search_pages(results)}
+        if extra_profile_data:
+            requests["profiles"] = visible * PROFILE_REQUESTS
+        return ScrapePlan(
+            job="connections",
+            total_results=total_count,
+            profiles=visible if extra_profile_data else 0,
+            hidden_profiles=results - visible,
+            requests=requests,
+            requests_per_minute=requests_per_minute,
+            daily_budget=daily_budget,
+        )
+
+    def plan_users(
+        self,
+        user_ids: list[str],
+        block: bool = False,
+        connect: bool = False,
+        requests_per_minute: float = 30,
+        daily_budget: int = None,
+    ) -> ScrapePlan:
+        """Dry run of scrape_users, needs no request"""
+        requests = {"profiles": len(user_ids) * USER_REQUESTS}
+        if block or connect:
+            requests["actions"] = len(user_ids)
+        return ScrapePlan(
+            job="users",
+            total_results=len(user_ids),
+            profiles=len(user_ids),
+            requests=requests,
+            requests_per_minute=requests_per_minute,
+            daily_budget=daily_budget,
+        )
+
+    def plan_companies(
+        self,
+        company_names: list[str],
+        requests_per_minute: float = 30,
+        daily_budget: int = None,
+    ) -> ScrapePlan:
+        """Dry run of scrape_companies, one request per numeric company id and three per name, which may have to be searched"""
+        return ScrapePlan(
+            job="companies",
+            total_results=len(company_names),
+            requests={"companies": sum(map(company_requests, company_names))},
+            requests_per_minute=requests_per_minute,
+            daily_budget=daily_budget,
+        )
+
+    def repair(
+        self, results: "pd.DataFrame | list[dict]"
+    ) -> "pd.DataFrame | list[dict] | None":
+        """Fetches again only the sections listed in failed_sections of an earlier result (e.g. skills after a timeout),
+        the rest of each row is kept. Works on a result read back from a sink as well
+        """
+        if self.on_block:
+            return logger.error(
+                "Account is on cooldown as a safety precaution after receiving a 429 (TooManyRequests) from LinkedIn. Please recreate a new LinkedInAccount to proceed."
+            )
+        records = (
+            results.to_dict("records")
+            if hasattr(results, "to_dict")
+            else [dict(record) for record in results]
+        )
+        li_scraper = self.new_scraper()
+        repaired = li_scraper.repair(records)
+        if li_scraper.on_block:
+            self.on_block = True
+        left = sum(len(failed_sections(record)) for record in records)
+        logger.info(f"Repaired {repaired} sections, {left} still failed")
+        return self.to_output(records)
+
+    def change_feed(self, since: datetime = None) -> "pd.DataFrame | list[dict]":
+        """Changes scrape_staff(track_changes=True) detected, oldest first: new_hire, departure, title_change,
+        company_change and new_skill with the old and new value
+        """
+        if not self.state_store:
+            raise ValueError("change_feed needs a state_store on the account")
+        return self.to_output(self.state_store.changes(since))
+
+    def new_scraper(self) -> LinkedInScraper:
+        return LinkedInScraper(
+            self.session,
+            self.state_store,
+            self.conditional_sections,
+            self.retry_policy.new_run(),
+        )
+
+    def action_scraper(self, queue_actions: bool) -> LinkedInScraper:
+        li_scraper = self.new_scraper()
+        if queue_actions:
+            if not self.state_store:
+                raise ValueError("queue_actions needs a state_store on the account")
+            li_scraper.action_account = self.account_key
+        return li_scraper
+
+    def run_actions(
+        self, daily_quotas: dict[str, int] = None
+    ) -> "pd.DataFrame | list[dict]":
+        """Sends the block / connect actions queued with queue_actions, at most daily_quotas per action per day
+        (default 20 connects, 100 blocks). Whatever is left stays queued for the next call
+        """
+        if not self.state_store:
+            raise ValueError("run_actions needs a state_store on the account")
+        if self.on_block:
+            return logger.error(
+                "Account is on cooldown as a safety precaution after receiving a 429 (TooManyRequests) from LinkedIn. Please recreate a new LinkedInAccount to proceed."
+            )
+        executor = ActionExecutor(
+            self.new_scraper(),
+            self.state_store,
+            self.account_key,
+            daily_quotas,
+        )
+        return self.to_output(executor.run())
+
+    @property
+    def account_key(self) -> str:
+        """Identifies the logged in account in the state store"""
+        return self.username or self.session_file or "default"
+
+    def to_output(
+        self, records: list[dict], sink: str | Sink = None
+    ) -> "pd.DataFrame | list[dict] | SinkSummary":
+        """Plain records with output='records', otherwise a DataFrame (pandas is only imported here).
+        With a sink the records are written after what the scrape streamed to it and only its summary is returned
+        """
+        if sink:
+            sink = open_sink(sink)
+            sink.write_many(records)
+            return sink.close()
+        if self.output == "records":
+            return records
+        return to_dataframe(records)
+
+    @staticmethod
+    def hidden_last(records: list[dict]) -> list[dict]:
+        return sorted(records, key=lambda r: r["name"] == "LinkedIn Member")
+
+
+class AccountPool(LinkedInAccount):
+    """Several LinkedIn accounts behind the LinkedInAccount scrape methods.
+    Requests go to the account with the most daily budget left, throttled accounts cool down and their requests move to the others.
+    Block and connect are always sent from action_account (the first account by default)
+    """
+
+    def __init__(
+        self,
+        session_files: list[str] = None,
+        credentials: list[tuple] = None,
+        daily_request_budget: int = None,
+        cooldown: int = 900,
+        action_account: str = None,
+        log_level: int = 0,
+        solver_api_key: str = None,
+        solver_service: SolverType = SolverType.CAPSOLVER,
+        driver_type: DriverType = None,
+        tracer: Tracer = None,
+        proxy_pool: ProxyPool = None,
+        session_store: SessionStore = None,
+        state_store: StateStore = None,
+        conditional_sections: bool = False,
+        retry_policy: RetryPolicy = None,
+        validate: str = "eager",
+        validation_ttl: int = 0,
+        output: str = "dataframe",
+    ):
+        self.session_files = session_files or []
+        self.credentials = credentials or []
+        if not self.session_files and not self.credentials:
+            raise ValueError("AccountPool needs session_files or credentials")
+        self.daily_request_budget = daily_request_budget
+        self.cooldown = cooldown
+        self.action_account = action_account
+        super().__init__(
+            log_level=log_level,
+            solver_api_key=solver_api_key,
+            solver_service=solver_service,
+            driver_type=driver_type,
+            tracer=tracer,
+            proxy_pool=proxy_pool,
+            session_store=session_store,
+            state_store=state_store,
+            conditional_sections=conditional_sections,
+            retry_policy=retry_policy,
+            validate=validate,
+            validation_ttl=validation_ttl,
+            output=output,
+        )
+
+    @property
+    def on_block(self):
+        return self.session is not None and self.session.exhausted
+
+    @on_block.setter
+    def on_block(self, value):
+        """Blocks are tracked per account by the pooled session"""
+
+    def login(self):
+        set_logger_level(self.log_level)
+        if self.tracer:
+            set_tracer(self.tracer)
+        logins = [(None, None, session_file) for session_file in self.session_files]
+        for creds in self.credentials:
+            username, password, *session_file = creds
+            logins.append(
+                (username, password, session_file[0] if session_file else None)
+            )
+
+        accounts = []
+        for username, password, session_file in logins:
+            login = Login(
+                username,
+                password,
+                self.solver,
+                session_file,
+                self.driver_type,
+                self.proxy_pool,
+                self.session_store,
+                self.validate,
+                self.validation_ttl,
+            )
+            name = username or session_file
+            accounts.append(
+                PooledAccount(name, login.load_session(), self.daily_request_budget)
+            )
+            logger.info(f"Added account '{name}' to the pool")
+        self.session = PooledSession(
+            accounts, cooldown=self.cooldown, action_account=self.action_account
+        )
+
+    @property
+    def account_key(self) -> str:
+        """Same for every run of the same accounts, whatever order they are passed in"""
+        names = sorted(
+            [f"file:{session_file}" for session_file in self.session_files]
+            + [f"user:{creds[0]}" for creds in self.credentials]
         )
-        connections_df = pd.DataFrame()
-        if connections:
-            staff_dicts = [staff.to_dict() for staff in connections]
-            connections_df = pd.DataFrame(staff_dicts)
-            connections_df = clean_df(connections_df)
+        digest = hashlib.sha1("\n".join(names).encode()).hexdigest()[:16]
+        return f"pool:{digest}"
 
-        return connections_df
+    def stats(self) -> list[dict]:
+        """Requests made, remaining budget and throttle count per account"""
+        return self.session.stats()
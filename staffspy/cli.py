@@ -0,0 +1,182 @@
+"""
+staffspy.cli
+~~~~~~~~~~~~~~~~~~~
+
+`staffspy` console script: queue work items, crawl them with several processes and check on the queue.
+
+    staffspy enqueue staff --company openai --company anthropic --search-term engineer --location london
+    staffspy work --workers 4 --session-file session.pkl --session-store sessions.db
+    staffspy status
+"""
+
+import argparse
+import itertools
+import os
+import sys
+
+from staffspy.utils.work_queue import WorkQueue
+
+
+def read_values(values: list[str], file: str | None) -> list[str]:
+    """Values from the command line plus one per line of the file"""
+    values = list(values or [])
+    if file:
+        with open(file) as f:
+            values += [line.strip() for line in f if line.strip()]
+    return values
+
+
+def batches(values: list[str], size: int) -> list[list[str]]:
+    return [values[i : i + size] for i in range(0, len(values), size)]
+
+
+def staff_payloads(args) -> list[dict]:
+    if not args.company and not args.search_term:
+        raise SystemExit("enqueue staff needs a --company or a --search-term")
+    return [
+        {
+            "company_name": company,
+            "search_term": search_term,
+            "location": location,
+            "extra_profile_data": args.extra_profile_data,
+            "max_results": args.max_results,
+        }
+        for company, search_term, location in itertools.product(
+            args.company or [None], args.search_term or [None], args.location or [None]
+        )
+    ]
+
+
+def enqueue(args):
+    if args.kind == "staff":
+        payloads = staff_payloads(args)
+    else:
+        values = read_values(args.values, args.file)
+        if not values:
+            raise SystemExit(f"enqueue {args.kind} needs values or a --file")
+        if args.kind == "users":
+            payloads = [{"user_ids": b} for b in batches(values, args.batch_size)]
+        elif args.kind == "comments":
+            payloads = [{"post_ids": [post_id]} for post_id in values]
+        else:
+            payloads = [{"company_names": [name]} for name in values]
+    added = WorkQueue(args.queue).enqueue(args.kind, payloads)
+    print(
+        f"Queued {added} {args.kind} items, {len(payloads) - added} were already queued"
+    )
+
+
+def work(args):
+    from staffspy.crawler import crawl
+
+    exit_codes = crawl(
+        args.queue,
+        workers=args.workers,
+        output_dir=args.output_dir,
+        output_format=args.format,
+        lease=args.lease,
+        max_attempts=args.max_attempts,
+        session_file=args.session_file,
+        username=args.username,
+        password=args.password or os.environ.get("STAFFSPY_PASSWORD"),
+        session_store=args.session_store,
+        log_level=args.log_level,
+    )
+    status(args)
+    if any(exit_codes):
+        sys.exit(1)
+
+
+def status(args):
+    queue = WorkQueue(args.queue)
+    if getattr(args, "retry_failed", False):
+        print(f"Queued {queue.retry_failed()} failed items again")
+    counts = queue.counts()
+    if not counts:
+        print("The queue is empty")
+        return
+    print(f"{'kind':<10} {'status':<8} {'items':>7} {'rows':>9}")
+    for row in counts:
+        print(
+            f"{row['kind']:<10} {row['status']:<8} {row['items']:>7} {row['rows']:>9}"
+        )
+    for error in queue.errors():
+        print(f"  #{error['id']} {error['kind']} {error['payload']}: {error['error']}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="staffspy", description="Sharded LinkedIn crawls from a local queue"
+    )
+    queue = argparse.ArgumentParser(add_help=False)
+    queue.add_argument(
+        "--queue", default="staffspy_queue.db", help="SQLite work queue file"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = commands.add_parser("enqueue", help="queue work items")
+    kinds = enqueue_parser.add_subparsers(dest="kind", required=True)
+    staff = kinds.add_parser(
+        "staff",
+        parents=[queue],
+        help="one item per company x search term x location",
+    )
+    staff.add_argument("--company", action="append")
+    staff.add_argument("--search-term", action="append")
+    staff.add_argument("--location", action="append")
+    staff.add_argument("--max-results", type=int, default=1000)
+    staff.add_argument("--extra-profile-data", action="store_true")
+    for kind, help_text in (
+        ("users", "user ids, queued in batches"),
+        ("comments", "post ids, one item each"),
+        ("companies", "company names, one item each"),
+    ):
+        values = kinds.add_parser(kind, parents=[queue], help=help_text)
+        values.add_argument("values", nargs="*")
+        values.add_argument("--file", help="file with one value per line")
+        if kind == "users":
+            values.add_argument("--batch-size", type=int, default=25)
+    enqueue_parser.set_defaults(func=enqueue)
+
+    work_parser = commands.add_parser(
+        "work", parents=[queue], help="scrape the queued items with worker processes"
+    )
+    work_parser.add_argument("--workers", type=int, default=1)
+    work_parser.add_argument("--output-dir", default="staffspy_output")
+    work_parser.add_argument(
+        "--format", choices=["jsonl", "csv", "parquet"], default="jsonl"
+    )
+    work_parser.add_argument("--session-file")
+    work_parser.add_argument(
+        "--session-store",
+        help="SQLite session store shared by the workers, so only one logs in again when the session expires",
+    )
+    work_parser.add_argument("--username")
+    work_parser.add_argument(
+        "--password", help="defaults to the STAFFSPY_PASSWORD environment variable"
+    )
+    work_parser.add_argument(
+        "--lease",
+        type=int,
+        default=900,
+        help="seconds before a dead worker's item is handed out again",
+    )
+    work_parser.add_argument("--max-attempts", type=int, default=3)
+    work_parser.add_argument("--log-level", type=int, default=1)
+    work_parser.set_defaults(func=work)
+
+    status_parser = commands.add_parser(
+        "status", parents=[queue], help="items and rows per kind and status"
+    )
+    status_parser.add_argument("--retry-failed", action="store_true")
+    status_parser.set_defaults(func=status)
+    return parser
+
+
+def main(argv: list[str] = None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+staffspy.crawler
+~~~~~~~~~~~~~~~~~~~
+
+Worker processes that drain a WorkQueue, each with its own LinkedIn session and its own output files.
+"""
+
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+from staffspy import LinkedInAccount
+from staffspy.utils.session_store import SessionStore
+from staffspy.utils.sinks import Sink, open_sink
+from staffspy.utils.utils import logger
+from staffspy.utils.work_queue import WorkQueue
+
+# what each kind of work item runs, payloads are the keyword arguments queued for it
+JOBS = {
+    "staff": lambda account, p: account.scrape_staff(**p),
+    "users": lambda account, p: account.scrape_users(**p),
+    "comments": lambda account, p: account.scrape_comments(**p),
+    "companies": lambda account, p: account.scrape_companies(**p),
+}
+
+
+class LeaseKeeper:
+    """Renews the lease of the item being scraped until it is done, a profile heavy item can outlast one lease"""
+
+    def __init__(self, queue: WorkQueue, item_id: int, worker: str, lease: int):
+        self.queue, self.item_id, self.worker, self.lease = (
+            queue,
+            item_id,
+            worker,
+            lease,
+        )
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self._stop.wait(self.lease / 3):
+            if not self.queue.renew(self.item_id, self.worker, self.lease):
+                logger.warning(f"Lost the lease on work item {self.item_id}")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class Worker:
+    def __init__(
+        self,
+        index: int,
+        queue_path: str,
+        output_dir: str,
+        output_format: str,
+        run_id: str,
+        account_kwargs: dict,
+        lease: int = 900,
+        max_attempts: int = 3,
+    ):
+        self.index = index
+        self.name = f"{socket.gethostname()}-{os.getpid()}"
+        self.queue = WorkQueue(queue_path)
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.run_id = run_id
+        self.account_kwargs = account_kwargs
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.sinks: dict[str, Sink] = {}
+
+    def run(self) -> int:
+        """Scrapes items until the queue is empty or the account gets a 429. Returns how many items were done"""
+        account = new_account(self.account_kwargs)
+        done = 0
+        try:
+            while item := self.queue.claim(self.name, self.lease, self.max_attempts):
+                if not self.scrape(account, item):
+                    break
+                done += 1
+        finally:
+            for sink in self.sinks.values():
+                sink.close()
+        logger.info(f"Worker {self.index} finished after {done} work items")
+        return done
+
+    def scrape(self, account: LinkedInAccount, item: dict) -> bool:
+        logger.info(f"Worker {self.index} scraping {item['kind']} {item['payload']}")
+        try:
+            with LeaseKeeper(self.queue, item["id"], self.name, self.lease):
+                records = JOBS[item["kind"]](account, item["payload"])
+        except Exception as e:
+            logger.error(f"Work item {item['id']} failed: {str(e)}")
+            self.queue.fail(item["id"], self.name, str(e), self.max_attempts)
+            return True
+
+        if account.on_block:
+            # partial results are dropped, the item is scraped again once the account has cooled down
+            self.queue.release(item["id"], self.name)
+            logger.error(f"Worker {self.index} stopping, the account got a 429")
+            return False
+
+        # a fresh lease keeps the item ours while it is written, the records of one we lost are another worker's now
+        if not self.queue.renew(item["id"], self.name, self.lease):
+            logger.warning(
+                f"Lost the lease on work item {item['id']}, dropping its results"
+            )
+            return True
+        records = records or []
+        sink = self.sink(item["kind"])
+        sink.write_many(records)
+        # on disk before the item counts as done, so a crash never loses finished work
+        sink.flush()
+        self.queue.complete(item["id"], self.name, len(records))
+        return True
+
+    def sink(self, kind: str) -> Sink:
+        """One output per kind of work item and worker, the columns differ between kinds"""
+        if kind not in self.sinks:
+            path = os.path.join(
+                self.output_dir,
+                f"{kind}-{self.run_id}-{self.index}.{self.output_format}",
+            )
+            self.sinks[kind] = open_sink(path)
+        return self.sinks[kind]
+
+
+def new_account(account_kwargs: dict) -> LinkedInAccount:
+    session_store = account_kwargs.get("session_store")
+    return LinkedInAccount(
+        **{
+            **account_kwargs,
+            "session_store": SessionStore(session_store) if session_store else None,
+            "output": "records",
+        }
+    )
+
+
+def run_worker(index: int, *args) -> int:
+    return Worker(index, *args).run()
+
+
+def crawl(
+    queue_path: str,
+    workers: int = 1,
+    output_dir: str = "staffspy_output",
+    output_format: str = "jsonl",
+    lease: int = 900,
+    max_attempts: int = 3,
+    **account_kwargs,
+) -> list[int]:
+    """Drains the queue with `workers` processes, each writing to its own files in output_dir.
+    The account is logged in once up front so only this process ever asks for a browser login or captcha.
+    Returns the exit code of each worker
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    new_account(account_kwargs)
+    run_id = time.strftime("%Y%m%d%H%M%S")
+    args = (
+        queue_path,
+        output_dir,
+        output_format,
+        run_id,
+        account_kwargs,
+        lease,
+        max_attempts,
+    )
+    if workers == 1:
+        run_worker(0, *args)
+        return [0]
+
+    processes = [
+        multiprocessing.Process(
+            target=run_worker, args=(i, *args), name=f"staffspy-worker-{i}"
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return [process.exitcode for process in processes]
@@ -0,0 +1,94 @@
+import time
+
+from staffspy.linkedin.linkedin import LinkedInScraper
+from staffspy.utils.models import Staff
+from staffspy.utils.state import StateStore
+from staffspy.utils.utils import logger
+
+DEFAULT_DAILY_QUOTAS = {"connect": 20, "block": 100}
+
+# LinkedIn answers a block with 403 when the person was blocked / unblocked in the past 48 hours
+BLOCK_COOLDOWN = 48 * 3600
+
+
+class ActionExecutor:
+    """Drains the queued block / connect actions of an account within its daily quotas.
+    Actions that are not due, over quota or throttled stay queued for the next run
+    """
+
+    def __init__(
+        self,
+        scraper: LinkedInScraper,
+        state_store: StateStore,
+        account: str,
+        daily_quotas: dict[str, int] = None,
+        max_attempts: int = 3,
+    ):
+        self.scraper = scraper
+        self.state_store = state_store
+        self.account = account
+        self.daily_quotas = {**DEFAULT_DAILY_QUOTAS, **(daily_quotas or {})}
+        self.max_attempts = max_attempts
+
+    def run(self) -> list[dict]:
+        """Runs the due actions, returns them with the status they ended up in"""
+        remaining = {
+            action: quota - self.state_store.actions_done_today(self.account, action)
+            for action, quota in self.daily_quotas.items()
+        }
+        processed = []
+        for row in self.state_store.due_actions(self.account):
+            action = row["action"]
+            if remaining.get(action, 0) <= 0:
+                continue
+            status = self.execute(row)
+            if status == "done":
+                remaining[action] -= 1
+            elif status == "throttled":
+                logger.warning(
+                    f"{action} got 429, leaving the remaining {action} actions for the next run"
+                )
+                remaining[action] = 0
+            processed.append({**row, "status": status})
+
+        pending = len(self.state_store.actions(self.account, "pending"))
+        logger.info(
+            f"Ran {len(processed)} queued actions for {self.account}, {pending} still pending"
+        )
+        return processed
+
+    def execute(self, row: dict) -> str:
+        employee = Staff(
+            id=row["fsd_id"],
+            urn=row["urn"],
+            name=row["name"],
+            profile_link=row["profile_link"],
+            search_term="actions",
+            is_connection="no",
+        )
+        if row["action"] == "block":
+            res = self.scraper.block_user(employee)
+        else:
+            self.scraper.connect_block = False
+            res = self.scraper.connect_user(employee)
+
+        if res is None:
+            self.state_store.finish_action(row["id"], "skipped")
+            return "skipped"
+        if res.ok:
+            self.state_store.finish_action(row["id"], "done", res.status_code)
+            return "done"
+        if res.status_code == 429:
+            self.state_store.defer_action(row["id"], 0, res.status_code)
+            return "throttled"
+        if (
+            row["action"] == "block"
+            and res.status_code == 403
+            and row["attempts"] + 1 < self.max_attempts
+        ):
+            self.state_store.defer_action(
+                row["id"], time.time() + BLOCK_COOLDOWN, res.status_code
+            )
+            return "cooldown"
+        self.state_store.finish_action(row["id"], "failed", res.status_code)
+        return "failed"
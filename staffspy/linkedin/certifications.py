@@ -1,29 +1,30 @@
-import json
 import logging
 
+from staffspy.utils import tracing
 from staffspy.utils.exceptions import TooManyRequests
 from staffspy.utils.models import Certification
+from staffspy.utils.retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
 
 class CertificationFetcher:
-    def __init__(self, session):
+    def __init__(self, session, retry: RetryPolicy = None):
         self.session = session
+        self.retry = retry or RetryPolicy()
         self.endpoint = "https://www.linkedin.com/voyager/api/graphql?queryId=voyagerIdentityDashProfileComponents.277ba7d7b9afffb04683953cede751fb&queryName=ProfileComponentsBySectionType&variables=(tabIndex:0,sectionType:certifications,profileUrn:urn%3Ali%3Afsd_profile%3A{employee_id},count:50)"
 
     def fetch_certifications(self, staff):
         ep = self.endpoint.format(employee_id=staff.id)
-        res = self.session.get(ep)
+        with tracing.span("certifications.request"):
+            res, res_json = self.retry.get_json(self.session, ep)
         logger.debug(f"certs, status code - {res.status_code}")
         if res.status_code == 429:
             raise TooManyRequests("429 Too Many Requests")
         if not res.ok:
             logger.debug(res.text[:200])
             return False
-        try:
-            res_json = res.json()
-        except json.decoder.JSONDecodeError:
+        if res_json is None:
             logger.debug(res.text[:200])
             return False
 
@@ -39,7 +40,8 @@ class CertificationFetcher:
             cert_elems = elems[0]["components"]["pagedListComponent"]["components"][
                 "elements"
             ]
-            staff.certifications = self.parse_certifications(cert_elems)
+            with tracing.span("certifications.parse"):
+                staff.certifications = self.parse_certifications(cert_elems)
         return True
 
     def parse_certifications(self, sections):
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import time
+
+from staffspy.utils.models import Certification, Experience, School, Skill, Staff
+from staffspy.utils.state import StateStore
+
+# deeper sections are fetched again at least this often even when the top card has not changed
+FULL_REFRESH_AFTER = 30 * 86400
+
+# the sections a snapshot keeps so an unchanged profile can be filled without fetching them
+DEEP_SECTIONS = {
+    "experiences": Experience,
+    "schools": School,
+    "skills": Skill,
+    "certifications": Certification,
+}
+RESTORED_SECTIONS = {*DEEP_SECTIONS, "bio", "languages"}
+
+
+def content_hash(value) -> str:
+    return hashlib.sha1(
+        json.dumps(value, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def top_card(staff: Staff) -> dict:
+    """What the top card shows, follower and connection counts move every day so they are left out"""
+    return {
+        "first_name": staff.first_name,
+        "last_name": staff.last_name,
+        "headline": staff.headline,
+        "location": staff.location,
+        "company": staff.company,
+        "school": staff.school,
+        "open_to_work": staff.open_to_work,
+        "is_hiring": staff.is_hiring,
+    }
+
+
+def current_title(staff: Staff) -> str | None:
+    for exp in staff.experiences or []:
+        if exp.end_date is None:
+            return exp.title
+    return None
+
+
+def section_hashes(staff: Staff, deep: bool) -> dict:
+    """Hash per section, None for the sections that were not fetched or failed to load"""
+    failed = set(staff.failed_sections or ())
+    hashes = {
+        "top_card_hash": (
+            content_hash(top_card(staff))
+            if staff.profile_id and "employee" not in failed
+            else None
+        ),
+        "experiences_hash": None,
+        "schools_hash": None,
+        "skills_hash": None,
+    }
+    if deep:
+        hashes["experiences_hash"] = content_hash(
+            [
+                {k: v for k, v in exp.to_dict().items() if k != "duration"}
+                for exp in staff.experiences or []
+            ]
+        )
+        hashes["schools_hash"] = content_hash(
+            [school.to_dict() for school in staff.schools or []]
+        )
+        hashes["skills_hash"] = content_hash(
+            sorted(skill.name or "" for skill in staff.skills or [])
+        )
+        for section in failed & {"experiences", "schools", "skills"}:
+            hashes[f"{section}_hash"] = None
+    return hashes
+
+
+class ChangeTracker:
+    """Keeps a snapshot per profile (by urn) with a hash per section and turns what changed between runs
+    into a change feed: new_hire, departure, title_change, company_change and new_skill
+    """
+
+    def __init__(self, state_store: StateStore):
+        self.state_store = state_store
+
+    def restore(self, staff: Staff) -> bool:
+        """Fills the deeper sections from the snapshot when the freshly fetched top card is unchanged
+        and the sections were fetched recently enough. True if they were restored and need no request
+        """
+        if not staff.urn or not staff.profile_id:
+            return False
+        snapshot = self.state_store.snapshot(staff.urn)
+        if (
+            not snapshot
+            or not snapshot["deep_at"]
+            or time.time() - snapshot["deep_at"] > FULL_REFRESH_AFTER
+            or snapshot["top_card_hash"] != content_hash(top_card(staff))
+        ):
+            return False
+        data = snapshot["data"]
+        for section, model in DEEP_SECTIONS.items():
+            items = data.get(section)
+            setattr(
+                staff, section, [model(**item) for item in items] if items else None
+            )
+        staff.bio = data.get("bio")
+        staff.languages = data.get("languages")
+        return True
+
+    def record(self, staff: Staff, deep: bool, scope: str = None) -> list[dict]:
+        """Compares the profile with its snapshot, stores the new snapshot and returns the changes"""
+        if not staff.urn:
+            return []
+        old = self.state_store.snapshot(staff.urn)
+        hashes = section_hashes(staff, deep)
+        data = {
+            "top_card": top_card(staff),
+            "title": current_title(staff) if deep else None,
+        }
+        if deep:
+            for section in DEEP_SECTIONS:
+                items = getattr(staff, section)
+                data[section] = [item.to_dict() for item in items] if items else None
+            data["bio"] = staff.bio
+            data["languages"] = staff.languages
+        elif old:
+            # keep the deeper sections of the last full fetch
+            data = {**old["data"], "top_card": data["top_card"]}
+
+        # a section that failed to load keeps what the snapshot holds instead of looking emptied
+        failed = set(staff.failed_sections or ())
+        if old:
+            for section in failed & {*RESTORED_SECTIONS, "employee"}:
+                key = "top_card" if section == "employee" else section
+                data[key] = old["data"].get(key)
+            if "experiences" in failed:
+                data["title"] = old["data"].get("title")
+
+        changes = self.diff(old, hashes, data, deep) if old else []
+        for change in changes:
+            change.update(urn=staff.urn, name=staff.name, scope=scope)
+        self.state_store.save_snapshot(
+            {
+                "urn": staff.urn,
+                "id": staff.id,
+                "name": staff.name,
+                **hashes,
+                "data": data,
+                # restoring a partly loaded profile would skip fetching what it lacks
+                "deep_at": (
+                    time.time() if deep and not failed & RESTORED_SECTIONS else None
+                ),
+            }
+        )
+        self.state_store.add_changes(changes)
+        return changes
+
+    @staticmethod
+    def diff(old: dict, hashes: dict, data: dict, deep: bool) -> list[dict]:
+        """The title comes from the current position when both runs fetched experiences, otherwise from the headline"""
+        changes = []
+        both_deep = deep and old["deep_at"]
+        old_card, card = old["data"].get("top_card", {}), data["top_card"]
+        if (
+            hashes["top_card_hash"]
+            and old["top_card_hash"]
+            and hashes["top_card_hash"] != old["top_card_hash"]
+        ):
+            if card.get("company") != old_card.get("company"):
+                changes.append(
+                    {
+                        "change": "company_change",
+                        "old": old_card.get("company"),
+                        "new": card.get("company"),
+                    }
+                )
+            if not both_deep and card.get("headline") != old_card.get("headline"):
+                changes.append(
+                    {
+                        "change": "title_change",
+                        "old": old_card.get("headline"),
+                        "new": card.get("headline"),
+                    }
+                )
+        if not both_deep:
+            return changes
+
+        old_data = old["data"]
+        title, old_title = data.get("title"), old_data.get("title")
+        if (
+            hashes["experiences_hash"]
+            and hashes["experiences_hash"] != old["experiences_hash"]
+            and title != old_title
+        ):
+            changes.append({"change": "title_change", "old": old_title, "new": title})
+        if (
+            hashes["skills_hash"]
+            and old["skills_hash"]
+            and (hashes["skills_hash"] != old["skills_hash"])
+        ):
+            old_skills = {s["name"] for s in old_data.get("skills") or []}
+            for skill in data.get("skills") or []:
+                if skill["name"] not in old_skills:
+                    changes.append(
+                        {"change": "new_skill", "old": None, "new": skill["name"]}
+                    )
+        return changes
+
+    def record_scope(
+        self, scope: str, staff: list[Staff], complete: bool
+    ) -> list[dict]:
+        """new_hire for the people a search returns for the first time, departure for the ones it stopped returning"""
+        members = {
+            s.urn: s.name for s in staff if s.urn and s.name != "LinkedIn Member"
+        }
+        joined, left = self.state_store.update_scope(scope, members, complete)
+        changes = [
+            {**member, "scope": scope, "change": "new_hire", "old": None, "new": scope}
+            for member in joined
+        ] + [
+            {**member, "scope": scope, "change": "departure", "old": scope, "new": None}
+            for member in left
+        ]
+        self.state_store.add_changes(changes)
+        return changes
@@ -1,51 +1,113 @@
-import json
 import re
-from datetime import datetime as dt
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime as dt, timezone
 
+from staffspy.utils import tracing
 from staffspy.utils.exceptions import TooManyRequests
 from staffspy.utils.models import Comment
+from staffspy.utils.retry import RetryPolicy
+from staffspy.utils.state import StateStore
 
 from staffspy.utils.utils import logger
 
 
 class CommentFetcher:
 
-    def __init__(self, session):
+    def __init__(
+        self,
+        session,
+        prefetch: int = 1,
+        state_store: StateStore = None,
+        retry: RetryPolicy = None,
+    ):
         self.session = session
+        self.retry = retry or RetryPolicy()
         self.endpoint = "https://www.linkedin.com/voyager/api/graphql?queryId=voyagerSocialDashComments.8cb29aedde780600a7ad17fc7ebb8277&queryName=SocialDashCommentsBySocialDetail&variables=(origins:List(),count:100,socialDetailUrn:urn%3Ali%3Afsd_socialDetail%3A%28urn%3Ali%3Aactivity%3A{post_id}%2Curn%3Ali%3Aactivity%3A7254884361622208512%2Curn%3Ali%3AhighlightedReply%3A-%29,sortOrder:REVERSE_CHRONOLOGICAL,start:{start})"
-        self.post_id = None
         self.num_commments = 100
+        self.prefetch = prefetch
+        self.state_store = state_store
+
+    def fetch_comments(self, post_id: str, since: dt = None) -> list[Comment]:
+        """Pages through the comments of a post, newest first, keeping `prefetch` pages in flight ahead of the one being parsed.
+        Stops at the first comment not newer than `since`, or than the stored watermark of the post if no `since` is given
+        """
+        if since is None and self.state_store:
+            since = self.state_store.comment_watermark(post_id)
+        elif since is not None and since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
 
-    def fetch_comments(self, post_id: str):
         all_comments = []
-        self.post_id = post_id
+        complete = False
+        starts = iter(range(0, 200_000, self.num_commments))
+        # with a watermark the first page is usually the only one needed, so only prefetch once it is all new
+        depth = 1 if since else self.prefetch + 1
+        with ThreadPoolExecutor(max_workers=self.prefetch + 1) as executor:
+            pending = deque()
+            try:
+                while True:
+                    while (
+                        len(pending) < depth
+                        and (start := next(starts, None)) is not None
+                    ):
+                        pending.append(
+                            executor.submit(
+                                tracing.in_current_context(self.fetch_page),
+                                post_id,
+                                start,
+                            )
+                        )
+                    if not pending:
+                        break
+                    page = pending.popleft().result()
+                    if page is None:
+                        break
+                    comments, num_results = page
+                    if since:
+                        new_comments = [c for c in comments if c.created_at > since]
+                        all_comments.extend(new_comments)
+                        if len(new_comments) < len(comments):
+                            complete = True
+                            break
+                    else:
+                        all_comments.extend(comments)
+                    if not num_results:
+                        complete = True
+                        break
+                    depth = self.prefetch + 1
+            finally:
+                for future in pending:
+                    future.cancel()
 
-        for i in range(0, 200_000, self.num_commments):
-            logger.info(f"Fetching comments for post {post_id}, start {i}")
+        # a page that failed midway leaves a gap, so the watermark only moves after a full walk
+        if self.state_store and complete and all_comments:
+            self.state_store.set_comment_watermark(
+                post_id, max(c.created_at for c in all_comments)
+            )
+        return all_comments
 
-            ep = self.endpoint.format(post_id=post_id, start=i)
-            res = self.session.get(ep)
-            logger.debug(f"comments info, status code - {res.status_code}")
+    def fetch_page(self, post_id: str, start: int) -> tuple[list[Comment], int] | None:
+        """One page of comments and the number of results on it, None if the page could not be read"""
+        logger.info(f"Fetching comments for post {post_id}, start {start}")
 
-            if res.status_code == 429:
-                raise TooManyRequests("429 Too Many Requests")
-            if not res.ok:
-                logger.debug(res.text[:200])
-                return False
-            try:
-                comments_json = res.json()
-            except json.decoder.JSONDecodeError:
-                logger.debug(res.text[:200])
-                return False
+        ep = self.endpoint.format(post_id=post_id, start=start)
+        with tracing.span("comments.request", post_id=post_id, start=start):
+            res, comments_json = self.retry.get_json(self.session, ep)
+        logger.debug(f"comments info, status code - {res.status_code}")
 
-            comments, num_results = self.parse_comments(comments_json)
-            all_comments.extend(comments)
-            if not num_results:
-                break
+        if res.status_code == 429:
+            raise TooManyRequests("429 Too Many Requests")
+        if not res.ok:
+            logger.debug(res.text[:200])
+            return None
+        if comments_json is None:
+            logger.debug(res.text[:200])
+            return None
 
-        return all_comments
+        with tracing.span("comments.parse"):
+            return self.parse_comments(comments_json, post_id)
 
-    def parse_comments(self, comments_json: dict):
+    def parse_comments(self, comments_json: dict, post_id: str):
         """Parse the comment data from the employee profile."""
         comments = []
         for element in (
@@ -64,7 +126,7 @@ class CommentFetcher:
             comment_id = element["urn"].split(",")[-1].rstrip(")")
             num_likes = element["socialDetail"]["totalSocialActivityCounts"]["numLikes"]
             comment = Comment(
-                post_id=self.post_id,
+                post_id=post_id,
                 comment_id=comment_id,
                 internal_profile_id=internal_profile_id,
                 public_profile_id=linkedin_id,
@@ -75,4 +137,8 @@ class CommentFetcher:
             )
             comments.append(comment)
 
+        if self.state_store:
+            self.state_store.record_identities(
+                [(c.internal_profile_id, c.public_profile_id, None) for c in comments]
+            )
         return comments, len(results)
@@ -1,42 +1,42 @@
 from calendar import month_name
-from datetime import datetime
-import json
+from datetime import datetime, timezone
 import requests
 import logging
 
-import pytz
-
+from staffspy.utils import tracing
 from staffspy.utils.exceptions import TooManyRequests
 from staffspy.utils.models import ContactInfo, Staff
+from staffspy.utils.retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
 
 class ContactInfoFetcher:
-    def __init__(self, session):
+    def __init__(self, session, retry: RetryPolicy = None):
         self.session = session
+        self.retry = retry or RetryPolicy()
         self.endpoint = "https://www.linkedin.com/voyager/api/graphql?queryId=voyagerIdentityDashProfiles.13618f886ce95bf503079f49245fbd6f&queryName=ProfilesByMemberIdentity&variables=(memberIdentity:{employee_id},count:1)"
 
     def fetch_contact_info(self, base_staff):
         ep = self.endpoint.format(employee_id=base_staff.id)
         try:
-            res = self.session.get(ep)
+            with tracing.span("contact_info.request"):
+                res, employee_json = self.retry.get_json(self.session, ep)
         except requests.exceptions.TooManyRedirects as e:
             logger.error("Too many redirects encountered: %s", e)
             return None
         logger.debug(f"bio info, status code - {res.status_code}")
         if res.status_code == 429:
-            return TooManyRequests("429 Too Many Requests")
+            raise TooManyRequests("429 Too Many Requests")
         if not res.ok:
             logger.debug(res.text)
             return False
-        try:
-            employee_json = res.json()
-        except json.decoder.JSONDecodeError:
+        if employee_json is None:
             logger.debug(res.text)
             return False
 
-        self.parse_emp_contact_info(base_staff, employee_json)
+        with tracing.span("contact_info.parse"):
+            self.parse_emp_contact_info(base_staff, employee_json)
         return True
 
     def parse_emp_contact_info(self, emp: Staff, emp_dict: dict):
@@ -78,8 +78,7 @@ class ContactInfoFetcher:
             created_at = emp_dict["memberRelationship"][
                 "memberRelationshipDataResolutionResult"
             ]["connection"]["createdAt"]
-            timezone = pytz.timezone("UTC")
-            dt = datetime.fromtimestamp(created_at / 1000, tz=timezone)
+            dt = datetime.fromtimestamp(created_at / 1000, tz=timezone.utc)
             contact_info.created_at = dt.strftime("%Y-%m-%d %H:%M:%S %Z")
         except (KeyError, IndexError, TypeError):
             pass
@@ -1,34 +1,40 @@
-import json
 import logging
 import re
 
 import staffspy.utils.utils as utils
+from staffspy.utils import tracing
 from staffspy.utils.exceptions import TooManyRequests
 from staffspy.utils.models import Staff
+from staffspy.utils.retry import RetryPolicy
+from staffspy.utils.state import StateStore
 
 logger = logging.getLogger(__name__)
 
 
 class EmployeeFetcher:
-    def __init__(self, session):
+    def __init__(
+        self, session, state_store: StateStore = None, retry: RetryPolicy = None
+    ):
         self.session = session
+        self.retry = retry or RetryPolicy()
+        self.state_store = state_store
         self.endpoint = "https://www.linkedin.com/voyager/api/voyagerIdentityDashProfiles?count=1&decorationId=com.linkedin.voyager.dash.deco.identity.profile.TopCardComplete-138&memberIdentity={employee_id}&q=memberIdentity"
 
         self.domain = None
 
-    def fetch_employee(self, base_staff, domain):
+    def fetch_employee(self, base_staff, domain, empty_sections: set = None):
+        """Fetches the top card, adding the sections it shows are empty to empty_sections if given"""
         self.domain = domain
         ep = self.endpoint.format(employee_id=base_staff.id)
-        res = self.session.get(ep)
+        with tracing.span("employee.request"):
+            res, res_json = self.retry.get_json(self.session, ep)
         logger.debug(f"basic info, status code - {res.status_code}")
         if res.status_code == 429:
-            return TooManyRequests("429 Too Many Requests")
+            raise TooManyRequests("429 Too Many Requests")
         if not res.ok:
             logger.debug(res.text[:200])
             return False
-        try:
-            res_json = res.json()
-        except json.decoder.JSONDecodeError:
+        if res_json is None:
             logger.debug(res.text[:200])
             return False
 
@@ -38,11 +44,14 @@ class EmployeeFetcher:
             logger.debug(res_json)
             return False
 
-        self.parse_emp(base_staff, employee_json)
+        with tracing.span("employee.parse"):
+            empty = self.parse_emp(base_staff, employee_json)
+        if empty_sections is not None:
+            empty_sections.update(empty)
         return True
 
-    def parse_emp(self, emp: Staff, emp_dict: dict):
-        """Parse the employee data from the employee profile."""
+    def parse_emp(self, emp: Staff, emp_dict: dict) -> set[str]:
+        """Parse the employee data from the employee profile, returns the sections the top card shows are empty."""
 
         def get_photo_url(emp_dict: dict, key: str):
             try:
@@ -58,6 +67,11 @@ class EmployeeFetcher:
         emp.profile_photo = get_photo_url(emp_dict, "profilePicture")
         emp.banner_photo = get_photo_url(emp_dict, "backgroundPicture")
         emp.profile_id = emp_dict["publicIdentifier"]
+        if self.state_store:
+            urn = emp_dict.get("objectUrn") or ""
+            self.state_store.record_identities(
+                [(emp.id, emp.profile_id, urn.split(":")[-1] or emp.urn)]
+            )
         try:
             emp.headline = emp_dict.get("headline")
             if not emp.headline:
@@ -133,3 +147,10 @@ class EmployeeFetcher:
                     )
         except (KeyError, TypeError, IndexError, ValueError) as e:
             pass
+
+        # the top card has no signal for skills, certifications or languages, those are always fetched.
+        # No top position only means no current one, members between jobs or retired still have experiences
+        empty = set()
+        if not edu_cards:
+            empty.add("schools")
+        return empty
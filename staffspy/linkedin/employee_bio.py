@@ -1,28 +1,29 @@
-import json
 import logging
 
+from staffspy.utils import tracing
 from staffspy.utils.exceptions import TooManyRequests
+from staffspy.utils.retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
 
 class EmployeeBioFetcher:
-    def __init__(self, session):
+    def __init__(self, session, retry: RetryPolicy = None):
         self.session = session
+        self.retry = retry or RetryPolicy()
         self.endpoint = "https://www.linkedin.com/voyager/api/graphql?queryId=voyagerIdentityDashProfileCards.9ad2590cb61a073ad514922fa752f566&queryName=ProfileTabInitialCards&variables=(count:50,profileUrn:urn%3Ali%3Afsd_profile%3A{employee_id})"
 
     def fetch_employee_bio(self, base_staff):
         ep = self.endpoint.format(employee_id=base_staff.id)
-        res = self.session.get(ep)
+        with tracing.span("bio.request"):
+            res, data = self.retry.get_json(self.session, ep)
         logger.debug(f"bio info, status code - {res.status_code}")
         if res.status_code == 429:
-            return TooManyRequests("429 Too Many Requests")
+            raise TooManyRequests("429 Too Many Requests")
         if not res.ok:
             logger.debug(res.text)
             return False
-        try:
-            data = res.json()
-        except json.decoder.JSONDecodeError:
+        if data is None:
             logger.debug(res.text)
             return False
 
@@ -31,6 +32,7 @@ class EmployeeBioFetcher:
                 "elements"
             ][3]["topComponents"][1]["components"]["textComponent"]["text"]["text"]
         except (KeyError, IndexError, TypeError):
-            return False
+            # no about card, the profile has no bio
+            base_staff.bio = None
 
         return True
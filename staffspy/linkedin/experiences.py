@@ -1,21 +1,24 @@
-import json
 import logging
 
 import staffspy.utils.utils as utils
+from staffspy.utils import tracing
 from staffspy.utils.exceptions import TooManyRequests
 from staffspy.utils.models import Experience
+from staffspy.utils.retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
 
 class ExperiencesFetcher:
-    def __init__(self, session):
+    def __init__(self, session, retry: RetryPolicy = None):
         self.session = session
+        self.retry = retry or RetryPolicy()
         self.endpoint = "https://www.linkedin.com/voyager/api/graphql?queryId=voyagerIdentityDashProfileComponents.277ba7d7b9afffb04683953cede751fb&queryName=ProfileComponentsBySectionType&variables=(tabIndex:0,sectionType:experience,profileUrn:urn%3Ali%3Afsd_profile%3A{employee_id},count:50)"
 
     def fetch_experiences(self, staff):
         ep = self.endpoint.format(employee_id=staff.id)
-        res = self.session.get(ep)
+        with tracing.span("experiences.request"):
+            res, res_json = self.retry.get_json(self.session, ep)
         logger.debug(f"exps, status code - {res.status_code}")
         if res.reason == "INKApi Error":
             raise Exception(
@@ -25,13 +28,11 @@ class ExperiencesFetcher:
                 res.reason,
             )
         elif res.status_code == 429:
-            return TooManyRequests("429 Too Many Requests")
+            raise TooManyRequests("429 Too Many Requests")
         elif not res.ok:
             logger.debug(res.text[:200])
             return False
-        try:
-            res_json = res.json()
-        except json.decoder.JSONDecodeError:
+        if res_json is None:
             logger.debug(res.text[:200])
             return False
 
@@ -45,7 +46,8 @@ class ExperiencesFetcher:
             logger.debug(res_json)
             return False
 
-        staff.experiences = self.parse_experiences(skills_json)
+        with tracing.span("experiences.parse"):
+            staff.experiences = self.parse_experiences(skills_json)
         return True
 
     def parse_experiences(self, elements):
@@ -1,35 +1,37 @@
-import json
 import logging
 
+from staffspy.utils import tracing
 from staffspy.utils.exceptions import TooManyRequests
 from staffspy.utils.models import Skill, Staff
+from staffspy.utils.retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
 
 class LanguagesFetcher:
-    def __init__(self, session):
+    def __init__(self, session, retry: RetryPolicy = None):
         self.session = session
+        self.retry = retry or RetryPolicy()
         self.endpoint = "https://www.linkedin.com/voyager/api/graphql?queryId=voyagerIdentityDashProfileComponents.9117695ef207012719e3e0681c667e14&queryName=ProfileComponentsBySectionType&variables=(tabIndex:0,sectionType:languages,profileUrn:urn%3Ali%3Afsd_profile%3A{employee_id},count:50)"
 
     def fetch_languages(self, staff: Staff):
         ep = self.endpoint.format(employee_id=staff.id)
-        res = self.session.get(ep)
+        with tracing.span("languages.request"):
+            res, res_json = self.retry.get_json(self.session, ep)
         logger.debug(f"skills, status code - {res.status_code}")
         if res.status_code == 429:
-            return TooManyRequests("429 Too Many Requests")
+            raise TooManyRequests("429 Too Many Requests")
         if not res.ok:
             logger.debug(res.text)
             return False
-        try:
-            res_json = res.json()
-        except json.decoder.JSONDecodeError:
+        if res_json is None:
             logger.debug(res.text)
             return False
 
         if res_json.get("errors"):
             return False
-        staff.languages = self.parse_languages(res_json)
+        with tracing.span("languages.parse"):
+            staff.languages = self.parse_languages(res_json)
         return True
 
     def parse_languages(self, language_json: dict) -> list[str]:
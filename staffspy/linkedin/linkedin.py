@@ -5,27 +5,58 @@ staffspy.linkedin.linkedin
 This module contains routines to scrape LinkedIn.
 """
 
+import heapq
 import json
 import re
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
 from urllib.parse import quote, unquote
 
 import requests
 
 import staffspy.utils.utils as utils
-from staffspy.utils.exceptions import TooManyRequests, BadCookies, GeoUrnNotFound
+from staffspy.utils import tracing
+from staffspy.utils.exceptions import (
+    TooManyRequests,
+    BadCookies,
+    GeoUrnNotFound,
+    RequestBudgetSpent,
+)
 from staffspy.linkedin.contact_info import ContactInfoFetcher
 from staffspy.linkedin.certifications import CertificationFetcher
+from staffspy.linkedin.changes import ChangeTracker, RESTORED_SECTIONS
 from staffspy.linkedin.employee import EmployeeFetcher
 from staffspy.linkedin.employee_bio import EmployeeBioFetcher
 from staffspy.linkedin.experiences import ExperiencesFetcher
 from staffspy.linkedin.languages import LanguagesFetcher
+from staffspy.linkedin.profile_view import parse_profile_view
 from staffspy.linkedin.schools import SchoolsFetcher
 from staffspy.linkedin.skills import SkillsFetcher
-from staffspy.utils.models import Staff
+from staffspy.utils.budget import RequestBudget
+from staffspy.utils.models import SECTION_COLUMNS, Staff
+from staffspy.utils.planner import PROFILE_REQUESTS
+from staffspy.utils.retry import RetryPolicy
+from staffspy.utils.sinks import Sink
+from staffspy.utils.state import StateStore
 from staffspy.utils.utils import logger
 
 
+def text_or_none(value) -> str | None:
+    """A string column of an earlier result, DataFrames hold NaN where it was empty"""
+    return value if isinstance(value, str) else None
+
+
+def failed_sections(record: dict) -> set[str]:
+    """failed_sections of an earlier result, a list or the text a CSV round trip made of it"""
+    value = record.get("failed_sections")
+    if isinstance(value, str):
+        value = re.findall(r"[a-z_]+", value)
+    if not isinstance(value, (list, tuple, set)):
+        return set()
+    return set(value) & SECTION_COLUMNS.keys()
+
+
 class LinkedInScraper:
     employees_ep = "https://www.linkedin.com/voyager/api/graphql?variables=(start:{offset},query:(flagshipSearchIntent:SEARCH_SRP,{search}queryParameters:List({company_id}{location}(key:resultType,value:List(PEOPLE))),includeFiltersInResponse:false),count:{count})&queryId=voyagerSearchDashClusters.66adc6056cf4138949ca5dcb31bb1749"
     company_id_ep = "https://www.linkedin.com/voyager/api/organization/companies?q=universalName&universalName="
@@ -38,8 +69,24 @@ class LinkedInScraper:
     block_user_ep = "https://www.linkedin.com/voyager/api/voyagerTrustDashContentReportingForm?action=entityBlock"
     connect_to_user_ep = "https://www.linkedin.com/voyager/api/voyagerRelationshipsDashMemberRelationships?action=verifyQuotaAndCreateV2&decorationId=com.linkedin.voyager.dash.deco.relationships.InvitationCreationResultWithInvitee-1"
 
-    def __init__(self, session: requests.Session):
+    # sent per request, the session headers are shared by every worker thread
+    pegasus_headers = {"x-li-graphql-pegasus-client": "true"}
+    protobuf_headers = {
+        "Content-Type": "application/x-protobuf2; symbol-table=voyager-20757"
+    }
+
+    def __init__(
+        self,
+        session: requests.Session,
+        state_store: StateStore = None,
+        conditional_sections: bool = False,
+        retry: RetryPolicy = None,
+    ):
         self.session = session
+        self.retry = retry or RetryPolicy()
+        self.state_store = state_store
+        # fetch the top card first and skip the sections it shows are empty
+        self.conditional_sections = conditional_sections
         (
             self.company_id,
             self.staff_count,
@@ -53,22 +100,30 @@ class LinkedInScraper:
         ) = (None, None, None, None, None, None, None, None, None)
         self.on_block = False
         self.connect_block = False
-        self.certs = CertificationFetcher(self.session)
-        self.skills = SkillsFetcher(self.session)
-        self.employees = EmployeeFetcher(self.session)
-        self.schools = SchoolsFetcher(self.session)
-        self.experiences = ExperiencesFetcher(self.session)
-        self.bio = EmployeeBioFetcher(self.session)
-        self.languages = LanguagesFetcher(self.session)
-        self.contact = ContactInfoFetcher(self.session)
+        # when set, block / connect are queued in the state_store for this account instead of sent
+        self.action_account = None
+        # when set, profiles are diffed against their snapshots and unchanged ones skip the deeper sections
+        self.changes: ChangeTracker | None = None
+        self.change_scope = None
+        self.certs = CertificationFetcher(self.session, self.retry)
+        self.skills = SkillsFetcher(self.session, self.retry)
+        self.employees = EmployeeFetcher(self.session, state_store, self.retry)
+        self.schools = SchoolsFetcher(self.session, self.retry)
+        self.experiences = ExperiencesFetcher(self.session, self.retry)
+        self.bio = EmployeeBioFetcher(self.session, self.retry)
+        self.languages = LanguagesFetcher(self.session, self.retry)
+        self.contact = ContactInfoFetcher(self.session, self.retry)
 
     def search_companies(self, company_name: str):
         """Get the company id and staff count from the company name."""
 
         company_search_ep = self.company_search_ep.format(company=quote(company_name))
-        self.session.headers["x-li-graphql-pegasus-client"] = "true"
-        res = self.session.get(company_search_ep)
-        self.session.headers.pop("x-li-graphql-pegasus-client", "")
+        with tracing.span("company.search", company=company_name):
+            res = self.retry.request(
+                self.session, "GET", company_search_ep, headers=self.pegasus_headers
+            )
+        if res.status_code == 429:
+            raise TooManyRequests("429 Too Many Requests")
         if not res.ok:
             raise Exception(
                 f"Failed to search for company {company_name}",
@@ -110,8 +165,16 @@ class LinkedInScraper:
 
     def fetch_or_search_company(self, company_name):
         """Fetch the company details by name, or search if not found."""
-        res = self.session.get(f"{self.company_id_ep}{company_name}")
+        with tracing.span("company.resolve", company=company_name):
+            return self._fetch_or_search_company(company_name)
+
+    def _fetch_or_search_company(self, company_name):
+        res = self.retry.request(
+            self.session, "GET", f"{self.company_id_ep}{company_name}"
+        )
 
+        if res.status_code == 429:
+            raise TooManyRequests("429 Too Many Requests")
         if res.status_code not in (200, 404):
             raise Exception(
                 f"Failed to find company {company_name} (likely due to outdated login if you know it's valid company)",
@@ -123,7 +186,11 @@ class LinkedInScraper:
                 f"Failed to directly use company '{company_name}' as company id, now searching for the company"
             )
             company_name = self.search_companies(company_name)
-            res = self.session.get(f"{self.company_id_ep}{company_name}")
+            res = self.retry.request(
+                self.session, "GET", f"{self.company_id_ep}{company_name}"
+            )
+            if res.status_code == 429:
+                raise TooManyRequests("429 Too Many Requests")
             if res.status_code != 200:
                 raise Exception(
                     f"Failed to find company after performing a direct and generic search for {company_name}",
@@ -202,8 +269,17 @@ class LinkedInScraper:
                         profile_link=profile_link,
                     )
                 )
+        if self.state_store:
+            self.state_store.record_identities(
+                [(s.id, self.public_id_from_link(s.profile_link), s.urn) for s in staff]
+            )
         return staff
 
+    @staticmethod
+    def public_id_from_link(profile_link: str | None) -> str | None:
+        match = re.search(r"/in/([^/?]+)", profile_link or "")
+        return unquote(match.group(1)) if match else None
+
     def fetch_staff(self, offset: int):
         """Fetch the staff using LinkedIn search"""
         ep = self.employees_ep.format(
@@ -219,7 +295,8 @@ class LinkedInScraper:
                 f"(key:geoUrn,value:List({self.location}))," if self.location else ""
             ),
         )
-        res = self.session.get(ep)
+        with tracing.span("search.page", offset=offset):
+            res, res_json = self.retry.get_json(self.session, ep)
         if not res.ok:
             logger.debug(f"employees, status code - {res.status_code}")
         if res.status_code == 400:
@@ -228,9 +305,7 @@ class LinkedInScraper:
             raise TooManyRequests("429 Too Many Requests")
         if not res.ok:
             return None, 0
-        try:
-            res_json = res.json()
-        except json.decoder.JSONDecodeError:
+        if res_json is None:
             logger.debug(res.text)
             return None, 0
 
@@ -247,9 +322,12 @@ class LinkedInScraper:
         return new_staff, total_count
 
     def fetch_connections_page(self, offset: int):
-        self.session.headers["x-li-graphql-pegasus-client"] = "true"
-        res = self.session.get(self.connections_ep.format(offset=offset))
-        self.session.headers.pop("x-li-graphql-pegasus-client", "")
+        with tracing.span("connections.page", offset=offset):
+            res, res_json = self.retry.get_json(
+                self.session,
+                self.connections_ep.format(offset=offset),
+                headers=self.pegasus_headers,
+            )
         if not res.ok:
             logger.debug(f"employees, status code - {res.status_code}")
         if res.status_code == 400:
@@ -258,9 +336,7 @@ class LinkedInScraper:
             raise TooManyRequests("429 Too Many Requests")
         if not res.ok:
             return
-        try:
-            res_json = res.json()
-        except json.decoder.JSONDecodeError:
+        if res_json is None:
             logger.debug(res.text)
             return
 
@@ -281,50 +357,125 @@ class LinkedInScraper:
         self,
         max_results: int = 10**8,
         extra_profile_data: bool = False,
+        priority: Callable[[Staff], float] = None,
+        budget: RequestBudget = None,
+        sink: Sink = None,
     ):
+        """Connections, with a sink the ones written to it are not returned.
+        Unless a priority needs them all first, each page goes to the sink as soon as it is read (and enriched)
+        """
         self.search_term = "connections"
         staff_list: list[Staff] = []
+        stream = sink if not (extra_profile_data and priority) else None
+        enrich = extra_profile_data
+        written = 0
+
+        def collect(staff: list[Staff]):
+            nonlocal written, enrich
+            if not stream:
+                staff_list.extend(staff)
+                return
+            staff = staff[: max_results - written]
+            written += len(staff)
+            if enrich:
+                visible = sum(1 for e in staff if e.name != "LinkedIn Member")
+                # the budget ran out or LinkedIn answered 429, later pages are only listed
+                enrich = self.enrich_staff(staff, budget=budget, sink=stream) == visible
+            stream.write_many(employee.to_dict() for employee in staff)
 
         try:
             initial_staff, total_search_result_count = self.fetch_connections_page(0)
             if initial_staff:
-                staff_list.extend(initial_staff)
+                collect(initial_staff)
 
             self.num_staff = min(total_search_result_count, max_results)
             for offset in range(50, self.num_staff, 50):
                 staff, _ = self.fetch_connections_page(offset)
                 logger.debug(
-                    f"Connections from search: {len(staff)} new, {len(staff_list) + len(staff)} total"
+                    f"Connections from search: {len(staff)} new, {written + len(staff_list) + len(staff)} total"
                 )
                 if not staff:
                     break
-                staff_list.extend(staff)
+                collect(staff)
         except (BadCookies, TooManyRequests) as e:
             self.on_block = True
             logger.error(f"Exiting early due to fatal error: {str(e)}")
             return staff_list[:max_results]
+        except RequestBudgetSpent as e:
+            logger.warning(f"{str(e)} while listing connections")
 
-        reduced_staff_list = staff_list[:max_results]
+        # truncated in place, a copy would keep the profiles the sink lets go alive
+        del staff_list[max_results:]
+        if extra_profile_data and not stream:
+            self.enrich_staff(staff_list, priority=priority, budget=budget, sink=sink)
+        return staff_list
 
-        non_restricted = list(
-            filter(lambda x: x.name != "LinkedIn Member", reduced_staff_list)
-        )
+    def sync_connections(
+        self,
+        state_store: StateStore,
+        account: str,
+        full: bool = False,
+        extra_profile_data: bool = False,
+        priority: Callable[[Staff], float] = None,
+        budget: RequestBudget = None,
+    ) -> tuple[list[Staff], list[dict]]:
+        """Connections not seen in earlier syncs, newest first, stopping at the first page of known ones.
+        A full sync walks every page and also returns the connections that were removed
+        """
+        self.search_term = "connections"
+        known = state_store.known_connections(account)
+        new_staff: list[Staff] = []
+        seen = set()
+        complete = False
 
-        if extra_profile_data:
-            try:
-                for i, employee in enumerate(non_restricted, start=1):
-                    self.fetch_all_info_for_employee(employee, i)
-            except TooManyRequests as e:
-                logger.error(str(e))
-        return reduced_staff_list
+        try:
+            offset = 0
+            while True:
+                page = self.fetch_connections_page(offset)
+                if page is None:
+                    break
+                staff, total_count = page
+                if not staff:
+                    complete = True
+                    break
+                seen.update(employee.urn for employee in staff)
+                fresh = [employee for employee in staff if employee.urn not in known]
+                new_staff.extend(fresh)
+                logger.debug(
+                    f"Connections sync: {len(fresh)} new on page at offset {offset}, {len(new_staff)} new total"
+                )
+                offset += 50
+                if (not fresh and not full) or offset >= total_count:
+                    complete = True
+                    break
+        except (BadCookies, TooManyRequests) as e:
+            self.on_block = True
+            logger.error(f"Exiting early due to fatal error: {str(e)}")
+        except RequestBudgetSpent as e:
+            logger.warning(f"{str(e)} while syncing connections")
+
+        removed = []
+        # an interrupted walk is not stored, the next sync picks the new connections up again
+        if complete:
+            state_store.add_connections(account, new_staff)
+            if full:
+                removed = state_store.remove_connections(account, known - seen)
+                state_store.set_reconciled(account)
+        else:
+            logger.warning(
+                "Connections sync was interrupted, new connections were not stored"
+            )
+
+        if extra_profile_data and not self.on_block:
+            self.enrich_staff(new_staff, priority=priority, budget=budget)
+        return new_staff, removed
 
     def fetch_location_id(self):
         """Fetch the location id for the location to be used in LinkedIn search"""
         ep = self.location_id_ep.format(location=quote(self.raw_location))
-        res = self.session.get(ep)
-        try:
-            res_json = res.json()
-        except json.decoder.JSONDecodeError:
+        with tracing.span("search.location", location=self.raw_location):
+            res, res_json = self.retry.get_json(self.session, ep)
+        if res_json is None:
             if res.reason == "INKApi Error":
                 raise Exception(
                     "Delete session file and log in again",
@@ -363,6 +514,9 @@ class LinkedInScraper:
         max_results: int,
         block: bool,
         connect: bool,
+        priority: Callable[[Staff], float] = None,
+        budget: RequestBudget = None,
+        sink: Sink = None,
     ):
         """Main function entry point to scrape LinkedIn staff"""
         self.search_term = search_term
@@ -411,28 +565,107 @@ class LinkedInScraper:
             self.on_block = True
             logger.error(f"Exiting early due to fatal error: {str(e)}")
             return staff_list[:max_results]
+        except RequestBudgetSpent as e:
+            logger.warning(f"{str(e)} while listing, {len(staff_list)} results")
 
-        reduced_staff_list = staff_list[:max_results]
-        non_restricted = list(
-            filter(lambda x: x.name != "LinkedIn Member", reduced_staff_list)
-        )
+        if self.changes:
+            self.change_scope = " | ".join(
+                filter(None, [company_name, search_term, self.raw_location])
+            )
+            # people missing from a search cut off by max_results or the 1000 cap have not left
+            complete = min(len(staff_list), max_results) >= total_count
+            self.changes.record_scope(
+                self.change_scope, staff_list[:max_results], complete
+            )
 
+        del staff_list[max_results:]
         if extra_profile_data:
-            try:
-                for i, employee in enumerate(non_restricted, start=1):
-                    self.fetch_all_info_for_employee(employee, i)
-                    if block:
-                        self.block_user(employee)
-                    elif connect:
-                        self.connect_user(employee)
+            self.enrich_staff(
+                staff_list,
+                block=block,
+                connect=connect,
+                priority=priority,
+                budget=budget,
+                sink=sink,
+            )
+        return staff_list
 
-            except TooManyRequests as e:
-                logger.error(str(e))
+    def enrich_staff(
+        self,
+        staff: list[Staff],
+        block: bool = False,
+        connect: bool = False,
+        priority: Callable[[Staff], float] = None,
+        budget: RequestBudget = None,
+        sink: Sink = None,
+    ) -> int:
+        """Enriches the visible staff highest priority first (search order on ties) until all are done,
+        the request budget can't cover another profile or LinkedIn answers 429. Returns how many were enriched.
+        With a sink each profile is written and let go as soon as it is done, staff keeps only the ones not written
+        """
+        heap = [
+            (-priority(employee) if priority else 0, i, employee)
+            for i, employee in enumerate(staff)
+            if employee.name != "LinkedIn Member"
+        ]
+        heapq.heapify(heap)
+        if sink:
+            staff[:] = [e for e in staff if e.name == "LinkedIn Member"]
+        self.num_staff = len(heap)
+        enriched = 0
+        try:
+            while heap:
+                if budget and budget.remaining < PROFILE_REQUESTS:
+                    logger.warning(
+                        f"Request budget of {budget.limit} reached, {len(heap)} profiles left without extra data"
+                    )
+                    break
+                _, _, employee = heapq.heappop(heap)
+                enriched += 1
+                try:
+                    self.fetch_all_info_for_employee(employee, enriched)
+                    self.act_on(employee, block, connect)
+                finally:
+                    if sink:
+                        sink.write(employee.to_dict())
+        except TooManyRequests as e:
+            self.on_block = True
+            logger.error(str(e))
+        except RequestBudgetSpent as e:
+            # a block / connect that did not fit, the sections stop on their own
+            logger.warning(f"{str(e)}, {len(heap)} profiles left without extra data")
+        if sink:
+            # profiles left without extra data go before the hidden ones, in search order
+            staff[:0] = [
+                employee for _, _, employee in sorted(heap, key=lambda e: e[1])
+            ]
+        return enriched
 
-        return reduced_staff_list
+    def probe_staff(
+        self, company_name: str | None, search_term: str, location: str
+    ) -> tuple[int, list[Staff]]:
+        """Resolves the company and location and reads the first search page, what a scrape plan is based on"""
+        self.search_term = search_term
+        self.company_name = company_name
+        self.raw_location = location
+        self.company_id = None
+        if company_name:
+            self.company_id, _ = self._get_company_id_and_staff_count(company_name)
+        if location:
+            self.fetch_location_id()
+        staff, total_count = self.fetch_staff(0)
+        return total_count, staff or []
+
+    def fetch_all_info_for_employee(
+        self, employee: Staff, index: int, skip: set[str] = frozenset()
+    ):
+        """Simultaniously fetch all the data for an employee, except the sections in skip"""
+        with tracing.span("employee", employee_id=employee.id, index=index):
+            self._fetch_all_info_for_employee(employee, index, skip)
 
-    def fetch_all_info_for_employee(self, employee: Staff, index: int):
-        """Simultaniously fetch all the data for an employee"""
+    def _fetch_all_info_for_employee(
+        self, employee: Staff, index: int, skip: set[str] = frozenset()
+    ):
         logger.info(
             f"Fetching data for account {employee.id} {index:>4} / {self.num_staff} - {employee.profile_link}"
         )
@@ -446,34 +679,169 @@ class LinkedInScraper:
             (self.bio.fetch_employee_bio, (employee,), "bio"),
             (self.languages.fetch_languages, (employee,), "languages"),
         ]
-
-        with ThreadPoolExecutor(max_workers=len(task_functions)) as executor:
+        restored = False
+        attempted, done = set(), set()
+        try:
+            if (self.conditional_sections or self.changes) and "employee" not in skip:
+                empty_sections = set()
+                attempted.add("employee")
+                try:
+                    if self._run_section(
+                        "employee",
+                        self.employees.fetch_employee,
+                        (employee, self.domain, empty_sections),
+                        time.perf_counter(),
+                    ):
+                        done.add("employee")
+                except TooManyRequests:
+                    raise
+                except Exception as e:
+                    logger.error(f"Failed to fetch employee: {str(e)}")
+                skip = {*skip, "employee"}
+                if self.conditional_sections:
+                    skip |= empty_sections
+                # a top card that failed to load can't vouch for the snapshot
+                if (
+                    "employee" in done
+                    and self.changes
+                    and self.changes.restore(employee)
+                ):
+                    restored = True
+                    skip |= RESTORED_SECTIONS
+            task_functions = [task for task in task_functions if task[2] not in skip]
+            attempted |= {name for _, _, name in task_functions}
+            self._run_sections(task_functions, done)
+
+            # contact info is only shared with connections, the top card has told us already in conditional mode
+            contact_info = (
+                employee.is_connection == "yes"
+                if self.conditional_sections
+                else employee.is_connection
+            )
+            if contact_info and "contact_info" not in skip:
+                attempted.add("contact_info")
+                if self._run_section(
+                    "contact_info",
+                    self.contact.fetch_contact_info,
+                    (employee,),
+                    time.perf_counter(),
+                ):
+                    done.add("contact_info")
+        except TooManyRequests:
+            # the sections the 429 kept from being fetched need a repair as well
+            attempted |= {name for _, _, name in task_functions if name not in skip}
+            if employee.is_connection == "yes" and "contact_info" not in skip:
+                attempted.add("contact_info")
+            raise
+        finally:
+            employee.failed_sections = sorted(attempted - done) or None
+        if self.changes:
+            self.changes.record(employee, deep=not restored, scope=self.change_scope)
+
+    def _run_sections(self, task_functions: list[tuple], done: set[str]):
+        """Fetches the sections in parallel, adding the ones that loaded to done.
+        A section that raises is logged and left out, a 429 cancels the sections not started yet
+        """
+        with ThreadPoolExecutor(max_workers=max(len(task_functions), 1)) as executor:
             tasks = {
-                executor.submit(func, *args): name
+                executor.submit(
+                    tracing.in_current_context(self._run_section),
+                    name,
+                    func,
+                    args,
+                    time.perf_counter(),
+                ): name
                 for func, args, name in task_functions
             }
 
             for future in as_completed(tasks):
-                result = future.result()
-
-        if employee.is_connection:
-            self.contact.fetch_contact_info(employee)
-
-    def fetch_user_profile_data_from_public_id(self, user_id: str, key: str):
-        """Fetches data given the public LinkedIn user id"""
+                name = tasks[future]
+                try:
+                    if future.result():
+                        done.add(name)
+                except TooManyRequests:
+                    # the breaker is open, sections not started yet are not sent at all
+                    for task in tasks:
+                        task.cancel()
+                    raise
+                except Exception as e:
+                    logger.error(f"Failed to fetch {name}: {str(e)}")
+
+    def repair(self, records: list[dict]) -> int:
+        """Fetches again only the failed_sections of each record and copies the columns of the ones that loaded
+        into it, stopping at a 429. Returns how many sections were repaired
+        """
+        todo = [(record, failed_sections(record)) for record in records]
+        todo = [
+            (record, failed) for record, failed in todo if failed and record.get("id")
+        ]
+        self.num_staff = len(todo)
+        repaired = 0
+        for i, (record, failed) in enumerate(todo, start=1):
+            employee = Staff(
+                id=record["id"],
+                search_term=text_or_none(record.get("search_term")) or "repair",
+                urn=text_or_none(record.get("urn")),
+                name=text_or_none(record.get("name")),
+                profile_id=text_or_none(record.get("profile_id")),
+                profile_link=text_or_none(record.get("profile_link")),
+                is_connection=text_or_none(record.get("is_connection")),
+            )
+            try:
+                self.fetch_all_info_for_employee(
+                    employee, i, skip=SECTION_COLUMNS.keys() - failed
+                )
+            except TooManyRequests as e:
+                self.on_block = True
+                logger.error(f"Exiting early due to fatal error: {str(e)}")
+
+            fixed = failed - set(employee.failed_sections or ())
+            fresh = employee.to_dict()
+            for section in fixed:
+                for column in SECTION_COLUMNS[section]:
+                    record[column] = fresh[column]
+            record["failed_sections"] = sorted(failed - fixed) or None
+            repaired += len(fixed)
+            if self.on_block:
+                break
+        return repaired
+
+    def _run_section(self, name: str, func, args: tuple, submitted_at: float):
+        with tracing.span(f"section.{name}"):
+            tracing.set_attribute(
+                "queue_wait_ms", round((time.perf_counter() - submitted_at) * 1000, 1)
+            )
+            try:
+                return func(*args)
+            except RequestBudgetSpent:
+                # not sent, the profile lists it in failed_sections for a later repair
+                logger.debug(f"Request budget spent, skipping {name}")
+                return False
+
+    def fetch_profile_view(self, user_id: str) -> dict:
+        """The profileView document of a public LinkedIn user id"""
         endpoint = self.public_user_id_ep.format(user_id=user_id)
-        response = self.session.get(endpoint)
+        with tracing.span("profile_view.request", user_id=user_id):
+            response, response_json = self.retry.get_json(self.session, endpoint)
+        if response.status_code == 429:
+            raise TooManyRequests("429 Too Many Requests")
 
-        try:
-            response_json = response.json()
-        except json.decoder.JSONDecodeError:
+        if response_json is None:
             logger.debug(response.text[:200])
             raise Exception(
                 f"Failed to load JSON from endpoint",
                 response.status_code,
                 response.reason,
             )
+        return response_json
 
+    def fetch_user_profile_data_from_public_id(self, user_id: str, key: str):
+        """Fetches data given the public LinkedIn user id"""
+        response_json = self.fetch_profile_view(user_id)
+        return self.parse_profile_ids(response_json, user_id, key)
+
+    @staticmethod
+    def parse_profile_ids(response_json: dict, user_id: str, key: str):
         keys = {
             "user_id": ("positionView", "profileId"),
             "company_id": (
@@ -495,26 +863,68 @@ class LinkedInScraper:
         except (KeyError, TypeError, IndexError) as e:
             logger.warning(f"Failed to find user_id {user_id}")
             if key == "user_id":
-                return ""
+                return "", None
             raise Exception(f"Failed to fetch '{key}' for user_id {user_id}: {e}")
 
-    def block_user(self, employee: Staff) -> None:
+    def resolve_public_id(self, user_id: str) -> tuple[str, str | None]:
+        """fsd_profile id and member urn of a public id, from the identity index when it knows both"""
+        if self.state_store:
+            known = self.state_store.identity(profile_id=user_id)
+            if known and known["urn"]:
+                return known["fsd_id"], known["urn"]
+        fsd_id, urn = self.fetch_user_profile_data_from_public_id(user_id, "user_id")
+        if fsd_id and self.state_store:
+            self.state_store.record_identities([(fsd_id, user_id, urn)])
+        return fsd_id, urn
+
+    def resolve_user(self, user: Staff) -> set[str]:
+        """Sets the ids of a user from the profileView document and fills the sections it carries,
+        returns those sections so fetch_all_info_for_employee can skip them
+        """
+        response_json = self.fetch_profile_view(user.profile_id)
+        user.id, user.urn = self.parse_profile_ids(
+            response_json, user.profile_id, "user_id"
+        )
+        if not user.id:
+            return set()
+        if self.state_store:
+            self.state_store.record_identities([(user.id, user.profile_id, user.urn)])
+        with tracing.span("profile_view.parse", user_id=user.profile_id):
+            return parse_profile_view(user, response_json)
+
+    def act_on(self, employee: Staff, block: bool, connect: bool):
+        """Blocks or connects right away, or queues it when an action_account is set"""
+        if not block and not connect:
+            return
+        if self.action_account:
+            if employee.urn == "headless" or (
+                not block and employee.is_connection != "no"
+            ):
+                return
+            action = "block" if block else "connect"
+            self.state_store.enqueue_actions(self.action_account, action, [employee])
+        elif block:
+            self.block_user(employee)
+        else:
+            self.connect_user(employee)
+
+    def block_user(self, employee: Staff) -> requests.Response | None:
         """Block a user on LinkedIn given their urn"""
         if employee.urn == "headless":
             return
-        self.session.headers["Content-Type"] = (
-            "application/x-protobuf2; symbol-table=voyager-20757"
-        )
-
         urn_string = f"urn:li:member:{employee.urn}"
         length_byte = bytes([len(urn_string)])
         body = b"\x00\x01\x14\nblockeeUrn\x14" + length_byte + urn_string.encode()
 
-        res = self.session.post(
+        res = self.retry.request(
+            self.session,
+            "POST",
             self.block_user_ep,
+            idempotent=False,
+            throttle=False,
             data=body,
+            headers=self.protobuf_headers,
         )
-        self.session.headers.pop("Content-Type", "")
 
         if res.ok:
             logger.info(f"Successfully blocked user {employee.id}")
@@ -526,8 +936,9 @@ class LinkedInScraper:
             logger.warning(
                 f"Failed to block user - status code {res.status_code} {employee.id}: {employee.name}"
             )
+        return res
 
-    def connect_user(self, employee: Staff) -> None:
+    def connect_user(self, employee: Staff) -> requests.Response | None:
         """Connects with a user on LinkedIn given their profile id"""
         if self.connect_block:
             return logger.info(
@@ -539,19 +950,20 @@ class LinkedInScraper:
             return logger.info(
                 f"Already connected or pending connection request to user {employee.id} - {employee.profile_link}"
             )
-        self.session.headers["Content-Type"] = (
-            "application/x-protobuf2; symbol-table=voyager-20757"
-        )
         body = (
             b"\x00\x01\x03\xe2\x05\x00\x01\x03\xd3w\x00\x01\x03\xd5\x06\x14:urn:li:fsd_profile:"
             + employee.id.encode()
         )
 
-        res = self.session.post(
+        res = self.retry.request(
+            self.session,
+            "POST",
             self.connect_to_user_ep,
+            idempotent=False,
+            throttle=False,
             data=body,
+            headers=self.protobuf_headers,
         )
-        self.session.headers.pop("Content-Type", "")
 
         if res.ok:
             logger.info(
@@ -566,3 +978,4 @@ class LinkedInScraper:
             logger.warning(
                 f"Failed to connect to user - status code {res.status_code} {employee.id} -{employee.profile_link}"
             )
+        return res
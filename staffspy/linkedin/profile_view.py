@@ -0,0 +1,118 @@
+import calendar
+from datetime import date
+
+from staffspy.utils.models import Certification, Experience, School, Staff
+
+
+def time_period_date(period: dict | None) -> date | None:
+    if not period or not period.get("year"):
+        return None
+    return date(period["year"], period.get("month") or 1, 1)
+
+
+def duration_text(start: date | None, end: date | None) -> str | None:
+    """Same wording as the duration LinkedIn shows, e.g. 2 yrs 3 mos"""
+    if not start:
+        return None
+    end = end or date.today()
+    months = (end.year - start.year) * 12 + end.month - start.month + 1
+    years, months = divmod(max(months, 1), 12)
+    parts = []
+    if years:
+        parts.append(f"{years} yr{'s' if years > 1 else ''}")
+    if months:
+        parts.append(f"{months} mo{'s' if months > 1 else ''}")
+    return " ".join(parts)
+
+
+def parse_experiences(position_view: dict) -> list[Experience]:
+    exps = []
+    for position in position_view.get("elements", []):
+        period = position.get("timePeriod", {})
+        start_date = time_period_date(period.get("startDate"))
+        end_date = time_period_date(period.get("endDate"))
+        exps.append(
+            Experience(
+                duration=duration_text(start_date, end_date),
+                title=position.get("title"),
+                company=position.get("companyName"),
+                location=position.get("locationName"),
+                start_date=start_date,
+                end_date=end_date,
+            )
+        )
+    return exps
+
+
+def parse_schools(education_view: dict) -> list[School]:
+    schools = []
+    for education in education_view.get("elements", []):
+        period = education.get("timePeriod", {})
+        degree = ", ".join(
+            filter(None, [education.get("degreeName"), education.get("fieldOfStudy")])
+        )
+        schools.append(
+            School(
+                start_date=time_period_date(period.get("startDate")),
+                end_date=time_period_date(period.get("endDate")),
+                school=education.get("schoolName"),
+                degree=degree or None,
+            )
+        )
+    return schools
+
+
+def parse_certifications(certification_view: dict) -> list[Certification]:
+    certs = []
+    for cert in certification_view.get("elements", []):
+        issued = cert.get("timePeriod", {}).get("startDate")
+        date_issued = None
+        if issued and issued.get("year"):
+            month = calendar.month_abbr[issued["month"]] if issued.get("month") else ""
+            date_issued = f"{month} {issued['year']}".strip()
+        certs.append(
+            Certification(
+                title=cert.get("name"),
+                issuer=cert.get("authority"),
+                date_issued=date_issued,
+                cert_id=cert.get("licenseNumber"),
+                cert_link=cert.get("url"),
+            )
+        )
+    return certs
+
+
+def parse_profile_view(staff: Staff, data: dict) -> set[str]:
+    """Fills the staff from a profileView document, returns the sections it covered so their requests can be skipped"""
+    covered = set()
+    profile = data.get("profile") or {}
+    staff.first_name = profile.get("firstName") or staff.first_name
+    staff.last_name = profile.get("lastName") or staff.last_name
+    if staff.first_name and not staff.name:
+        staff.name = " ".join(filter(None, [staff.first_name, staff.last_name]))
+    staff.headline = profile.get("headline") or staff.headline
+    staff.location = (
+        profile.get("geoLocationName") or profile.get("locationName") or staff.location
+    )
+    if profile:
+        staff.bio = profile.get("summary")
+        covered.add("bio")
+
+    sections = {
+        "experiences": ("positionView", parse_experiences),
+        "schools": ("educationView", parse_schools),
+        "certifications": ("certificationView", parse_certifications),
+    }
+    for name, (view, parse) in sections.items():
+        if isinstance(data.get(view), dict):
+            setattr(staff, name, parse(data[view]))
+            covered.add(name)
+
+    if isinstance(data.get("languageView"), dict):
+        staff.languages = [
+            language["name"]
+            for language in data["languageView"].get("elements", [])
+            if language.get("name")
+        ]
+        covered.add("languages")
+    return covered
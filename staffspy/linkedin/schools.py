@@ -1,8 +1,9 @@
-import json
 import logging
 
+from staffspy.utils import tracing
 from staffspy.utils.exceptions import TooManyRequests
 from staffspy.utils.models import School
+from staffspy.utils.retry import RetryPolicy
 from staffspy.utils.utils import parse_dates
 
 logger = logging.getLogger(__name__)
@@ -10,23 +11,23 @@ logger = logging.getLogger(__name__)
 
 class SchoolsFetcher:
 
-    def __init__(self, session):
+    def __init__(self, session, retry: RetryPolicy = None):
         self.session = session
+        self.retry = retry or RetryPolicy()
         self.endpoint = "https://www.linkedin.com/voyager/api/graphql?queryId=voyagerIdentityDashProfileComponents.277ba7d7b9afffb04683953cede751fb&queryName=ProfileComponentsBySectionType&variables=(tabIndex:0,sectionType:education,profileUrn:urn%3Ali%3Afsd_profile%3A{employee_id},count:50)"
 
     def fetch_schools(self, staff):
         ep = self.endpoint.format(employee_id=staff.id)
-        res = self.session.get(ep)
+        with tracing.span("schools.request"):
+            res, res_json = self.retry.get_json(self.session, ep)
         logger.debug(f"schools, status code - {res.status_code}")
         if res.status_code == 429:
-            return TooManyRequests("429 Too Many Requests")
+            raise TooManyRequests("429 Too Many Requests")
 
         if not res.ok:
             logger.debug(res.text[:200])
             return False
-        try:
-            res_json = res.json()
-        except json.decoder.JSONDecodeError:
+        if res_json is None:
             logger.debug(res.text[:200])
             return False
 
@@ -38,7 +39,8 @@ class SchoolsFetcher:
             logger.debug(res_json)
             return False
 
-        staff.schools = self.parse_schools(elements)
+        with tracing.span("schools.parse"):
+            staff.schools = self.parse_schools(elements)
         return True
 
     def parse_schools(self, elements):
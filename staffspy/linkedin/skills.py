@@ -1,29 +1,30 @@
-import json
 import logging
 
+from staffspy.utils import tracing
 from staffspy.utils.exceptions import TooManyRequests
 from staffspy.utils.models import Skill, Staff
+from staffspy.utils.retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
 
 class SkillsFetcher:
-    def __init__(self, session):
+    def __init__(self, session, retry: RetryPolicy = None):
         self.session = session
+        self.retry = retry or RetryPolicy()
         self.endpoint = "https://www.linkedin.com/voyager/api/graphql?queryId=voyagerIdentityDashProfileComponents.277ba7d7b9afffb04683953cede751fb&queryName=ProfileComponentsBySectionType&variables=(tabIndex:0,sectionType:skills,profileUrn:urn%3Ali%3Afsd_profile%3A{employee_id},count:50)"
 
     def fetch_skills(self, staff: Staff):
         ep = self.endpoint.format(employee_id=staff.id)
-        res = self.session.get(ep)
+        with tracing.span("skills.request"):
+            res, res_json = self.retry.get_json(self.session, ep)
         logger.debug(f"skills, status code - {res.status_code}")
         if res.status_code == 429:
-            return TooManyRequests("429 Too Many Requests")
+            raise TooManyRequests("429 Too Many Requests")
         if not res.ok:
             logger.debug(res.text[:200])
             return False
-        try:
-            res_json = res.json()
-        except json.decoder.JSONDecodeError:
+        if res_json is None:
             logger.debug(res.text[:200])
             return False
 
@@ -34,7 +35,8 @@ class SkillsFetcher:
         ][0]["components"]["tabComponent"]
         if tab_comp:
             sections = tab_comp["sections"]
-            staff.skills = self.parse_skills(sections)
+            with tracing.span("skills.parse"):
+                staff.skills = self.parse_skills(sections)
         return True
 
     def parse_skills(self, sections):
@@ -1,13 +1,32 @@
-from abc import ABC,abstractmethod
+from abc import ABC, abstractmethod
 
 
 class Solver(ABC):
     public_key = "3117BF26-4762-4F5A-8ED9-A85E69209A46"
     page_url = "https://iframe.arkoselabs.com"
 
-    def __init__(self, solver_api_key:str):
-        self.solver_api_key=solver_api_key
+    def __init__(self, solver_api_key: str):
+        self.solver_api_key = solver_api_key
 
     @abstractmethod
-    def solve(self, blob_data: str, page_ur: str=None):
+    def solve(self, blob_data: str, page_ur: str = None):
         pass
+
+
+class LazySolver(Solver):
+    """Imports the solver backend the first time a captcha has to be solved"""
+
+    def __init__(self, solver_api_key: str, module: str, class_name: str):
+        super().__init__(solver_api_key)
+        self.module, self.class_name = module, class_name
+        self._solver = None
+
+    def solve(self, blob_data: str, page_url: str = None):
+        if self._solver is None:
+            import importlib
+
+            solver_class = getattr(
+                importlib.import_module(self.module), self.class_name
+            )
+            self._solver = solver_class(self.solver_api_key)
+        return self._solver.solve(blob_data, page_url)
@@ -0,0 +1,151 @@
+"""
+staffspy.utils.account_pool
+~~~~~~~~~~~~~~~~~~~
+
+Session-compatible wrapper that spreads requests over several logged in accounts.
+"""
+
+import threading
+import time
+from datetime import date
+
+import requests
+
+from staffspy.utils.exceptions import TooManyRequests
+from staffspy.utils.utils import logger
+
+
+class PooledAccount:
+    def __init__(
+        self, name: str, session: requests.Session, daily_budget: int | None = None
+    ):
+        self.name = name
+        self.session = session
+        self.daily_budget = daily_budget
+        self.requests_made = 0
+        self.throttled = 0
+        self.cooldown_until = 0.0
+        self.day = date.today()
+
+    @property
+    def remaining(self) -> float:
+        if date.today() != self.day:
+            self.day, self.requests_made = date.today(), 0
+        if self.daily_budget is None:
+            return float("inf")
+        return self.daily_budget - self.requests_made
+
+    def available(self, now: float) -> bool:
+        return self.cooldown_until <= now and self.remaining > 0
+
+    def to_dict(self):
+        return {
+            "account": self.name,
+            "requests_made": self.requests_made,
+            "remaining": self.remaining,
+            "throttled": self.throttled,
+            "cooling_down": self.cooldown_until > time.time(),
+        }
+
+
+class PooledSession:
+    """Drop-in for requests.Session that sends each request through the healthy account with the most budget left.
+    A 429 on a GET cools that account down and the same request is replayed on another account.
+    Actions (POST: block, connect) always go out from the action account and are never replayed.
+    """
+
+    # safe to send again from another account, LinkedIn did not act on a throttled read
+    REPLAY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+    def __init__(
+        self,
+        accounts: list[PooledAccount],
+        cooldown: int = 900,
+        action_account: str = None,
+    ):
+        if not accounts:
+            raise ValueError("PooledSession needs at least one account")
+        self.accounts = accounts
+        self.cooldown = cooldown
+        self.action_account = next(
+            (a for a in accounts if a.name == action_account), None
+        )
+        if action_account and not self.action_account:
+            raise ValueError(f"action_account '{action_account}' is not in the pool")
+        self.action_account = self.action_account or accounts[0]
+        self.headers = {}
+        self.hooks = {"response": []}
+        self._lock = threading.Lock()
+
+    def _pick(self, exclude: set[str]) -> PooledAccount | None:
+        now = time.time()
+        with self._lock:
+            healthy = [
+                a for a in self.accounts if a.name not in exclude and a.available(now)
+            ]
+            if not healthy:
+                return None
+            account = max(healthy, key=lambda a: (a.remaining, -a.requests_made))
+            account.requests_made += 1
+            return account
+
+    def _cool_down(self, account: PooledAccount):
+        with self._lock:
+            account.throttled += 1
+            account.cooldown_until = time.time() + self.cooldown
+        logger.warning(
+            f"Account '{account.name}' hit 429 Too Many Requests, cooling down for {self.cooldown}s"
+        )
+
+    @property
+    def exhausted(self) -> bool:
+        now = time.time()
+        return not any(a.available(now) for a in self.accounts)
+
+    def request(
+        self, method: str, url: str, throttle: bool = True, **kwargs
+    ) -> requests.Response:
+        """With throttle=False a 429 is returned as is and does not cool the account down"""
+        headers = {**self.headers, **(kwargs.pop("headers", None) or {})}
+        if method.upper() not in self.REPLAY_METHODS:
+            return self._send_action(method, url, throttle, headers=headers, **kwargs)
+        tried, res = set(), None
+        while account := self._pick(tried):
+            tried.add(account.name)
+            # every attempt went out, so the hooks (request budget, ...) see the replayed 429s too
+            res = self._dispatch(
+                account.session.request(method, url, headers=headers, **kwargs)
+            )
+            if res.status_code != 429 or not throttle:
+                return res
+            self._cool_down(account)
+        if res is None:
+            raise TooManyRequests(
+                "All pooled accounts are cooling down or out of their daily budget"
+            )
+        return res
+
+    def _send_action(self, method: str, url: str, throttle: bool, **kwargs):
+        """Sent once from the action account, whatever it answers goes back to the caller"""
+        account = self.action_account
+        with self._lock:
+            account.requests_made += 1
+        res = self._dispatch(account.session.request(method, url, **kwargs))
+        if res.status_code == 429 and throttle:
+            self._cool_down(account)
+        return res
+
+    def _dispatch(self, res: requests.Response) -> requests.Response:
+        """Runs the response hooks like requests.Session does"""
+        for hook in self.hooks["response"]:
+            res = hook(res) or res
+        return res
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> list[dict]:
+        return [account.to_dict() for account in self.accounts]
@@ -0,0 +1,74 @@
+"""
+staffspy.utils.budget
+~~~~~~~~~~~~~~~~~~~
+
+Request budget enforced on the session and priorities that decide which profiles get enriched first.
+"""
+
+import threading
+from typing import Callable
+
+from staffspy.utils.account_pool import PooledSession
+from staffspy.utils.exceptions import RequestBudgetSpent
+from staffspy.utils.models import Staff
+
+
+class RequestBudget:
+    """Counts every request the session sends while attached, retries and replays included.
+    Requests past the limit are refused with RequestBudgetSpent instead of being sent
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+        self._senders = []
+
+    @property
+    def remaining(self) -> int:
+        return max(self.limit - self.used, 0)
+
+    def spend(self):
+        with self._lock:
+            if self.used >= self.limit:
+                raise RequestBudgetSpent(f"Request budget of {self.limit} spent")
+            self.used += 1
+
+    def attach(self, session):
+        # gates the sessions that actually send, a pooled session replays a 429 on another account
+        senders = (
+            [account.session for account in session.accounts]
+            if isinstance(session, PooledSession)
+            else [session]
+        )
+        for sender in senders:
+            self._senders.append((sender, sender.__dict__.get("request")))
+            sender.request = self.gated(sender.request)
+        return self
+
+    def detach(self, session):
+        for sender, own_request in self._senders:
+            if own_request:
+                sender.request = own_request
+            else:
+                # the class' request shows through again
+                del sender.request
+        self._senders = []
+
+    def gated(self, request: Callable) -> Callable:
+        def send(*args, **kwargs):
+            self.spend()
+            return request(*args, **kwargs)
+
+        return send
+
+
+def keyword_priority(*keywords: str) -> Callable[[Staff], float]:
+    """Ranks search cards by how many keywords their headline contains, cards with a name first on ties"""
+    keywords = [k.lower() for k in keywords]
+
+    def priority(staff: Staff) -> float:
+        headline = (staff.headline or "").lower()
+        return sum(k in headline for k in keywords) + 0.5 * bool(staff.name)
+
+    return priority
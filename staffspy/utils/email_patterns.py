@@ -0,0 +1,235 @@
+"""
+staffspy.utils.email_patterns
+~~~~~~~~~~~~~~~~~~~
+
+Learns the local-part format each domain uses from confirmed addresses
+(emails in bios, connection emails, comment text) to rank potential_emails.
+"""
+
+import re
+from typing import TYPE_CHECKING
+
+from staffspy.utils.store import SQLiteStore
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# the first five are the default guesses of create_emails, in the same order
+EMAIL_PATTERNS = {
+    "first.last": "{first}.{last}",
+    "flast": "{f}{last}",
+    "filast": "{fi}{last}",
+    "firstl": "{first}{l}",
+    "firstla": "{first}{la}",
+    "firstlast": "{first}{last}",
+    "first_last": "{first}_{last}",
+    "first": "{first}",
+    "f.last": "{f}.{last}",
+    "last.first": "{last}.{first}",
+    "lastf": "{last}{f}",
+    "last": "{last}",
+}
+
+_TOKENS = {
+    name: re.findall(r"\{(\w+)\}|([^{}]+)", template)
+    for name, template in EMAIL_PATTERNS.items()
+}
+
+
+def normalize_name(name: str) -> str:
+    return "".join(filter(str.isalpha, name or "")).lower()
+
+
+def name_parts(first: str, last: str) -> dict:
+    first, last = normalize_name(first), normalize_name(last)
+    return {
+        "first": first,
+        "last": last,
+        "f": first[:1],
+        "fi": first[:2],
+        "l": last[:1],
+        "la": last[:2],
+    }
+
+
+def _series_parts(first: "pd.Series", last: "pd.Series") -> dict:
+    first = first.fillna("").str.lower().str.replace(r"[\W\d_]", "", regex=True)
+    last = last.fillna("").str.lower().str.replace(r"[\W\d_]", "", regex=True)
+    return {
+        "first": first,
+        "last": last,
+        "f": first.str[:1],
+        "fi": first.str[:2],
+        "l": last.str[:1],
+        "la": last.str[:2],
+    }
+
+
+def build_local_part(pattern: str, parts: dict):
+    """Builds the local part, works the same on strings and on whole Series"""
+    local = None
+    for part, literal in _TOKENS[pattern]:
+        piece = parts[part] if part else literal
+        local = piece if local is None else local + piece
+    return local
+
+
+class EmailPatternLearner(SQLiteStore):
+    schema = """
+    CREATE TABLE IF NOT EXISTS email_patterns (
+        domain TEXT,
+        pattern TEXT,
+        weight REAL,
+        PRIMARY KEY (domain, pattern)
+    );
+    """
+
+    def record(self, counts: dict[tuple[str, str], float]):
+        self.executemany(
+            """
+            INSERT INTO email_patterns VALUES (?, ?, ?)
+            ON CONFLICT(domain, pattern) DO UPDATE SET weight = weight + excluded.weight
+            """,
+            [(domain, pattern, w) for (domain, pattern), w in counts.items()],
+        )
+
+    def learn(self, first: str, last: str, email: str) -> list[str]:
+        """Records which patterns produce this confirmed address, returns them"""
+        local, _, domain = email.lower().partition("@")
+        parts = name_parts(first, last)
+        if not domain or not parts["first"] or not parts["last"]:
+            return []
+        matches = [p for p in EMAIL_PATTERNS if build_local_part(p, parts) == local]
+        if matches:
+            self.record({(domain, p): 1 / len(matches) for p in matches})
+        return matches
+
+    def learn_from_df(
+        self,
+        df: "pd.DataFrame",
+        email_columns: tuple[str, ...] = ("emails_in_bio", "connection_email"),
+        first_col: str = "first_name",
+        last_col: str = "last_name",
+    ) -> int:
+        """Learns from every confirmed email column in a staff DataFrame, returns the number of matched addresses"""
+        import pandas as pd
+
+        frames = []
+        for column in email_columns:
+            if column not in df.columns:
+                continue
+            emails = df[column].dropna()
+            if emails.empty:
+                continue
+            emails = emails.apply(
+                lambda v: v if isinstance(v, list) else str(v).split(",")
+            )
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "first": df.loc[emails.index, first_col],
+                        "last": df.loc[emails.index, last_col],
+                        "email": emails,
+                    }
+                ).explode("email")
+            )
+        if not frames:
+            return 0
+        confirmed = pd.concat(frames, ignore_index=True).dropna(subset=["email"])
+        return self._learn_frame(confirmed)
+
+    def learn_from_comments(self, comments_df: "pd.DataFrame") -> int:
+        """Learns from emails commenters posted, splitting the commenter name into first and last"""
+        import pandas as pd
+
+        if comments_df.empty or "emails" not in comments_df.columns:
+            return 0
+        rows = comments_df[["name", "emails"]].dropna().explode("emails").dropna()
+        names = rows["name"].str.strip().str.split()
+        confirmed = pd.DataFrame(
+            {
+                "first": names.str[0],
+                "last": names.str[-1],
+                "email": rows["emails"],
+            }
+        )
+        return self._learn_frame(confirmed)
+
+    def _learn_frame(self, confirmed: "pd.DataFrame") -> int:
+        import pandas as pd
+
+        email = confirmed["email"].astype(str).str.strip().str.lower()
+        split = email.str.partition("@")
+        local, domain = split[0], split[2]
+        parts = _series_parts(confirmed["first"], confirmed["last"])
+        valid = (domain != "") & (parts["first"] != "") & (parts["last"] != "")
+
+        matches = pd.DataFrame(
+            {p: (build_local_part(p, parts) == local) & valid for p in EMAIL_PATTERNS}
+        )
+        n_matches = matches.sum(axis=1)
+        matched = n_matches > 0
+        if not matched.any():
+            return 0
+        weights = matches[matched].div(n_matches[matched], axis=0)
+        weights["domain"] = domain[matched]
+        totals = weights.groupby("domain").sum().stack()
+        self.record({key: w for key, w in totals.items() if w > 0})
+        return int(matched.sum())
+
+    def weights(self, domain: str) -> dict[str, float]:
+        rows = self.execute(
+            "SELECT pattern, weight FROM email_patterns WHERE domain = ?",
+            (domain.lower(),),
+        )
+        return {row["pattern"]: row["weight"] for row in rows}
+
+    def ranked_patterns(self, domain: str) -> list[str]:
+        """Learned patterns by weight, then the unseen ones in the default order"""
+        weights = self.weights(domain)
+        order = list(EMAIL_PATTERNS)
+        return sorted(order, key=lambda p: (-weights.get(p, 0), order.index(p)))
+
+    def rank(self, first: str, last: str, domain: str, top: int = 5) -> list[str]:
+        parts = name_parts(first, last)
+        emails = []
+        for pattern in self.ranked_patterns(domain)[:top]:
+            email = f"{build_local_part(pattern, parts)}@{domain}"
+            if email not in emails:
+                emails.append(email)
+        return emails
+
+    def apply_to_df(
+        self,
+        df: "pd.DataFrame",
+        top_only: bool = False,
+        top: int = 5,
+        column: str = "potential_emails",
+    ) -> "pd.DataFrame":
+        """Re-ranks potential_emails of every row by its domain's learned patterns.
+        The domain comes from the existing potential_emails, top_only keeps just the best guess
+        """
+        import pandas as pd
+
+        df = df.copy()
+        if df.empty or column not in df.columns:
+            return df
+        domains = df[column].str[0].str.partition("@")[2].str.lower()
+        parts = _series_parts(df["first_name"], df["last_name"])
+        has_name = (parts["first"] != "") & (parts["last"] != "")
+        for domain, index in (
+            domains[has_name & (domains != "")].groupby(domains).groups.items()
+        ):
+            patterns = self.ranked_patterns(domain)[: 1 if top_only else top]
+            row_parts = {k: v.loc[index] for k, v in parts.items()}
+            candidates = pd.concat(
+                [build_local_part(p, row_parts) + f"@{domain}" for p in patterns],
+                axis=1,
+            )
+            ranked = candidates.values.tolist()
+            df.loc[index, column] = pd.Series(
+                [r[0] if top_only else list(dict.fromkeys(r)) for r in ranked],
+                index=index,
+                dtype=object,
+            )
+        return df
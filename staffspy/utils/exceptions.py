@@ -12,3 +12,11 @@ class GeoUrnNotFound(Exception):
 
 class BlobException(Exception):
     """Could not find the blob needed to solve the captcha."""
+
+
+class ProxyPoolExhausted(Exception):
+    """Every proxy in the pool has been retired."""
+
+
+class RequestBudgetSpent(Exception):
+    """The request budget of the scrape is used up."""
@@ -149,6 +149,8 @@ class Staff(BaseModel):
     contact_info: ContactInfo | None = None
     schools: list[School] | None = None
     languages: list[str] | None = None
+    # sections whose request failed, None means everything that was fetched loaded
+    failed_sections: list[str] | None = None
 
     def get_top_skills(self):
         top_three_skills = []
@@ -264,6 +266,7 @@ class Staff(BaseModel):
             "connection_websites": contact_info.get("websites"),
             "connection_street_address": contact_info.get("address"),
             "connection_birthday": contact_info.get("birthday"),
+            "failed_sections": self.failed_sections,
         }
 
     def estimate_age_based_on_education(self):
@@ -289,3 +292,47 @@ class Staff(BaseModel):
                     years_in_education = (current_date - school.start_date).days // 365
                     return int(18 + years_in_education)
         return None
+
+
+# the Staff.to_dict columns each profile section fills, a repair copies only these
+SECTION_COLUMNS = {
+    "employee": (
+        "profile_id",
+        "name",
+        "first_name",
+        "last_name",
+        "location",
+        "headline",
+        "followers",
+        "connections",
+        "mutuals",
+        "is_connection",
+        "premium",
+        "creator",
+        "influencer",
+        "open_to_work",
+        "is_hiring",
+        "profile_photo",
+        "banner_photo",
+    ),
+    "skills": ("skills", "top_skill_1", "top_skill_2", "top_skill_3"),
+    "experiences": (
+        "experiences",
+        "current_position",
+        "current_company",
+        "past_company_1",
+        "past_company_2",
+    ),
+    "certifications": ("certifications",),
+    "schools": ("schools", "school_1", "school_2", "estimated_age"),
+    "bio": ("bio", "emails_in_bio"),
+    "languages": ("languages",),
+    "contact_info": (
+        "connection_created_at",
+        "connection_email",
+        "connection_phone_numbers",
+        "connection_websites",
+        "connection_street_address",
+        "connection_birthday",
+    ),
+}
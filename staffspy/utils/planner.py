@@ -0,0 +1,110 @@
+"""
+staffspy.utils.planner
+~~~~~~~~~~~~~~~~~~~
+
+Estimates what a scrape costs in requests, time and days before running it.
+"""
+
+import math
+from datetime import datetime, timedelta
+
+from pydantic import BaseModel
+
+# requests made by fetch_all_info_for_employee, one per section plus contact info
+# (is_connection is "no" rather than None for non-connections, so it is always asked for)
+PROFILE_REQUESTS = 8
+# profileView plus the top card, skills and contact info it does not cover, see scrape_users
+USER_REQUESTS = 4
+SEARCH_PAGE_SIZE = 50
+# a name that is not a numeric id can 404 on the direct lookup, then it is searched and looked up again
+COMPANY_SEARCH_REQUESTS = 3
+
+
+class ScrapePlan(BaseModel):
+    job: str
+    total_results: int = 0
+    profiles: int = 0
+    hidden_profiles: int = 0
+    requests: dict[str, int] = {}
+    requests_per_minute: float = 30
+    daily_budget: int | None = None
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    @property
+    def duration(self) -> timedelta:
+        """Wall clock time at requests_per_minute, ignoring the daily budget"""
+        return timedelta(minutes=self.total_requests / self.requests_per_minute)
+
+    @property
+    def days(self) -> int:
+        if not self.daily_budget:
+            return 1
+        return max(1, math.ceil(self.total_requests / self.daily_budget))
+
+    def windows(
+        self, start: datetime = None, hours: tuple[int, int] = (0, 24)
+    ) -> list[dict]:
+        """Splits the run into daily windows between hours (start, end) that each stay within the daily budget"""
+        start = start or datetime.now()
+        first_hour, last_hour = hours
+        per_window = timedelta(hours=last_hour - first_hour)
+        capacity = int(per_window.total_seconds() / 60 * self.requests_per_minute)
+        if self.daily_budget:
+            capacity = min(capacity, self.daily_budget)
+        if capacity <= 0:
+            raise ValueError("The window is too short to make any request")
+
+        windows = []
+        remaining = self.total_requests
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while remaining > 0:
+            window_start = max(start, day + timedelta(hours=first_hour))
+            window_end = day + timedelta(hours=last_hour)
+            fits = int(
+                (window_end - window_start).total_seconds()
+                / 60
+                * self.requests_per_minute
+            )
+            requests = min(remaining, capacity, fits)
+            if requests > 0:
+                windows.append(
+                    {
+                        "start": window_start,
+                        "end": window_start
+                        + timedelta(minutes=requests / self.requests_per_minute),
+                        "requests": requests,
+                    }
+                )
+                remaining -= requests
+            day += timedelta(days=1)
+        return windows
+
+    def to_dict(self):
+        return {
+            "job": self.job,
+            "total_results": self.total_results,
+            "profiles": self.profiles,
+            "hidden_profiles": self.hidden_profiles,
+            "requests": self.requests,
+            "total_requests": self.total_requests,
+            "duration": str(self.duration),
+            "days": self.days,
+        }
+
+
+def search_pages(results: int) -> int:
+    return math.ceil(results / SEARCH_PAGE_SIZE)
+
+
+def company_requests(company_name: str) -> int:
+    return 1 if str(company_name).isdigit() else COMPANY_SEARCH_REQUESTS
+
+
+def visible_share(sample: list) -> float:
+    """Share of the probed page that is not 'LinkedIn Member', those are never enriched"""
+    if not sample:
+        return 1.0
+    return sum(1 for s in sample if s.name != "LinkedIn Member") / len(sample)
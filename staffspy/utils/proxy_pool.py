@@ -0,0 +1,160 @@
+"""
+staffspy.utils.proxy_pool
+~~~~~~~~~~~~~~~~~~~
+
+Proxy pool with sticky account binding and per-proxy health scoring.
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from staffspy.utils.exceptions import ProxyPoolExhausted
+from staffspy.utils.utils import logger
+
+
+class ProxyStats:
+    def __init__(self, url: str):
+        self.url = url
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.consecutive_errors = 0
+        self.latency = None
+        self.retired = False
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    @property
+    def score(self) -> float:
+        """Lower is better, unknown latency counts as fast so new proxies get tried"""
+        return (self.latency or 0.0) * (1 + 4 * self.error_rate)
+
+    def to_dict(self):
+        return {
+            "proxy": self.url,
+            "requests": self.requests,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "error_rate": round(self.error_rate, 3),
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "retired": self.retired,
+        }
+
+
+class ProxyPool:
+    """Binds each account to one proxy and retires proxies that are slow or failing"""
+
+    def __init__(
+        self,
+        proxies: list[str],
+        max_latency: float = 10.0,
+        max_error_rate: float = 0.3,
+        max_consecutive_errors: int = 5,
+        min_requests: int = 10,
+        smoothing: float = 0.2,
+    ):
+        if not proxies:
+            raise ValueError("ProxyPool needs at least one proxy")
+        self.stats = {url: ProxyStats(url) for url in proxies}
+        self.bindings: dict[str, str] = {}
+        self.max_latency = max_latency
+        self.max_error_rate = max_error_rate
+        self.max_consecutive_errors = max_consecutive_errors
+        self.min_requests = min_requests
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+
+    def proxy_for(self, key: str) -> str:
+        """Sticky proxy for the account, rebinding it if its proxy was retired"""
+        with self._lock:
+            proxy = self.bindings.get(key)
+            if proxy and not self.stats[proxy].retired:
+                return proxy
+            healthy = [s for s in self.stats.values() if not s.retired]
+            if not healthy:
+                raise ProxyPoolExhausted("All proxies in the pool have been retired")
+            load = {url: 0 for url in self.stats}
+            for bound in self.bindings.values():
+                load[bound] += 1
+            best = min(healthy, key=lambda s: (load[s.url], s.score))
+            self.bindings[key] = best.url
+        if proxy:
+            logger.warning(f"Moved '{key}' off retired proxy {proxy} to {best.url}")
+        return best.url
+
+    def record(
+        self,
+        proxy: str,
+        latency: float,
+        error: bool = False,
+        throttled: bool = False,
+    ):
+        with self._lock:
+            stats = self.stats[proxy]
+            stats.requests += 1
+            stats.throttled += throttled
+            if error:
+                stats.errors += 1
+                stats.consecutive_errors += 1
+            else:
+                stats.consecutive_errors = 0
+                stats.latency = (
+                    latency
+                    if stats.latency is None
+                    else (1 - self.smoothing) * stats.latency + self.smoothing * latency
+                )
+            reason = self._retire_reason(stats)
+            if reason and not stats.retired:
+                stats.retired = True
+                logger.warning(f"Retiring proxy {proxy}: {reason}")
+
+    def _retire_reason(self, stats: ProxyStats) -> str | None:
+        if stats.consecutive_errors >= self.max_consecutive_errors:
+            return f"{stats.consecutive_errors} errors in a row"
+        if stats.requests < self.min_requests:
+            return None
+        if stats.error_rate > self.max_error_rate:
+            return f"error rate {stats.error_rate:.0%}"
+        if stats.latency is not None and stats.latency > self.max_latency:
+            return f"latency {stats.latency:.1f}s"
+        return None
+
+    def metrics(self) -> list[dict]:
+        with self._lock:
+            return [stats.to_dict() for stats in self.stats.values()]
+
+    def bind(self, session: requests.Session, key: str) -> requests.Session:
+        """Routes every request of the session through the proxy bound to key"""
+        adapter = ProxyHealthAdapter(self, key)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+
+class ProxyHealthAdapter(HTTPAdapter):
+    def __init__(self, pool: ProxyPool, key: str, **kwargs):
+        super().__init__(**kwargs)
+        self.pool = pool
+        self.key = key
+
+    def send(self, request, **kwargs):
+        proxy = self.pool.proxy_for(self.key)
+        kwargs["proxies"] = {"http": proxy, "https": proxy}
+        start = time.perf_counter()
+        try:
+            res = super().send(request, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            self.pool.record(proxy, time.perf_counter() - start, error=True)
+            raise
+        self.pool.record(
+            proxy,
+            time.perf_counter() - start,
+            error=res.status_code >= 500 or res.status_code == 407,
+            throttled=res.status_code == 429,
+        )
+        return res
@@ -0,0 +1,196 @@
+"""
+staffspy.utils.retry
+~~~~~~~~~~~~~~~~~~~
+
+One retry policy for every LinkedIn request: exponential backoff with jitter and a retry budget per run,
+and the circuit breaker that stops every request of the run after a 429.
+"""
+
+import copy
+import json
+import random
+import threading
+import time
+
+import requests
+
+from staffspy.utils import tracing
+from staffspy.utils.account_pool import PooledSession
+from staffspy.utils.exceptions import TooManyRequests
+from staffspy.utils.utils import logger
+
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+# the request may have reached LinkedIn, only safe to repeat for idempotent requests
+TRANSIENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+class CircuitBreaker:
+    """Shared by every request of a run, the first 429 opens it. By default it fails fast: from then on every
+    request raises TooManyRequests without being sent. With a cooldown the requests pause that long instead and
+    carry on, until LinkedIn has answered 429 after max_pauses pauses
+    """
+
+    def __init__(self, cooldown: float = 0, max_pauses: int = 1):
+        self.cooldown = cooldown
+        self.max_pauses = max_pauses
+        self.pauses = 0
+        self.resume_at = 0.0
+        self.is_open = False
+        self._lock = threading.Lock()
+
+    def new_run(self) -> "CircuitBreaker":
+        return CircuitBreaker(self.cooldown, self.max_pauses)
+
+    def wait(self):
+        """Before each request: raises once open, sleeps while a pause is running"""
+        while True:
+            with self._lock:
+                if self.is_open:
+                    raise TooManyRequests(
+                        "429 Too Many Requests, stopped the remaining requests of this run"
+                    )
+                delay = self.resume_at - time.time()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def trip(self) -> bool:
+        """Records a 429, True if the request should be sent again once the pause is over"""
+        with self._lock:
+            if self.is_open:
+                return False
+            if time.time() < self.resume_at:
+                # sent before the pause began, it is already counted
+                return True
+            if self.cooldown and self.pauses < self.max_pauses:
+                self.pauses += 1
+                self.resume_at = time.time() + self.cooldown
+                logger.warning(
+                    f"429 Too Many Requests, pausing all requests for {self.cooldown}s"
+                )
+                return True
+            self.is_open = True
+        logger.error("429 Too Many Requests, cancelling the remaining requests")
+        tracing.set_attribute("circuit_open", True)
+        return False
+
+
+class RetryPolicy:
+    """Retries 5xx, dropped connections and truncated json bodies. A 429 is left to the circuit breaker, that is
+    the account being throttled. Requests that are not idempotent (POST) are only retried when the connection was
+    never made, so a block or connection request is never sent twice
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        budget: int = 100,
+        jitter: bool = True,
+        breaker: CircuitBreaker = None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.jitter = jitter
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = 0
+        self._exhausted = False
+        self._lock = threading.Lock()
+
+    def new_run(self) -> "RetryPolicy":
+        """Same settings with the full retry budget and a closed breaker, every scrape gets its own"""
+        policy = copy.copy(self)
+        policy.breaker = self.breaker.new_run()
+        policy.retries = 0
+        policy._exhausted = False
+        policy._lock = threading.Lock()
+        return policy
+
+    def request(
+        self,
+        session,
+        method: str,
+        url: str,
+        idempotent: bool = None,
+        throttle: bool = True,
+        **kwargs,
+    ) -> requests.Response:
+        """With throttle=False a 429 is returned without tripping the breaker, e.g. the invitation quota of connect"""
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+        return self._send(session, method, url, idempotent, False, throttle, **kwargs)[
+            0
+        ]
+
+    def get_json(self, session, url: str, **kwargs) -> tuple[requests.Response, dict]:
+        """GET that is also retried when a 2xx body is not valid json. The json is None if the body is not json"""
+        return self._send(session, "GET", url, True, True, True, **kwargs)
+
+    def _send(self, session, method, url, idempotent, parse_json, throttle, **kwargs):
+        if not throttle and isinstance(session, PooledSession):
+            # the pool must not cool the account down for it either
+            kwargs["throttle"] = False
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.wait()
+            try:
+                res = session.request(method, url, **kwargs)
+            except TRANSIENT_ERRORS as e:
+                never_sent = isinstance(e, requests.exceptions.ConnectTimeout)
+                if (idempotent or never_sent) and self._may_retry(attempt, str(e)):
+                    self._sleep(attempt)
+                    continue
+                raise
+
+            if res.status_code == 429 and throttle:
+                if self.breaker.trip():
+                    attempt -= 1
+                    continue
+                return res, None
+
+            reason, body = None, None
+            if idempotent and res.status_code in RETRY_STATUSES:
+                reason = f"{res.status_code} {res.reason}"
+            elif parse_json:
+                try:
+                    body = res.json()
+                except json.decoder.JSONDecodeError:
+                    # error pages are not json either, only a 2xx is worth asking for again
+                    reason = "truncated json" if res.ok else None
+            if reason and self._may_retry(attempt, reason):
+                self._sleep(attempt, res.headers.get("Retry-After"))
+                continue
+            return res, body
+
+    def _may_retry(self, attempt: int, reason: str) -> bool:
+        if attempt >= self.max_attempts:
+            return False
+        with self._lock:
+            if self.retries >= self.budget:
+                if not self._exhausted:
+                    self._exhausted = True
+                    logger.warning(
+                        f"Retry budget of {self.budget} used up, failing requests without retrying"
+                    )
+                return False
+            self.retries += 1
+        logger.debug(f"Retrying request, attempt {attempt + 1}: {reason}")
+        tracing.set_attribute("retries", attempt)
+        return True
+
+    def _sleep(self, attempt: int, retry_after: str = None):
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.max_delay))
+        time.sleep(delay)
@@ -0,0 +1,137 @@
+"""
+staffspy.utils.session_store
+~~~~~~~~~~~~~~~~~~~
+
+Session store shared by every worker using the same accounts. Only one worker logs in
+again when a session expires, the others wait for it and load the new cookies.
+"""
+
+import json
+import time
+
+import requests
+
+from staffspy.utils.store import SQLiteStore
+
+
+class SessionStore(SQLiteStore):
+    schema = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        key TEXT PRIMARY KEY,
+        cookies TEXT,
+        headers TEXT,
+        csrf_token TEXT,
+        created_at REAL,
+        last_validated_at REAL,
+        refreshing_until REAL
+    );
+    """
+
+    def load(self, key: str) -> dict | None:
+        rows = self.execute(
+            "SELECT * FROM sessions WHERE key = ? AND cookies IS NOT NULL", (key,)
+        )
+        if not rows:
+            return None
+        record = dict(rows[0])
+        record["cookies"] = json.loads(record["cookies"])
+        record["headers"] = json.loads(record["headers"])
+        return record
+
+    def save(self, key: str, session: requests.Session):
+        """Stores a freshly logged in session and releases the refresh lease"""
+        cookies = [
+            {
+                "name": c.name,
+                "value": c.value,
+                "domain": c.domain,
+                "path": c.path,
+                "expires": c.expires,
+                "secure": c.secure,
+            }
+            for c in session.cookies
+        ]
+        now = time.time()
+        self.execute(
+            """
+            INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?, NULL)
+            ON CONFLICT(key) DO UPDATE SET
+                cookies = excluded.cookies,
+                headers = excluded.headers,
+                csrf_token = excluded.csrf_token,
+                created_at = excluded.created_at,
+                last_validated_at = excluded.last_validated_at,
+                refreshing_until = NULL
+            """,
+            (
+                key,
+                json.dumps(cookies),
+                json.dumps(dict(session.headers)),
+                session.headers.get("Csrf-Token"),
+                now,
+                now,
+            ),
+        )
+
+    def mark_validated(self, key: str):
+        self.execute(
+            "UPDATE sessions SET last_validated_at = ? WHERE key = ?",
+            (time.time(), key),
+        )
+
+    def acquire_refresh(self, key: str, since: float = 0, lease: int = 600) -> bool:
+        """True if this worker should log in again, False if another worker is or already did since `since`"""
+        now = time.time()
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT created_at, refreshing_until FROM sessions WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row and (row["created_at"] or 0) > since:
+                return False
+            if row and (row["refreshing_until"] or 0) > now:
+                return False
+            conn.execute(
+                """
+                INSERT INTO sessions (key, refreshing_until) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET refreshing_until = excluded.refreshing_until
+                """,
+                (key, now + lease),
+            )
+        return True
+
+    def release_refresh(self, key: str):
+        self.execute(
+            "UPDATE sessions SET refreshing_until = NULL WHERE key = ?", (key,)
+        )
+
+    def wait_for_refresh(
+        self, key: str, since: float, timeout: int = 600, poll: float = 1.0
+    ) -> dict | None:
+        """Waits for a session created after `since`, None if the refreshing worker gave up"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            record = self.load(key)
+            if record and (record["created_at"] or 0) > since:
+                return record
+            rows = self.execute(
+                "SELECT refreshing_until FROM sessions WHERE key = ?", (key,)
+            )
+            if not rows or (rows[0]["refreshing_until"] or 0) < time.time():
+                return None
+            time.sleep(poll)
+        return None
+
+    @staticmethod
+    def apply(record: dict, session: requests.Session) -> requests.Session:
+        for cookie in record["cookies"]:
+            session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie["domain"],
+                path=cookie["path"],
+                expires=cookie["expires"],
+                secure=cookie["secure"],
+            )
+        session.headers.update(record["headers"])
+        return session
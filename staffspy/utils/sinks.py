@@ -0,0 +1,236 @@
+"""
+staffspy.utils.sinks
+~~~~~~~~~~~~~~~~~~~
+
+Writers that stream scrape results to disk in chunks, so big runs never hold every profile in memory.
+"""
+
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Iterable, Iterator, TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from staffspy.utils.utils import logger, to_dataframe
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class SinkSummary(BaseModel):
+    """What a scrape method returns instead of the DataFrame when it wrote to a sink"""
+
+    path: str
+    format: str
+    rows: int = 0
+    chunks: int = 0
+
+    def read(self, chunksize: int = None) -> "pd.DataFrame | Iterator[pd.DataFrame]":
+        """Loads the file, or with chunksize iterates over it in DataFrames of that many rows"""
+        import pandas as pd
+
+        if not self.rows:
+            return iter([]) if chunksize else pd.DataFrame()
+        if self.format == "csv":
+            return pd.read_csv(self.path, chunksize=chunksize)
+        if self.format == "jsonl":
+            return pd.read_json(self.path, lines=True, chunksize=chunksize)
+        if not chunksize:
+            return pd.read_parquet(self.path)
+        _, pq = import_pyarrow()
+        return (
+            batch.to_pandas()
+            for batch in pq.ParquetFile(self.path).iter_batches(batch_size=chunksize)
+        )
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "format": self.format,
+            "rows": self.rows,
+            "chunks": self.chunks,
+        }
+
+
+class Sink(ABC):
+    """Buffers records and writes them every chunk_size rows, the file is replaced on the first write"""
+
+    format = ""
+
+    def __init__(self, path: str, chunk_size: int = 500):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self.chunks = 0
+        self._buffer: list[dict] = []
+        self._lock = threading.Lock()
+        self._summary: SinkSummary | None = None
+
+    def write(self, record: dict):
+        with self._lock:
+            self._buffer.append(record)
+            self.rows += 1
+            if len(self._buffer) >= self.chunk_size:
+                self._flush()
+
+    def write_many(self, records: Iterable[dict]):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self) -> SinkSummary:
+        """Writes what is left and releases the file, closing again returns the same summary"""
+        if self._summary:
+            return self._summary
+        with self._lock:
+            self._flush()
+            if not self.chunks:
+                # nothing scraped, still replace what an earlier run left at the path
+                open(self.path, "w").close()
+            self._close()
+        logger.info(f"Wrote {self.rows} rows to {self.path}")
+        self._summary = SinkSummary(
+            path=self.path, format=self.format, rows=self.rows, chunks=self.chunks
+        )
+        return self._summary
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        self._write_chunk(self._buffer, first=not self.chunks)
+        self.chunks += 1
+        self._buffer = []
+
+    @abstractmethod
+    def _write_chunk(self, records: list[dict], first: bool):
+        """Writes one chunk, first replaces whatever the path held"""
+
+    def _close(self):
+        pass
+
+
+class JSONLSink(Sink):
+    format = "jsonl"
+
+    def _write_chunk(self, records: list[dict], first: bool):
+        with open(self.path, "w" if first else "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=json_default) + "\n")
+
+
+class CSVSink(Sink):
+    """Same cells as DataFrame.to_csv, the columns are fixed by the first chunk"""
+
+    format = "csv"
+
+    def __init__(self, path: str, chunk_size: int = 500):
+        super().__init__(path, chunk_size)
+        self.columns = None
+
+    def _write_chunk(self, records: list[dict], first: bool):
+        df = to_dataframe(records)
+        if first:
+            self.columns = list(df.columns)
+        elif extra := [c for c in df.columns if c not in self.columns]:
+            logger.warning(f"Columns {extra} are not in the csv header, dropping them")
+        df.reindex(columns=self.columns).to_csv(
+            self.path, mode="w" if first else "a", header=first, index=False
+        )
+
+
+class ParquetSink(Sink):
+    """Needs pyarrow. Nested values (experiences, skills, ...) are stored as JSON strings and
+    the schema is fixed by the first chunk, columns that were empty in it are stored as strings
+    """
+
+    format = "parquet"
+
+    def __init__(self, path: str, chunk_size: int = 500):
+        self.pa, self.pq = import_pyarrow()
+        super().__init__(path, chunk_size)
+        self.schema = None
+        self._writer = None
+
+    def _write_chunk(self, records: list[dict], first: bool):
+        if first:
+            table = self.pa.Table.from_pylist([self.flat(r) for r in records])
+            self.schema = self.pa.schema(
+                [
+                    (
+                        field.with_type(self.pa.string())
+                        if self.pa.types.is_null(field.type)
+                        else field
+                    )
+                    for field in table.schema
+                ]
+            )
+            self._writer = self.pq.ParquetWriter(self.path, self.schema)
+        strings = {f.name for f in self.schema if self.pa.types.is_string(f.type)}
+        rows = []
+        for record in records:
+            row = self.flat(record)
+            rows.append(
+                {
+                    k: str(v) if k in strings and v is not None else v
+                    for k, v in row.items()
+                }
+            )
+        self._writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+
+    def _close(self):
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    @staticmethod
+    def flat(record: dict) -> dict:
+        return {
+            k: (
+                json.dumps(v, default=json_default)
+                if isinstance(v, (list, dict))
+                else v
+            )
+            for k, v in record.items()
+        }
+
+
+def import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception(
+            'install package `pip install "staffspy[parquet]"` to write parquet files'
+        )
+    return pa, pq
+
+
+sink_types = {
+    ".csv": CSVSink,
+    ".jsonl": JSONLSink,
+    ".parquet": ParquetSink,
+}
+
+
+def open_sink(sink: "str | Sink", chunk_size: int = 500) -> Sink:
+    """Sink for a path, picked by its extension (.csv, .jsonl or .parquet)"""
+    if isinstance(sink, Sink):
+        return sink
+    extension = os.path.splitext(sink)[1].lower()
+    if extension not in sink_types:
+        raise ValueError(
+            f"sink must end in one of {', '.join(sink_types)} or be a Sink, got '{sink}'"
+        )
+    return sink_types[extension](sink, chunk_size)
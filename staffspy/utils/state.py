@@ -0,0 +1,386 @@
+"""
+staffspy.utils.state
+~~~~~~~~~~~~~~~~~~~
+
+Scrape state kept between runs so repeated runs only fetch what changed.
+"""
+
+import json
+import time
+from datetime import datetime, timezone
+
+from staffspy.utils.store import SQLiteStore
+
+
+def to_timestamp(value: datetime) -> float:
+    """Naive datetimes are taken as UTC, like the created_at of comments"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def from_timestamp(value: float) -> datetime:
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+
+
+class StateStore(SQLiteStore):
+    schema = """
+    CREATE TABLE IF NOT EXISTS comment_watermarks (
+        post_id TEXT PRIMARY KEY,
+        created_at REAL,
+        updated_at REAL
+    );
+    CREATE TABLE IF NOT EXISTS connections (
+        account TEXT,
+        urn TEXT,
+        id TEXT,
+        name TEXT,
+        profile_link TEXT,
+        first_seen REAL,
+        removed_at REAL,
+        PRIMARY KEY (account, urn)
+    );
+    CREATE TABLE IF NOT EXISTS connection_reconciles (
+        account TEXT PRIMARY KEY,
+        reconciled_at REAL
+    );
+    CREATE TABLE IF NOT EXISTS identities (
+        fsd_id TEXT PRIMARY KEY,
+        profile_id TEXT COLLATE NOCASE,
+        urn TEXT,
+        updated_at REAL
+    );
+    CREATE INDEX IF NOT EXISTS identities_profile_id ON identities (profile_id);
+    CREATE INDEX IF NOT EXISTS identities_urn ON identities (urn);
+    CREATE TABLE IF NOT EXISTS actions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        account TEXT,
+        action TEXT,
+        fsd_id TEXT,
+        urn TEXT,
+        profile_link TEXT,
+        name TEXT,
+        status TEXT DEFAULT 'pending',
+        attempts INTEGER DEFAULT 0,
+        last_status INTEGER,
+        not_before REAL DEFAULT 0,
+        created_at REAL,
+        done_at REAL,
+        UNIQUE (account, action, fsd_id)
+    );
+    CREATE TABLE IF NOT EXISTS snapshots (
+        urn TEXT PRIMARY KEY,
+        id TEXT,
+        name TEXT,
+        top_card_hash TEXT,
+        experiences_hash TEXT,
+        schools_hash TEXT,
+        skills_hash TEXT,
+        data TEXT,
+        deep_at REAL,
+        updated_at REAL
+    );
+    CREATE TABLE IF NOT EXISTS scope_members (
+        scope TEXT,
+        urn TEXT,
+        name TEXT,
+        last_seen REAL,
+        PRIMARY KEY (scope, urn)
+    );
+    CREATE TABLE IF NOT EXISTS changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        detected_at REAL,
+        scope TEXT,
+        urn TEXT,
+        name TEXT,
+        change TEXT,
+        old TEXT,
+        new TEXT
+    );
+    """
+
+    def comment_watermark(self, post_id: str) -> datetime | None:
+        """created_at of the newest comment seen on the post in earlier runs"""
+        rows = self.execute(
+            "SELECT created_at FROM comment_watermarks WHERE post_id = ?", (post_id,)
+        )
+        return from_timestamp(rows[0]["created_at"]) if rows else None
+
+    def set_comment_watermark(self, post_id: str, created_at: datetime):
+        """Moves the watermark forward, never back"""
+        self.execute(
+            """
+            INSERT INTO comment_watermarks VALUES (?, ?, ?)
+            ON CONFLICT(post_id) DO UPDATE SET
+                created_at = max(created_at, excluded.created_at),
+                updated_at = excluded.updated_at
+            """,
+            (post_id, to_timestamp(created_at), time.time()),
+        )
+
+    def known_connections(self, account: str) -> set[str]:
+        rows = self.execute(
+            "SELECT urn FROM connections WHERE account = ? AND removed_at IS NULL",
+            (account,),
+        )
+        return {row["urn"] for row in rows}
+
+    def add_connections(self, account: str, staff: list):
+        now = time.time()
+        self.executemany(
+            """
+            INSERT INTO connections VALUES (?, ?, ?, ?, ?, ?, NULL)
+            ON CONFLICT(account, urn) DO UPDATE SET
+                id = excluded.id,
+                name = excluded.name,
+                profile_link = excluded.profile_link,
+                removed_at = NULL
+            """,
+            [(account, s.urn, s.id, s.name, s.profile_link, now) for s in staff],
+        )
+
+    def remove_connections(self, account: str, urns: set[str]) -> list[dict]:
+        """Marks the connections as removed and returns what was stored about them"""
+        now = time.time()
+        removed = []
+        with self.transaction() as conn:
+            for urn in urns:
+                row = conn.execute(
+                    "SELECT urn, id, name, profile_link FROM connections WHERE account = ? AND urn = ?",
+                    (account, urn),
+                ).fetchone()
+                if row:
+                    removed.append(dict(row))
+                conn.execute(
+                    "UPDATE connections SET removed_at = ? WHERE account = ? AND urn = ?",
+                    (now, account, urn),
+                )
+        return removed
+
+    def last_reconcile(self, account: str) -> float | None:
+        rows = self.execute(
+            "SELECT reconciled_at FROM connection_reconciles WHERE account = ?",
+            (account,),
+        )
+        return rows[0]["reconciled_at"] if rows else None
+
+    def set_reconciled(self, account: str):
+        self.execute(
+            """
+            INSERT INTO connection_reconciles VALUES (?, ?)
+            ON CONFLICT(account) DO UPDATE SET reconciled_at = excluded.reconciled_at
+            """,
+            (account, time.time()),
+        )
+
+    def record_identities(self, identities: list[tuple[str, str | None, str | None]]):
+        """Stores (fsd_profile id, public id, member urn) seen together, keeping parts already known"""
+        now = time.time()
+        self.executemany(
+            """
+            INSERT INTO identities VALUES (?, ?, ?, ?)
+            ON CONFLICT(fsd_id) DO UPDATE SET
+                profile_id = coalesce(excluded.profile_id, profile_id),
+                urn = coalesce(excluded.urn, urn),
+                updated_at = excluded.updated_at
+            """,
+            [
+                (fsd_id, profile_id, urn, now)
+                for fsd_id, profile_id, urn in identities
+                if fsd_id
+            ],
+        )
+
+    def identity(
+        self, profile_id: str = None, fsd_id: str = None, urn: str = None
+    ) -> dict | None:
+        """Looks a person up by any of their ids, None if none is given or they were never seen"""
+        column, value = next(
+            (
+                (c, v)
+                for c, v in (
+                    ("profile_id", profile_id),
+                    ("fsd_id", fsd_id),
+                    ("urn", urn),
+                )
+                if v
+            ),
+            (None, None),
+        )
+        if not column:
+            return None
+        rows = self.execute(
+            f"SELECT fsd_id, profile_id, urn FROM identities WHERE {column} = ?",
+            (value,),
+        )
+        return dict(rows[0]) if rows else None
+
+    def enqueue_actions(self, account: str, action: str, staff: list) -> int:
+        """Queues block or connect actions, people already queued for the action are skipped. Returns how many were added"""
+        now = time.time()
+        with self.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO actions
+                    (account, action, fsd_id, urn, profile_link, name, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (account, action, s.id, s.urn, s.profile_link, s.name, now)
+                    for s in staff
+                ],
+            )
+            return conn.total_changes - before
+
+    def due_actions(self, account: str) -> list[dict]:
+        rows = self.execute(
+            """
+            SELECT * FROM actions
+            WHERE account = ? AND status = 'pending' AND not_before <= ?
+            ORDER BY id
+            """,
+            (account, time.time()),
+        )
+        return [dict(row) for row in rows]
+
+    def actions_done_today(self, account: str, action: str) -> int:
+        """Actions done since midnight UTC, what the daily quotas count"""
+        midnight = datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        rows = self.execute(
+            """
+            SELECT count(*) AS n FROM actions
+            WHERE account = ? AND action = ? AND status = 'done' AND done_at >= ?
+            """,
+            (account, action, midnight.timestamp()),
+        )
+        return rows[0]["n"]
+
+    def finish_action(self, action_id: int, status: str, last_status: int = None):
+        self.execute(
+            """
+            UPDATE actions SET status = ?, last_status = ?, attempts = attempts + 1, done_at = ?
+            WHERE id = ?
+            """,
+            (status, last_status, time.time(), action_id),
+        )
+
+    def defer_action(self, action_id: int, not_before: float, last_status: int):
+        self.execute(
+            """
+            UPDATE actions SET not_before = ?, last_status = ?, attempts = attempts + 1
+            WHERE id = ?
+            """,
+            (not_before, last_status, action_id),
+        )
+
+    def actions(self, account: str, status: str = None) -> list[dict]:
+        rows = self.execute(
+            "SELECT * FROM actions WHERE account = ? AND (? IS NULL OR status = ?) ORDER BY id",
+            (account, status, status),
+        )
+        return [dict(row) for row in rows]
+
+    def snapshot(self, urn: str) -> dict | None:
+        rows = self.execute("SELECT * FROM snapshots WHERE urn = ?", (urn,))
+        if not rows:
+            return None
+        snapshot = dict(rows[0])
+        snapshot["data"] = json.loads(snapshot["data"])
+        return snapshot
+
+    def save_snapshot(self, snapshot: dict):
+        """Sections that were not fetched this time (hash None) keep their stored hash and data"""
+        self.execute(
+            """
+            INSERT INTO snapshots VALUES (
+                :urn, :id, :name, :top_card_hash, :experiences_hash, :schools_hash, :skills_hash, :data, :deep_at, :updated_at
+            )
+            ON CONFLICT(urn) DO UPDATE SET
+                id = excluded.id,
+                name = excluded.name,
+                top_card_hash = coalesce(excluded.top_card_hash, top_card_hash),
+                experiences_hash = coalesce(excluded.experiences_hash, experiences_hash),
+                schools_hash = coalesce(excluded.schools_hash, schools_hash),
+                skills_hash = coalesce(excluded.skills_hash, skills_hash),
+                data = excluded.data,
+                deep_at = coalesce(excluded.deep_at, deep_at),
+                updated_at = excluded.updated_at
+            """,
+            {
+                **snapshot,
+                "data": json.dumps(snapshot["data"], default=str),
+                "updated_at": time.time(),
+            },
+        )
+
+    def update_scope(
+        self, scope: str, members: dict[str, str], complete: bool
+    ) -> tuple[list[dict], list[dict]]:
+        """Stores who a search returned (urn: name). Returns who joined the scope since the last run and,
+        when the search walked every result, who left it. The first run of a scope only records the members
+        """
+        now = time.time()
+        with self.transaction() as conn:
+            known = {
+                row["urn"]: row["name"]
+                for row in conn.execute(
+                    "SELECT urn, name FROM scope_members WHERE scope = ?", (scope,)
+                ).fetchall()
+            }
+            conn.executemany(
+                """
+                INSERT INTO scope_members VALUES (?, ?, ?, ?)
+                ON CONFLICT(scope, urn) DO UPDATE SET name = excluded.name, last_seen = excluded.last_seen
+                """,
+                [(scope, urn, name, now) for urn, name in members.items()],
+            )
+            if not known:
+                return [], []
+            joined = [
+                {"urn": urn, "name": name}
+                for urn, name in members.items()
+                if urn not in known
+            ]
+            left = []
+            if complete:
+                left = [
+                    {"urn": urn, "name": name}
+                    for urn, name in known.items()
+                    if urn not in members
+                ]
+                conn.executemany(
+                    "DELETE FROM scope_members WHERE scope = ? AND urn = ?",
+                    [(scope, member["urn"]) for member in left],
+                )
+        return joined, left
+
+    def add_changes(self, changes: list[dict]):
+        now = time.time()
+        self.executemany(
+            "INSERT INTO changes (detected_at, scope, urn, name, change, old, new) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    now,
+                    c.get("scope"),
+                    c["urn"],
+                    c.get("name"),
+                    c["change"],
+                    c.get("old"),
+                    c.get("new"),
+                )
+                for c in changes
+            ],
+        )
+
+    def changes(self, since: datetime = None) -> list[dict]:
+        rows = self.execute(
+            "SELECT * FROM changes WHERE detected_at >= ? ORDER BY id",
+            (to_timestamp(since) if since else 0,),
+        )
+        return [
+            {**dict(row), "detected_at": from_timestamp(row["detected_at"])}
+            for row in rows
+        ]
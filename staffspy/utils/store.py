@@ -0,0 +1,49 @@
+"""
+staffspy.utils.store
+~~~~~~~~~~~~~~~~~~~
+
+Base for the local SQLite state stores, safe to share between threads and processes.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SQLiteStore:
+    schema = ""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            path, timeout=60, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.schema)
+
+    def execute(self, sql: str, params=()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def executemany(self, sql: str, params):
+        with self.transaction() as conn:
+            conn.executemany(sql, params)
+
+    @contextmanager
+    def transaction(self):
+        """Write transaction that takes the database lock up front"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
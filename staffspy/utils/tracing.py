@@ -0,0 +1,171 @@
+"""
+staffspy.utils.tracing
+~~~~~~~~~~~~~~~~~~~
+
+Pluggable tracing hooks. Spans are no-ops until a tracer is installed with
+`set_tracer`, so the scraping code can be instrumented without depending on any
+tracing library.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+_current_span = contextvars.ContextVar("staffspy_current_span", default=None)
+
+
+class Tracer:
+    """Base tracer, records nothing. Subclass and override to export spans"""
+
+    def start_span(self, name: str, parent=None, attributes: dict | None = None):
+        return None
+
+    def end_span(self, span, error: BaseException | None = None):
+        pass
+
+    def set_attribute(self, span, key: str, value):
+        pass
+
+
+class SpanRecord:
+    def __init__(self, name: str, parent, attributes: dict):
+        self.name = name
+        self.parent = parent
+        self.attributes = attributes
+        self.thread = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.end = None
+        self.error = None
+
+    @property
+    def duration(self) -> float | None:
+        return self.end - self.start if self.end is not None else None
+
+    def __repr__(self):
+        duration = f"{self.duration:.3f}s" if self.end is not None else "open"
+        return f"SpanRecord({self.name!r}, {duration}, {self.attributes})"
+
+
+class RecordingTracer(Tracer):
+    """Keeps every span in memory to find the critical path and slow outliers"""
+
+    def __init__(self):
+        self.spans: list[SpanRecord] = []
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, parent=None, attributes: dict | None = None):
+        record = SpanRecord(name, parent, dict(attributes or {}))
+        with self._lock:
+            self.spans.append(record)
+        return record
+
+    def end_span(self, span: SpanRecord, error: BaseException | None = None):
+        span.end = time.perf_counter()
+        if error is not None:
+            span.error = repr(error)
+
+    def set_attribute(self, span: SpanRecord, key: str, value):
+        span.attributes[key] = value
+
+    def children(self, span: SpanRecord) -> list[SpanRecord]:
+        return [s for s in self.spans if s.parent is span]
+
+    def critical_path(self, span: SpanRecord) -> list[SpanRecord]:
+        """Follows the child that finished last at each level"""
+        path = [span]
+        children = [s for s in self.children(span) if s.end is not None]
+        while children:
+            span = max(children, key=lambda s: s.end)
+            path.append(span)
+            children = [s for s in self.children(span) if s.end is not None]
+        return path
+
+    def slowest(self, name: str, n: int = 10) -> list[SpanRecord]:
+        finished = [s for s in self.spans if s.name == name and s.end is not None]
+        return sorted(finished, key=lambda s: s.duration, reverse=True)[:n]
+
+    def percentile(self, name: str, q: float) -> float | None:
+        durations = sorted(
+            s.duration for s in self.spans if s.name == name and s.end is not None
+        )
+        if not durations:
+            return None
+        index = min(len(durations) - 1, int(round(q / 100 * (len(durations) - 1))))
+        return durations[index]
+
+
+class OpenTelemetryTracer(Tracer):
+    """Forwards spans to an OpenTelemetry tracer"""
+
+    def __init__(self, tracer=None):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise Exception(
+                "install package `pip install opentelemetry-api` to use OpenTelemetryTracer"
+            )
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer("staffspy")
+
+    def start_span(self, name: str, parent=None, attributes: dict | None = None):
+        context = self._trace.set_span_in_context(parent) if parent else None
+        attributes = {k: v for k, v in (attributes or {}).items() if v is not None}
+        return self._tracer.start_span(name, context=context, attributes=attributes)
+
+    def end_span(self, span, error: BaseException | None = None):
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        span.end()
+
+    def set_attribute(self, span, key: str, value):
+        if value is not None:
+            span.set_attribute(key, value)
+
+
+_tracer = Tracer()
+
+
+def set_tracer(tracer: Tracer | None):
+    """Installs the tracer used for every span, None turns tracing off"""
+    global _tracer
+    _tracer = tracer or Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Opens a span as a child of the span active in this context"""
+    tracer = _tracer
+    handle = tracer.start_span(name, _current_span.get(), attributes)
+    token = _current_span.set(handle)
+    error = None
+    try:
+        yield handle
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer.end_span(handle, error)
+
+
+def set_attribute(key: str, value):
+    """Sets an attribute on the span active in this context"""
+    handle = _current_span.get()
+    if handle is not None:
+        _tracer.set_attribute(handle, key, value)
+
+
+def in_current_context(func):
+    """Binds func to a copy of the current context so spans opened in worker threads keep their parent"""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+
+    return run
@@ -2,22 +2,26 @@ import logging
 import os
 import pickle
 import re
+import tempfile
+import threading
+import time
 from datetime import datetime
+from functools import lru_cache
 
-import pandas as pd
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from urllib.parse import quote
 
 import requests
-import tldextract
-from bs4 import BeautifulSoup
-from dateutil.parser import parse
-from tenacity import stop_after_attempt, retry_if_exception_type, retry, RetryError
 
 from staffspy.solvers.solver import Solver
+from staffspy.utils import tracing
+from staffspy.utils.email_patterns import EMAIL_PATTERNS, build_local_part, name_parts
 from staffspy.utils.driver_type import DriverType, BrowserType
 from staffspy.utils.exceptions import BlobException
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger("StaffSpy")
 logger.propagate = False
 if not logger.handlers:
@@ -35,21 +39,40 @@ def set_csrf_token(session):
     return session
 
 
+# dated copy of https://publicsuffix.org/list/public_suffix_list.dat shipped with the package,
+# update both together so domains only change with a staffspy release
+PUBLIC_SUFFIX_LIST = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data", "public_suffix_list.dat"
+)
+PUBLIC_SUFFIX_LIST_VERSION = "2025-04-07_15-51-09_UTC"
+
+
+@lru_cache(maxsize=1)
+def offline_domain_extractor():
+    """Domain extractor reading only the bundled public suffix list (PUBLIC_SUFFIX_LIST_VERSION),
+    tldextract would otherwise download the latest list or use the snapshot of whichever version is installed
+    """
+    import tldextract
+
+    return tldextract.TLDExtract(
+        cache_dir=None,
+        suffix_list_urls=("file://" + PUBLIC_SUFFIX_LIST,),
+        fallback_to_snapshot=False,
+    )
+
+
+@lru_cache(maxsize=8192)
 def extract_base_domain(url: str):
-    extracted = tldextract.extract(url)
+    extracted = offline_domain_extractor()(url)
     base_domain = "{}.{}".format(extracted.domain, extracted.suffix)
     return base_domain
 
 
 def create_emails(first, last, domain):
-    first = "".join(filter(str.isalpha, first)).lower()
-    last = "".join(filter(str.isalpha, last)).lower()
+    parts = name_parts(first, last)
     emails = [
-        f"{first}.{last}@{domain}",
-        f"{first[:1]}{last}@{domain}",
-        f"{first[:2]}{last}@{domain}",
-        f"{first}{last[:1]}@{domain}",
-        f"{first}{last[:2]}@{domain}",
+        f"{build_local_part(pattern, parts)}@{domain}"
+        for pattern in list(EMAIL_PATTERNS)[:5]
     ]
     return emails
 
@@ -95,19 +118,50 @@ class Login:
         solver: Solver,
         session_file: str,
         driver_type: DriverType = None,
+        proxy_pool=None,
+        session_store=None,
+        validate: str = "eager",
+        validation_ttl: int = 0,
     ):
+        if validate not in ("eager", "lazy"):
+            raise ValueError("validate must be 'eager' or 'lazy'")
         (
             self.username,
             self.password,
             self.solver,
             self.session_file,
             self.driver_type,
-        ) = (username, password, solver, session_file, driver_type)
+            self.proxy_pool,
+            self.session_store,
+        ) = (
+            username,
+            password,
+            solver,
+            session_file,
+            driver_type,
+            proxy_pool,
+            session_store,
+        )
+        self.validate, self.validation_ttl = validate, validation_ttl
+        self._validated = False
+        self.validated_at = None
+        self._generation = 0
+        self._revalidate_lock = threading.Lock()
+        self._validation_lock = threading.Lock()
+
+    def new_session(self):
+        """Creates the requests session, bound to a proxy when a proxy pool is used"""
+        session = requests.Session()
+        if self.proxy_pool:
+            self.proxy_pool.bind(session, self.username or self.session_file)
+        return session
 
     def solve_captcha(self, session, data, payload):
         url = data["challenge_url"]
         r = session.post(url, data=payload)
 
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(r.text, "html.parser")
 
         code_tag = soup.find("code", id="securedDataExchange")
@@ -188,14 +242,21 @@ class Login:
         if not response.ok:
             raise Exception(f"verify captcha failed {response.text[:200]}")
 
-    @retry(stop=stop_after_attempt(5), retry=retry_if_exception_type(BlobException))
     def login_requests(self):
+        from tenacity import retry, stop_after_attempt, retry_if_exception_type
+
+        return retry(
+            stop=stop_after_attempt(5),
+            retry=retry_if_exception_type(BlobException),
+        )(self._login_requests)()
+
+    def _login_requests(self):
 
         url = "https://www.linkedin.com/uas/authenticate"
 
         encoded_username = quote(self.username)
         encoded_password = quote(self.password)
-        session = requests.Session()
+        session = self.new_session()
         session.headers = {
             "X-Li-User-Agent": "LIAuthLibrary:44.0.* com.linkedin.LinkedIn:9.29.8962 iPhone:17.5.1",
             "User-Agent": "LinkedIn/9.29.8962 CFNetwork/1496.0.7 Darwin/23.5.0",
@@ -243,39 +304,168 @@ class Login:
         selenium_cookies = driver.get_cookies()
         driver.quit()
 
-        session = requests.Session()
+        session = self.new_session()
         for cookie in selenium_cookies:
             session.cookies.set(cookie["name"], cookie["value"])
 
         session = set_csrf_token(session)
         return session
 
-    def save_session(self, session, session_file: str):
-        data = {"cookies": session.cookies, "headers": session.headers}
-        with open(session_file, "wb") as f:
-            pickle.dump(data, f)
+    def save_session(self, session, session_file: str, validated_at: float = None):
+        data = {
+            "cookies": session.cookies,
+            "headers": session.headers,
+            "validated_at": validated_at,
+        }
+        # written aside and swapped in, workers sharing the file never read half a pickle
+        fd, tmp_file = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(session_file)),
+            prefix=".staffspy-session-",
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f)
+            os.replace(tmp_file, session_file)
+        except BaseException:
+            os.unlink(tmp_file)
+            raise
 
     def load_session(self):
         """Load session from session file, otherwise login"""
-        session = None
-        if not self.session_file or not os.path.exists(self.session_file):
-            if self.username and self.password:
-                try:
-                    session = self.login_requests()
-                except RetryError as retry_err:
-                    retry_err.reraise()
+        with tracing.span("login", session_file=self.session_file):
+            return self._load_session()
+
+    def _load_session(self):
+        if self.session_store:
+            session = self.load_from_store()
+        else:
+            validated_at = None
+            if not self.session_file or not os.path.exists(self.session_file):
+                session = self.login()
+                if self.session_file:
+                    self.save_session(session, self.session_file)
             else:
-                session = self.login_browser()
-            if not session:
-                raise Exception("Failed to log in.")
+                session, validated_at = self.read_session_file()
+                self.validated_at = validated_at
+            self.set_client_headers(session)
+            if self.needs_check(validated_at):
+                if not self.check_logged_in(session):
+                    raise Exception(
+                        "Failed to log in. Likely outdated session file and cookies have expired. Best practice to delete the file and rerun the LinkedAccount() code"
+                    )
+                self.record_validation(session)
+        if self.validate == "lazy":
+            session.hooks["response"].append(self.validation_hook(session))
+        return session
+
+    def read_session_file(self):
+        """Session and last validation time from the session_file pickle"""
+        with open(self.session_file, "rb") as f:
+            data = pickle.load(f)
+        session = self.new_session()
+        session.cookies.update(data["cookies"])
+        session.headers.update(data["headers"])
+        return session, data.get("validated_at")
+
+    def needs_check(self, validated_at: float | None) -> bool:
+        """Lazy mode never checks up front, otherwise skip the check while the last one is within the ttl"""
+        if self.validate == "lazy":
+            return False
+        return not validated_at or time.time() - validated_at >= self.validation_ttl
+
+    def record_validation(self, session):
+        """Stores the time of a passed check, nothing is written while the last one is within the ttl"""
+        with self._validation_lock:
+            self._validated = True
+            now = time.time()
+            if self.validated_at and now - self.validated_at < self.validation_ttl:
+                return
+            self.validated_at = now
+            if self.session_store:
+                self.session_store.mark_validated(self.store_key)
+            elif self.session_file and self.validation_ttl:
+                # without a ttl the time is never read back, no need to rewrite the file
+                self.save_session(session, self.session_file, validated_at=now)
+
+    def validation_hook(self, session):
+        """Response hook for lazy mode, the first good response counts as the login check
+        and a 400/401 from the api triggers a check, logging in again if the session expired
+        """
+        local = threading.local()
+
+        def hook(res, *args, **kwargs):
+            if getattr(local, "busy", False):
+                return None
+            if res.status_code in (400, 401) and "/voyager/api/" in res.url:
+                generation = self._generation
+                local.busy = True
+                try:
+                    with self._revalidate_lock:
+                        refreshed = generation != self._generation or self.revalidate(
+                            session
+                        )
+                    if refreshed:
+                        return self.resend(session, res.request)
+                finally:
+                    local.busy = False
+            elif res.ok and not self._validated:
+                self.record_validation(session)
+
+        return hook
+
+    def revalidate(self, session) -> bool:
+        """Checks the session, logs in again in place if it expired. True if the cookies changed"""
+        if self.check_logged_in(session):
+            self.record_validation(session)
+            return False
+        logger.warning("Session expired, logging in again")
+        if self.session_store:
+            fresh = self.load_from_store(force_check=True)
+        elif self.username and self.password:
+            fresh = self.login()
+            self.set_client_headers(fresh)
+            if not self.check_logged_in(fresh):
+                return False
             if self.session_file:
-                self.save_session(session, self.session_file)
+                self.save_session(fresh, self.session_file, validated_at=time.time())
+        else:
+            logger.error(
+                "Outdated login, delete the session file to log in again with the browser"
+            )
+            return False
+        session.cookies.clear()
+        session.cookies.update(fresh.cookies)
+        session.headers.update(fresh.headers)
+        self._generation += 1
+        return True
+
+    @staticmethod
+    def resend(session, request):
+        headers = {
+            k: v
+            for k, v in request.headers.items()
+            if k.lower() not in ("cookie", "csrf-token", "content-length")
+        }
+        return session.request(
+            request.method, request.url, data=request.body, headers=headers
+        )
+
+    def login(self):
+        from tenacity import RetryError
+
+        if self.username and self.password:
+            try:
+                session = self.login_requests()
+            except RetryError as retry_err:
+                retry_err.reraise()
         else:
-            with open(self.session_file, "rb") as f:
-                data = pickle.load(f)
-                session = requests.Session()
-                session.cookies.update(data["cookies"])
-                session.headers.update(data["headers"])
+            session = self.login_browser()
+        if not session:
+            raise Exception("Failed to log in.")
+        return session
+
+    @staticmethod
+    def set_client_headers(session):
         session.headers.update(
             {
                 "User-Agent": "Mozilla/5.0 (Linux; U; Android 4.4.2; en-us; SCH-I535 Build/KOT49H) AppleWebKit/534.30 (KHTML, like Gecko) Version/4.0 Mobile Safari/534.30",
@@ -283,18 +473,70 @@ class Login:
                 "X-Li-Track": '{"clientVersion":"1.13.1665"}',
             }
         )
+
+    @property
+    def store_key(self):
+        return self.session_file or self.username or "default"
+
+    def session_from_file(self):
+        """The session_file pickle to seed an empty store with, None if there is none or it has expired"""
+        if not self.session_file or not os.path.exists(self.session_file):
+            return None
+        session, _ = self.read_session_file()
+        self.set_client_headers(session)
         if not self.check_logged_in(session):
-            raise Exception(
-                "Failed to log in. Likely outdated session file and cookies have expired. Best practice to delete the file and rerun the LinkedAccount() code"
-            )
+            logger.info(f"Session file '{self.session_file}' has expired")
+            return None
+        logger.info(f"Seeding the session store from '{self.session_file}'")
+        return session
+
+    def load_from_store(self, force_check: bool = False):
+        """Load the shared session, only one worker logs in again when it has expired"""
+        key = self.store_key
+        record = self.session_store.load(key)
+        if record:
+            self.validated_at = record["last_validated_at"]
+            session = self.session_store.apply(record, self.new_session())
+            self.set_client_headers(session)
+            if not force_check and not self.needs_check(record["last_validated_at"]):
+                return session
+            if self.check_logged_in(session):
+                self.session_store.mark_validated(key)
+                return session
+            logger.info(f"Stored session '{key}' has expired")
+
+        since = record["created_at"] if record else 0
+        if self.session_store.acquire_refresh(key, since):
+            try:
+                session = None if record else self.session_from_file()
+                if session is None:
+                    session = self.login()
+            except BaseException:
+                self.session_store.release_refresh(key)
+                raise
+            self.session_store.save(key, session)
+        else:
+            logger.info(f"Waiting on another worker to log in again for '{key}'")
+            record = self.session_store.wait_for_refresh(key, since)
+            if not record:
+                raise Exception(
+                    f"Failed to log in. Another worker was refreshing the session '{key}' and gave up"
+                )
+            session = self.session_store.apply(record, self.new_session())
+
+        self.set_client_headers(session)
+        if not self.check_logged_in(session):
+            raise Exception("Failed to log in with the refreshed session.")
+        self._validated = True
         return session
 
     def check_logged_in(self, session):
         logger.info("Testing if logged in by checking arbitrary LinkedIn company page")
         try:
-            res = session.get(
-                "https://www.linkedin.com/voyager/api/organization/companies?q=universalName&universalName=amazon"
-            )
+            with tracing.span("login.check"):
+                res = session.get(
+                    "https://www.linkedin.com/voyager/api/organization/companies?q=universalName&universalName=amazon"
+                )
             if res.status_code != 200:
                 logger.error(f"{res.status_code} status code returned from linkedin")
                 return False
@@ -347,6 +589,8 @@ def set_logger_level(verbose: int = 0):
 
 
 def parse_dates(date_str):
+    from dateutil.parser import parse
+
     regex = r"(\b\w+ \d{4}|\b\d{4}|\bPresent)"
     matches = re.findall(regex, date_str)
 
@@ -376,7 +620,7 @@ def extract_emails_from_text(text: str) -> list[str] | None:
     return email_regex.findall(text)
 
 
-def parse_company_data(json_data, search_term=None):
+def parse_company_record(json_data, search_term=None) -> dict:
     company_info = json_data["elements"][0]
 
     company_name = company_info.get("name", "")
@@ -419,21 +663,29 @@ def parse_company_data(json_data, search_term=None):
         file_segment = chosen_artifact.get("fileIdentifyingUrlPathSegment", "")
         banner_url = root_url + file_segment
 
-    company_df = pd.DataFrame(
-        {
-            "search_term": [search_term],
-            "linkedin_company_id": [internal_id],
-            "company_name": [company_name],
-            "staff_count": [staff_count],
-            "company_type": [company_type],
-            "industries": [industries_list],
-            "headquarters_address": [headquarter_full],
-            "description": [description],
-            "logo_url": [logo_url],
-            "banner_url": [banner_url],
-        }
-    )
-    return company_df
+    return {
+        "search_term": search_term,
+        "linkedin_company_id": internal_id,
+        "company_name": company_name,
+        "staff_count": staff_count,
+        "company_type": company_type,
+        "industries": industries_list,
+        "headquarters_address": headquarter_full,
+        "description": description,
+        "logo_url": logo_url,
+        "banner_url": banner_url,
+    }
+
+
+def parse_company_data(json_data, search_term=None) -> "pd.DataFrame":
+    return to_dataframe([parse_company_record(json_data, search_term)])
+
+
+def to_dataframe(records: list[dict]) -> "pd.DataFrame":
+    """Optional pandas layer on top of the plain records"""
+    import pandas as pd
+
+    return clean_df(pd.DataFrame(records))
 
 
 def clean_df(staff_df):
@@ -448,8 +700,8 @@ def clean_df(staff_df):
     return staff_df
 
 
-def upload_to_clay(webhook_url: str, data: pd.DataFrame):
-    records = data.to_dict("records")
+def upload_to_clay(webhook_url: str, data: "pd.DataFrame | list[dict]"):
+    records = data.to_dict("records") if hasattr(data, "to_dict") else data
 
     responses = []
     for i, row in enumerate(records, start=1):
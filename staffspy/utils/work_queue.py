@@ -0,0 +1,156 @@
+"""
+staffspy.utils.work_queue
+~~~~~~~~~~~~~~~~~~~
+
+Local SQLite work queue the crawler processes claim items from with leases. An item whose worker
+died is handed out again once its lease runs out.
+"""
+
+import json
+import time
+
+from staffspy.utils.store import SQLiteStore
+
+
+class WorkQueue(SQLiteStore):
+    schema = """
+    CREATE TABLE IF NOT EXISTS work_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT,
+        payload TEXT,
+        status TEXT DEFAULT 'pending',
+        attempts INTEGER DEFAULT 0,
+        worker TEXT,
+        lease_until REAL,
+        rows INTEGER,
+        error TEXT,
+        created_at REAL,
+        done_at REAL,
+        UNIQUE (kind, payload)
+    );
+    CREATE INDEX IF NOT EXISTS work_items_status ON work_items (status, lease_until);
+    """
+
+    def enqueue(self, kind: str, payloads: list[dict]) -> int:
+        """Queues work items, items already queued with the same payload are skipped. Returns how many were added"""
+        now = time.time()
+        with self.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO work_items (kind, payload, created_at) VALUES (?, ?, ?)",
+                [(kind, json.dumps(p, sort_keys=True), now) for p in payloads],
+            )
+            return conn.total_changes - before
+
+    def claim(
+        self, worker: str, lease: int = 900, max_attempts: int = 3
+    ) -> dict | None:
+        """Leases the oldest pending item, or one whose worker let its lease run out.
+        Every claim counts as an attempt, so an item that keeps killing its worker ends up failed
+        """
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute(
+                """
+                UPDATE work_items SET status = 'failed', error = 'Lease expired too often'
+                WHERE status = 'leased' AND lease_until < ? AND attempts >= ?
+                """,
+                (now, max_attempts),
+            )
+            row = conn.execute(
+                """
+                SELECT * FROM work_items
+                WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?)
+                ORDER BY id LIMIT 1
+                """,
+                (now,),
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                """
+                UPDATE work_items SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1
+                WHERE id = ?
+                """,
+                (worker, now + lease, row["id"]),
+            )
+        item = dict(row, attempts=row["attempts"] + 1)
+        item["payload"] = json.loads(item["payload"])
+        return item
+
+    def renew(self, item_id: int, worker: str, lease: int = 900) -> bool:
+        """Extends the lease, False if the item was handed to another worker meanwhile"""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE work_items SET lease_until = ?
+                WHERE id = ? AND worker = ? AND status = 'leased'
+                """,
+                (time.time() + lease, item_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, item_id: int, worker: str, rows: int) -> bool:
+        """Marks the item done, False if its lease ran out and it was handed to another worker"""
+        return self._update_leased(
+            """
+            UPDATE work_items SET status = 'done', rows = ?, error = NULL, done_at = ?
+            WHERE id = ? AND worker = ? AND status = 'leased'
+            """,
+            (rows, time.time(), item_id, worker),
+        )
+
+    def fail(
+        self, item_id: int, worker: str, error: str, max_attempts: int = 3
+    ) -> bool:
+        """Puts the item back in the queue, or marks it failed after max_attempts. False if the worker lost the lease"""
+        return self._update_leased(
+            """
+            UPDATE work_items SET
+                status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                error = ?,
+                lease_until = NULL
+            WHERE id = ? AND worker = ? AND status = 'leased'
+            """,
+            (max_attempts, error, item_id, worker),
+        )
+
+    def release(self, item_id: int, worker: str) -> bool:
+        """Hands the item back without counting the attempt, e.g. when the account got a 429"""
+        return self._update_leased(
+            """
+            UPDATE work_items SET status = 'pending', lease_until = NULL, attempts = attempts - 1
+            WHERE id = ? AND worker = ? AND status = 'leased'
+            """,
+            (item_id, worker),
+        )
+
+    def _update_leased(self, sql: str, params: tuple) -> bool:
+        with self.transaction() as conn:
+            return conn.execute(sql, params).rowcount == 1
+
+    def counts(self) -> list[dict]:
+        """Number of items and rows scraped per kind and status"""
+        rows = self.execute("""
+            SELECT kind, status, count(*) AS items, coalesce(sum(rows), 0) AS rows
+            FROM work_items GROUP BY kind, status ORDER BY kind, status
+            """)
+        return [dict(row) for row in rows]
+
+    def errors(self, limit: int = 20) -> list[dict]:
+        rows = self.execute(
+            """
+            SELECT id, kind, payload, status, attempts, error FROM work_items
+            WHERE error IS NOT NULL AND status != 'done' ORDER BY id LIMIT ?
+            """,
+            (limit,),
+        )
+        return [dict(row) for row in rows]
+
+    def retry_failed(self) -> int:
+        """Queues the failed items again with a fresh attempt count"""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE work_items SET status = 'pending', attempts = 0 WHERE status = 'failed'"
+            )
+            return cursor.rowcount
@@ -0,0 +1,82 @@
+from staffspy import AccountPool
+from staffspy.linkedin.linkedin import LinkedInScraper
+from staffspy.utils.account_pool import PooledAccount, PooledSession
+from staffspy.utils.models import Staff
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.reason = ""
+        self.ok = status_code < 400
+        self.headers = {}
+
+    def json(self):
+        return {}
+
+
+class FakeSession:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append(method)
+        return FakeResponse(self.status_code)
+
+
+def pool(*statuses: int, **kwargs) -> PooledSession:
+    accounts = [
+        PooledAccount(name, FakeSession(status))
+        for name, status in zip("abc", statuses)
+    ]
+    return PooledSession(accounts, **kwargs)
+
+
+def test_throttled_get_moves_to_another_account():
+    session = pool(429, 200)
+    seen = []
+    session.hooks["response"].append(lambda res: seen.append(res.status_code))
+
+    assert session.get("https://www.linkedin.com/a").ok
+    assert seen == [429, 200]
+    a, b = session.stats()
+    assert a["cooling_down"] and a["throttled"] == 1
+    assert not b["cooling_down"]
+
+
+def test_connect_429_is_not_sent_from_another_account():
+    session = pool(429, 200)
+    scraper = LinkedInScraper(session)
+    employee = Staff(id="ACo1", search_term="test", urn="1", is_connection="no")
+
+    res = scraper.connect_user(employee)
+
+    assert res.status_code == 429
+    assert scraper.connect_block
+    a, b = session.accounts
+    assert a.session.calls == ["POST"] and b.session.calls == []
+    # the invitation quota says nothing about scraping with that account
+    assert not session.stats()[0]["cooling_down"]
+
+
+def test_actions_use_the_action_account():
+    session = pool(200, 200, action_account="b")
+    session.accounts[0].requests_made = -5
+
+    session.post("https://www.linkedin.com/block")
+
+    assert [a.session.calls for a in session.accounts] == [[], ["POST"]]
+
+
+def test_account_key_is_stable_per_pool():
+    def key(session_files=(), credentials=()):
+        account = AccountPool.__new__(AccountPool)
+        account.session_files = list(session_files)
+        account.credentials = list(credentials)
+        return account.account_key
+
+    assert key(["a.pkl", "b.pkl"]) == key(["b.pkl", "a.pkl"])
+    assert key(["a.pkl", "b.pkl"]) != key(["a.pkl"])
+    assert key(credentials=[("me@x.com", "pw")]) != key(["a.pkl"])
+    assert key(["a.pkl"]) != "default"
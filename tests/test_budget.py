@@ -0,0 +1,73 @@
+import pytest
+
+from staffspy.linkedin.linkedin import LinkedInScraper
+from staffspy.utils.account_pool import PooledAccount, PooledSession
+from staffspy.utils.budget import RequestBudget
+from staffspy.utils.exceptions import RequestBudgetSpent
+from staffspy.utils.models import Staff
+from staffspy.utils.retry import RetryPolicy
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.reason = ""
+        self.ok = status_code < 400
+        self.headers = {}
+        self.text = ""
+
+    def json(self):
+        return {}
+
+
+class FakeSession:
+    """Answers every request with the same status, counting what was actually sent"""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.headers = {}
+        self.hooks = {"response": []}
+        self.sent = 0
+
+    def request(self, method, url, **kwargs):
+        self.sent += 1
+        return FakeResponse(self.status_code)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+
+def staff(count: int) -> list[Staff]:
+    return [
+        Staff(id=f"ACo{i}", search_term="test", name="Jane Doe", is_connection="yes")
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("limit", [8, 20, 35])
+def test_retries_never_take_enrichment_past_the_budget(limit):
+    # every section answers 503, so each one is retried up to max_attempts
+    session = FakeSession(503)
+    scraper = LinkedInScraper(session, retry=RetryPolicy(base_delay=0, jitter=False))
+    budget = RequestBudget(limit).attach(session)
+
+    enriched = scraper.enrich_staff(staff(10), budget=budget)
+
+    assert session.sent == budget.used <= limit
+    assert enriched >= 1
+    budget.detach(session)
+    session.get("https://www.linkedin.com/a")
+    assert session.sent == budget.used + 1
+
+
+def test_pooled_replays_count_against_the_budget():
+    accounts = [PooledAccount(name, FakeSession(429)) for name in "ab"]
+    session = PooledSession(accounts)
+    budget = RequestBudget(1).attach(session)
+
+    with pytest.raises(RequestBudgetSpent):
+        session.get("https://www.linkedin.com/a")
+    assert sum(a.session.sent for a in accounts) == 1
+
+    budget.detach(session)
+    assert session.get("https://www.linkedin.com/a").status_code == 429
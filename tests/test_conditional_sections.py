@@ -0,0 +1,78 @@
+from staffspy.linkedin.linkedin import LinkedInScraper
+from staffspy.utils.models import Experience, Staff
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict):
+        self.status_code = status_code
+        self.reason = ""
+        self.ok = status_code < 400
+        self.headers = {}
+        self.text = ""
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class TopCardSession:
+    """Answers the top card of a member between jobs who went to school"""
+
+    def __init__(self):
+        self.headers = {}
+        self.hooks = {"response": []}
+
+    def request(self, method, url, **kwargs):
+        return FakeResponse(200, {"elements": [top_card()]})
+
+
+def top_card() -> dict:
+    return {
+        "publicIdentifier": "jane-doe",
+        "firstName": "Jane",
+        "lastName": "Doe",
+        "memberRelationship": {"memberRelationshipUnion": {"noConnection": {}}},
+        "profilePicture": {"frameType": "OPEN_TO_WORK"},
+        "connections": {"paging": {"total": 10}},
+        "profileTopPosition": {"elements": []},
+        "profileTopEducation": {"elements": []},
+    }
+
+
+def test_no_current_position_still_fetches_experiences(monkeypatch):
+    scraper = LinkedInScraper(TopCardSession(), conditional_sections=True)
+    fetched = []
+
+    def fetch_experiences(employee):
+        fetched.append("experiences")
+        employee.experiences = [
+            Experience(title="Engineer", company="Acme", emp_type="Full-time")
+        ]
+        return True
+
+    def fetch(section):
+        def fetch_section(employee):
+            fetched.append(section)
+            return True
+
+        return fetch_section
+
+    monkeypatch.setattr(scraper.experiences, "fetch_experiences", fetch_experiences)
+    monkeypatch.setattr(scraper.schools, "fetch_schools", fetch("schools"))
+    for attr, method in [
+        ("skills", "fetch_skills"),
+        ("certs", "fetch_certifications"),
+        ("bio", "fetch_employee_bio"),
+        ("languages", "fetch_languages"),
+    ]:
+        monkeypatch.setattr(getattr(scraper, attr), method, fetch(attr))
+
+    employee = Staff(id="ACo1", search_term="test")
+    scraper.fetch_all_info_for_employee(employee, 1)
+
+    assert employee.open_to_work
+    assert "experiences" in fetched
+    assert employee.experiences[0].company == "Acme"
+    # an empty top education still skips schools
+    assert "schools" not in fetched
+    assert employee.failed_sections is None
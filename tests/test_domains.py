@@ -0,0 +1,30 @@
+import socket
+
+import pytest
+
+from staffspy.utils import utils
+
+
+def test_bundled_list_matches_its_version():
+    with open(utils.PUBLIC_SUFFIX_LIST, encoding="utf-8") as f:
+        header = f.read(1000)
+    assert f"// VERSION: {utils.PUBLIC_SUFFIX_LIST_VERSION}" in header
+
+
+@pytest.mark.parametrize(
+    "url, domain",
+    [
+        ("https://www.openai.com/careers", "openai.com"),
+        ("https://shop.example.co.uk", "example.co.uk"),
+        ("http://jobs.acme.com.au/", "acme.com.au"),
+    ],
+)
+def test_domains_resolve_offline(monkeypatch, url, domain):
+    def no_network(*args, **kwargs):
+        raise AssertionError("tried to reach the network")
+
+    monkeypatch.setattr(socket, "create_connection", no_network)
+    utils.offline_domain_extractor.cache_clear()
+    utils.extract_base_domain.cache_clear()
+
+    assert utils.extract_base_domain(url) == domain
@@ -0,0 +1,20 @@
+from staffspy import LinkedInAccount
+from staffspy.utils.planner import COMPANY_SEARCH_REQUESTS, company_requests
+
+
+def test_company_names_may_need_a_search():
+    assert company_requests("1441") == 1
+    assert company_requests(1441) == 1
+    assert company_requests("openai") == COMPANY_SEARCH_REQUESTS
+
+
+def test_plan_companies_counts_the_searches(monkeypatch):
+    monkeypatch.setattr(LinkedInAccount, "login", lambda self: None)
+    account = LinkedInAccount()
+
+    plan = account.plan_companies(
+        ["1441", "openai", "anthropic"], requests_per_minute=1, daily_budget=3
+    )
+
+    assert plan.total_requests == 1 + 2 * COMPANY_SEARCH_REQUESTS
+    assert plan.days == 3
@@ -0,0 +1,82 @@
+import pytest
+import requests
+
+from staffspy.linkedin.linkedin import LinkedInScraper, failed_sections
+from staffspy.utils.exceptions import TooManyRequests
+
+FETCHERS = {
+    "employee": ("employees", "fetch_employee"),
+    "skills": ("skills", "fetch_skills"),
+    "experiences": ("experiences", "fetch_experiences"),
+    "certifications": ("certs", "fetch_certifications"),
+    "schools": ("schools", "fetch_schools"),
+    "bio": ("bio", "fetch_employee_bio"),
+    "languages": ("languages", "fetch_languages"),
+    "contact_info": ("contact", "fetch_contact_info"),
+}
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    scraper = LinkedInScraper(requests.Session())
+    scraper.fetched = []
+    scraper.results = {}
+
+    def fake(section):
+        def fetch(employee, *args):
+            scraper.fetched.append((employee.id, section))
+            result = scraper.results.get(section, True)
+            if isinstance(result, Exception):
+                raise result
+            if section == "bio":
+                employee.bio = "Fresh bio"
+            return result
+
+        return fetch
+
+    for section, (attr, method) in FETCHERS.items():
+        monkeypatch.setattr(getattr(scraper, attr), method, fake(section))
+    return scraper
+
+
+def record(user_id: str, failed) -> dict:
+    return {
+        "id": user_id,
+        "name": "Ada Lovelace",
+        "profile_link": f"https://www.linkedin.com/in/{user_id}",
+        "headline": "Kept as is",
+        "bio": None,
+        "skills": None,
+        "failed_sections": failed,
+    }
+
+
+def test_only_failed_sections_are_fetched(scraper):
+    records = [record("1", ["bio", "skills"]), record("2", None)]
+    scraper.results["skills"] = Exception("timed out")
+
+    assert scraper.repair(records) == 1
+
+    assert sorted(scraper.fetched) == [("1", "bio"), ("1", "skills")]
+    assert records[0]["bio"] == "Fresh bio"
+    assert records[0]["headline"] == "Kept as is"
+    assert records[0]["failed_sections"] == ["skills"]
+    assert records[1]["failed_sections"] is None
+
+
+def test_failed_sections_read_back_from_csv(scraper):
+    records = [record("1", "['bio']")]
+    assert failed_sections(records[0]) == {"bio"}
+    assert scraper.repair(records) == 1
+    assert records[0]["failed_sections"] is None
+
+
+def test_429_stops_the_repair(scraper):
+    records = [record("1", ["bio"]), record("2", ["bio"])]
+    scraper.results["bio"] = TooManyRequests("429 Too Many Requests")
+
+    assert scraper.repair(records) == 0
+
+    assert scraper.on_block
+    assert scraper.fetched == [("1", "bio")]
+    assert records[0]["failed_sections"] == records[1]["failed_sections"] == ["bio"]
@@ -0,0 +1,86 @@
+import pytest
+
+from staffspy.utils.exceptions import TooManyRequests
+from staffspy.utils.retry import CircuitBreaker, RetryPolicy
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict = None):
+        self.status_code = status_code
+        self.reason = ""
+        self.ok = status_code < 400
+        self.headers = {}
+        self._body = body or {}
+
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+    def __init__(self, *statuses: int):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.statuses.pop(0) if self.statuses else 200)
+
+
+def test_first_429_opens_the_breaker():
+    policy = RetryPolicy(base_delay=0)
+    session = FakeSession(429)
+
+    res = policy.request(session, "GET", "https://www.linkedin.com/a")
+    assert res.status_code == 429
+    assert policy.breaker.is_open
+
+    # later requests of the run are never sent
+    with pytest.raises(TooManyRequests):
+        policy.request(session, "GET", "https://www.linkedin.com/b")
+    assert session.calls == 1
+
+
+def test_new_run_gets_a_closed_breaker():
+    policy = RetryPolicy(base_delay=0)
+    policy.request(FakeSession(429), "GET", "https://www.linkedin.com/a")
+
+    run = policy.new_run()
+    assert not run.breaker.is_open
+    assert run.request(FakeSession(), "GET", "https://www.linkedin.com/a").ok
+
+
+def test_unthrottled_429_leaves_the_breaker_closed():
+    policy = RetryPolicy(base_delay=0)
+    res = policy.request(
+        FakeSession(429), "POST", "https://www.linkedin.com/a", throttle=False
+    )
+    assert res.status_code == 429
+    assert not policy.breaker.is_open
+
+
+def test_cooldown_pauses_and_replays(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("staffspy.utils.retry.time.sleep", sleeps.append)
+    policy = RetryPolicy(breaker=CircuitBreaker(cooldown=0.01, max_pauses=1))
+    session = FakeSession(429, 200, 429)
+
+    assert policy.request(session, "GET", "https://www.linkedin.com/a").ok
+    assert session.calls == 2 and sleeps
+    assert not policy.breaker.is_open
+
+    # the second 429 after the pause opens it for good
+    policy.request(session, "GET", "https://www.linkedin.com/b")
+    assert policy.breaker.is_open
+
+
+def test_5xx_is_retried_only_when_idempotent(monkeypatch):
+    monkeypatch.setattr("staffspy.utils.retry.time.sleep", lambda _: None)
+    policy = RetryPolicy(max_attempts=3)
+
+    get = FakeSession(503, 502, 200)
+    assert policy.request(get, "GET", "https://www.linkedin.com/a").ok
+    assert get.calls == 3
+
+    post = FakeSession(503)
+    assert policy.request(post, "POST", "https://www.linkedin.com/a").status_code == 503
+    assert post.calls == 1
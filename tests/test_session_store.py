@@ -0,0 +1,83 @@
+import pickle
+import types
+
+import pytest
+import requests
+
+from staffspy.utils import session_store
+from staffspy.utils.session_store import SessionStore
+from staffspy.utils.utils import Login
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = types.SimpleNamespace(value=1000.0)
+
+    def sleep(seconds):
+        now.value += seconds
+
+    monkeypatch.setattr(
+        session_store,
+        "time",
+        types.SimpleNamespace(time=lambda: now.value, sleep=sleep),
+    )
+    return now
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(str(tmp_path / "sessions.db"))
+
+
+def logged_in_session(token: str = "ajax:1") -> requests.Session:
+    session = requests.Session()
+    session.cookies.set("JSESSIONID", f'"{token}"', domain=".linkedin.com")
+    session.headers.update({"Csrf-Token": token})
+    return session
+
+
+def test_only_one_worker_holds_the_refresh_lease(store, clock):
+    assert store.acquire_refresh("acct", lease=60)
+    assert not store.acquire_refresh("acct", lease=60)
+
+    clock.value += 61
+    # the first worker died without logging in, the lease is handed out again
+    assert store.acquire_refresh("acct", lease=60)
+
+
+def test_refresh_done_by_another_worker(store, clock):
+    assert store.acquire_refresh("acct", lease=60)
+    clock.value += 1
+    store.save("acct", logged_in_session())
+
+    # a worker that saw the old session expire does not log in again
+    assert not store.acquire_refresh("acct", since=clock.value - 10)
+    record = store.wait_for_refresh("acct", since=clock.value - 10)
+    assert record["csrf_token"] == "ajax:1"
+    session = store.apply(record, requests.Session())
+    assert session.cookies["JSESSIONID"] == '"ajax:1"'
+
+
+def test_wait_gives_up_when_the_lease_is_released(store, clock):
+    assert store.acquire_refresh("acct", lease=60)
+    store.release_refresh("acct")
+    assert store.wait_for_refresh("acct", since=0, timeout=5) is None
+    assert store.acquire_refresh("acct", lease=60)
+
+
+def test_empty_store_is_seeded_from_the_session_file(store, tmp_path, monkeypatch):
+    session_file = tmp_path / "session.pkl"
+    session = logged_in_session("ajax:2")
+    with open(session_file, "wb") as f:
+        pickle.dump({"cookies": session.cookies, "headers": session.headers}, f)
+
+    login = Login(None, None, None, str(session_file), session_store=store)
+    monkeypatch.setattr(Login, "check_logged_in", lambda self, session: True)
+
+    def login_again(self):
+        raise AssertionError("should reuse the session file")
+
+    monkeypatch.setattr(Login, "login", login_again)
+
+    assert login.load_from_store().headers["Csrf-Token"] == "ajax:2"
+    assert store.load(login.store_key)["csrf_token"] == "ajax:2"
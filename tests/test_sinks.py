@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+from staffspy import LinkedInAccount
+from staffspy.linkedin.comments import CommentFetcher
+from staffspy.utils.models import Comment
+from staffspy.utils.sinks import CSVSink, Sink, open_sink
+
+RECORDS = [
+    {"id": "1", "name": "Ada Lovelace", "followers": 10, "skills": None},
+    {"id": "2", "name": "Alan Turing", "followers": 20, "skills": None},
+    {"id": "3", "name": "Grace Hopper", "followers": 30, "skills": None},
+]
+
+
+def test_csv_round_trip(tmp_path):
+    sink = open_sink(str(tmp_path / "staff.csv"), chunk_size=2)
+    assert isinstance(sink, CSVSink)
+    sink.write_many(RECORDS)
+    summary = sink.close()
+
+    assert (summary.rows, summary.chunks) == (3, 2)
+    df = summary.read()
+    assert df["name"].tolist() == [r["name"] for r in RECORDS]
+    assert df["followers"].tolist() == [10, 20, 30]
+    assert [len(chunk) for chunk in summary.read(chunksize=2)] == [2, 1]
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    records = [
+        {**RECORDS[0], "skills": [{"name": "math"}]},
+        *RECORDS[1:],
+    ]
+    sink = open_sink(str(tmp_path / "staff.parquet"), chunk_size=2)
+    sink.write_many(records)
+    summary = sink.close()
+
+    df = summary.read()
+    assert df["name"].tolist() == [r["name"] for r in records]
+    assert df["skills"][0] == '[{"name": "math"}]'
+    assert sum(len(chunk) for chunk in summary.read(chunksize=2)) == 3
+
+
+def test_close_twice_writes_once(tmp_path):
+    sink = open_sink(str(tmp_path / "staff.jsonl"))
+    sink.write_many(RECORDS)
+    first = sink.close()
+    assert sink.close() is first
+    assert len((tmp_path / "staff.jsonl").read_text().splitlines()) == 3
+
+
+def test_empty_sink_replaces_old_file(tmp_path):
+    path = tmp_path / "staff.csv"
+    path.write_text("stale")
+    summary = open_sink(str(path)).close()
+    assert summary.rows == 0
+    assert path.read_text() == ""
+    assert summary.read().empty
+
+
+class ListSink(Sink):
+    format = "list"
+
+    def __init__(self):
+        super().__init__(path=os.devnull, chunk_size=1)
+        self.chunks_written = []
+
+    def _write_chunk(self, records: list[dict], first: bool):
+        self.chunks_written.append([r["comment_id"] for r in records])
+
+
+def test_sink_needs_write_chunk():
+    with pytest.raises(TypeError):
+        Sink(os.devnull)
+
+
+def test_comments_are_streamed_post_by_post(monkeypatch):
+    monkeypatch.setattr(LinkedInAccount, "login", lambda self: None)
+    account = LinkedInAccount(output="records")
+    posts = {
+        "p1": [Comment(post_id="p1", comment_id="c1", internal_profile_id="u1")],
+        "p2": [
+            Comment(post_id="p2", comment_id="c2", internal_profile_id="u1"),
+            Comment(post_id="p2", comment_id="c3", internal_profile_id="u2"),
+        ],
+    }
+    monkeypatch.setattr(
+        CommentFetcher, "fetch_comments", lambda self, post_id, since: posts[post_id]
+    )
+    skipped = []
+
+    def enrich_commenters(comments, skip=()):
+        skipped.append(set(skip))
+        return {
+            c.internal_profile_id: {"headline": f"{c.internal_profile_id} headline"}
+            for c in comments
+            if c.internal_profile_id not in skip
+        }
+
+    monkeypatch.setattr(account, "enrich_commenters", enrich_commenters)
+    sink = ListSink()
+
+    summary = account.scrape_comments(
+        ["p1", "p2"], max_workers=1, enrich=True, sink=sink
+    )
+
+    assert summary.rows == 3
+    assert sorted(sink.chunks_written) == [["c1"], ["c2"], ["c3"]]
+    # the second post only scrapes the commenter it has not seen yet
+    assert skipped[0] == set() and skipped[1] == {"u1"}
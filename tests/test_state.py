@@ -0,0 +1,16 @@
+from staffspy.utils.state import StateStore
+
+
+def test_identity_by_any_id():
+    store = StateStore()
+    store.record_identities([("ACoAAA", "jane-doe", "123")])
+
+    expected = {"fsd_id": "ACoAAA", "profile_id": "jane-doe", "urn": "123"}
+    assert store.identity(profile_id="jane-doe") == expected
+    assert store.identity(urn="123") == expected
+    assert store.identity(fsd_id="ACoBBB") is None
+
+
+def test_identity_without_ids():
+    assert StateStore().identity() is None
+    assert StateStore().identity(profile_id=None, urn="") is None
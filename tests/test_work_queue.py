@@ -0,0 +1,121 @@
+import types
+
+import pytest
+
+from staffspy.crawler import JOBS, Worker
+from staffspy.utils import work_queue
+from staffspy.utils.work_queue import WorkQueue
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(
+        work_queue, "time", types.SimpleNamespace(time=lambda: now.value)
+    )
+    return now
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / "queue.db"))
+
+
+def test_enqueue_skips_duplicates(queue):
+    assert queue.enqueue("company", [{"name": "openai"}, {"name": "anthropic"}]) == 2
+    assert queue.enqueue("company", [{"name": "openai"}]) == 0
+
+
+def test_claim_leases_each_item_once(queue, clock):
+    queue.enqueue("company", [{"name": "openai"}, {"name": "anthropic"}])
+
+    first = queue.claim("w1", lease=60)
+    second = queue.claim("w2", lease=60)
+
+    assert first["payload"] == {"name": "openai"}
+    assert second["payload"] == {"name": "anthropic"}
+    assert first["attempts"] == second["attempts"] == 1
+    assert queue.claim("w3", lease=60) is None
+
+
+def test_expired_lease_is_reclaimed(queue, clock):
+    queue.enqueue("company", [{"name": "openai"}])
+    item = queue.claim("w1", lease=60)
+
+    clock.value += 30
+    assert queue.claim("w2", lease=60) is None
+    assert queue.renew(item["id"], "w1", lease=60)
+
+    clock.value += 61
+    reclaimed = queue.claim("w2", lease=60)
+    assert reclaimed["id"] == item["id"]
+    assert reclaimed["attempts"] == 2
+    # the first worker lost the item and can no longer extend it
+    assert not queue.renew(item["id"], "w1")
+
+
+def test_item_fails_after_max_attempts(queue, clock):
+    queue.enqueue("company", [{"name": "openai"}])
+    for _ in range(2):
+        assert queue.claim("w", lease=60, max_attempts=2)
+        clock.value += 61
+
+    assert queue.claim("w", lease=60, max_attempts=2) is None
+    assert queue.errors()[0]["status"] == "failed"
+    assert queue.retry_failed() == 1
+    assert queue.claim("w", lease=60, max_attempts=2)["attempts"] == 1
+
+
+def test_release_does_not_count_the_attempt(queue, clock):
+    queue.enqueue("company", [{"name": "openai"}])
+    item = queue.claim("w1")
+    assert queue.release(item["id"], "w1")
+    assert queue.claim("w2")["attempts"] == 1
+
+
+def test_worker_that_lost_its_lease_cannot_finish_the_item(queue, clock):
+    queue.enqueue("company", [{"name": "openai"}])
+    item = queue.claim("w1", lease=60)
+    clock.value += 61
+    reclaimed = queue.claim("w2", lease=60)
+    assert reclaimed["id"] == item["id"]
+
+    # the first worker comes back late, its results must not count
+    assert not queue.complete(item["id"], "w1", rows=10)
+    assert not queue.fail(item["id"], "w1", "timed out")
+    assert not queue.release(item["id"], "w1")
+    assert queue.claim("w3", lease=60) is None
+
+    assert queue.complete(reclaimed["id"], "w2", rows=5)
+    assert queue.counts() == [
+        {"kind": "company", "status": "done", "items": 1, "rows": 5}
+    ]
+
+
+def test_fail_requeues_until_max_attempts(queue, clock):
+    queue.enqueue("company", [{"name": "openai"}])
+    item = queue.claim("w1")
+    assert queue.fail(item["id"], "w1", "boom", max_attempts=2)
+    item = queue.claim("w1")
+    assert item["attempts"] == 2
+    assert queue.fail(item["id"], "w1", "boom", max_attempts=2)
+    assert queue.claim("w1") is None
+    assert queue.errors()[0]["status"] == "failed"
+
+
+def test_crawler_drops_results_of_a_lost_item(tmp_path, clock, monkeypatch):
+    worker = Worker(0, str(tmp_path / "queue.db"), str(tmp_path), "jsonl", "run", {})
+    worker.queue.enqueue("companies", [{"company_names": ["openai"]}])
+    item = worker.queue.claim(worker.name, lease=60)
+
+    def slow_scrape(account, payload):
+        # the lease runs out mid scrape and another worker picks the item up
+        clock.value += 61
+        worker.queue.claim("other", lease=60)
+        return [{"name": "OpenAI"}]
+
+    monkeypatch.setitem(JOBS, "companies", slow_scrape)
+
+    assert worker.scrape(types.SimpleNamespace(on_block=False), item)
+    assert "companies" not in worker.sinks
+    assert worker.queue.counts()[0]["status"] == "leased"